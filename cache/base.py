@@ -1,7 +1,40 @@
+import heapq
+import math
 from abc import ABC, abstractmethod
 
 import pandas as pd
 
+from utils.profiler import Profiler
+
+
+def get_refresh_priority(repetition_coefficient, load):
+    """
+    Heap key of a dirty entry: highest repetition coefficient first, then highest load (missing values last)
+    """
+    return (
+        -repetition_coefficient if not math.isnan(repetition_coefficient) else math.inf,
+        -load if not math.isnan(load) else math.inf,
+    )
+
+
+def pop_refresh_items(dirty_heap, count, is_stale):
+    """
+    Top count items of a dirty heap, stale items are dropped and the returned items stay in the heap
+    (they are only clean after they were refreshed), O(count log n)
+    :param dirty_heap: heap of (refresh priority, seq, key), seq orders entries of equal priority by cache order
+    :param is_stale: item -> True if the entry was evicted, re-cached or refreshed since the item was pushed
+    """
+    items = []
+    while dirty_heap and len(items) < count:
+        item = heapq.heappop(dirty_heap)
+        if not is_stale(item):
+            items.append(item)
+
+    for item in items:
+        heapq.heappush(dirty_heap, item)
+
+    return items
+
 
 class CacheBase(ABC):
     def __init__(self, max_capacity, cache_type="s3"):
@@ -16,6 +49,8 @@ class CacheBase(ABC):
             "evictions": 0,
         }
         self.cache_type = cache_type
+        # replaced by the profiler of the execution model (BaseExecutionModel.create_cache)
+        self.profiler = Profiler()
 
     def __contains__(self, key):
         return key in self.cache.index
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+class FenwickTree:
+    """
+    Prefix sums over n slots, O(log n) updates and queries
+    """
+
+    def __init__(self, n):
+        self.tree = [0.0] * (n + 1)
+
+    def add(self, i, value):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += value
+            i += i & -i
+
+    def prefix_sum(self, i):
+        """
+        :return: sum of slots 0..i (inclusive)
+        """
+        i += 1
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+
+        return total
+
+
+class MissRatioCurve:
+    """
+    Hits and hit ratio of the repetition-aware cache (RepetitionAwareCache) for every capacity, from one pass over
+    the reads of a workload.
+
+    The policy keeps the queries with the highest repetition coefficient, which does not change over the workload.
+    So it is a priority stack algorithm (Mattson et al.): the cache of capacity C holds the top of one stack of
+    all queries seen so far, ordered by priority, up to C bytes. A read of a query at stack distance d (bytes of
+    the queries above it plus its own size) hits every cache with C >= d. The pass stores one distance per read
+    (a Fenwick tree over the priority ranks gives it in O(log n)), any capacity is then evaluated vectorized.
+
+    Approximations of the simulated cache:
+    - queries with the same repetition coefficient rank by first read (the cache rejects a query that does not
+      fit if it does not beat the lowest coefficient, so the incumbents stay)
+    - an entry keeps the size of its first read; refreshes of dirty entries (smaller deltas) are not modeled,
+      neither are eviction rounds that free more space than needed
+    - the cache also admits a lower priority query whenever it fits into free space, to be evicted again by
+      the next higher priority one. This churn is not modeled, so far below the working set the curve can be off
+      in both directions (a churned query may still hit, or may have displaced a higher priority one)
+    Evictions and cached bytes depend on that churn, so they are left to the full simulations.
+    Full simulations (e.g. LazyExecutionModel) remain the reference for the capacities picked from the curve.
+    """
+
+    def __init__(self, wl):
+        """
+        :param wl: pd.DataFrame workload (query_hash, query_type, result_size, intermediate_result_size,
+            repetition_coefficient) in arrival order
+        """
+        reads = wl[wl["query_type"] == "select"]
+        self.reads = len(reads)
+
+        hashes = reads["query_hash"].to_numpy()
+        sizes = (reads["result_size"] + reads["intermediate_result_size"]).to_numpy(dtype="float64")
+        coefficients = reads["repetition_coefficient"].to_numpy(dtype="float64")
+        # queries that are never cached (RepetitionAwareCache.put)
+        cacheable = (sizes >= 0) & (coefficients > 0)
+
+        codes, unique_hashes = pd.factorize(hashes)
+        first_read = np.full(len(unique_hashes), len(codes))
+        np.minimum.at(first_read, codes, np.arange(len(codes)))
+        # priority rank: highest repetition coefficient first, then first read
+        unique_coefficients = np.zeros(len(unique_hashes))
+        unique_coefficients[codes] = coefficients
+        order = np.lexsort((first_read, -unique_coefficients))
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[order] = np.arange(len(order))
+
+        distances = np.full(self.reads, np.inf)
+        in_stack = np.zeros(len(unique_hashes), dtype=bool)
+        tree = FenwickTree(len(unique_hashes))
+        for i in np.flatnonzero(cacheable):
+            code = codes[i]
+            rank = ranks[code]
+            if in_stack[code]:
+                distances[i] = tree.prefix_sum(rank)
+            else:
+                in_stack[code] = True
+                tree.add(rank, sizes[i])
+
+        # stack distance of every read (inf: first read or never cached)
+        self.distances = np.sort(distances)
+
+    def get_curve(self, capacities):
+        """
+        :param capacities: cache capacities in bytes
+        :return: pd.DataFrame with capacity, hits and hit_ratio per capacity
+        """
+        capacities = np.asarray(capacities, dtype="float64")
+        hits = np.searchsorted(self.distances, capacities, side="right")
+
+        return pd.DataFrame({
+            "capacity": capacities,
+            "hits": hits,
+            "hit_ratio": hits / self.reads if self.reads else 0,
+        })
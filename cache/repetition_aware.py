@@ -1,6 +1,11 @@
+import heapq
+from collections import defaultdict
+
 import pandas as pd
 
-from cache.base import CacheBase
+from cache.base import CacheBase, get_refresh_priority, pop_refresh_items
+from utils.interning import get_db_tables
+from utils.profiler import profiled
 
 
 class RepetitionAwareCache(CacheBase):
@@ -14,6 +19,13 @@ class RepetitionAwareCache(CacheBase):
             ...
         }
     }
+
+    table_index = {
+        (unique_db_instance, table): { query_hash: None, ... } # insertion-ordered set of cached queries
+    }
+
+    dirty_heap = [ (refresh priority, seq, query_hash) ] # dirty queries, stale items are skipped lazily
+    seqs = { query_hash: seq } # put order of the cached queries
     """
 
     def __init__(self, max_capacity, structure, types, index_by, cache_type="s3"):
@@ -23,14 +35,126 @@ class RepetitionAwareCache(CacheBase):
         ).astype(types)
         self.cache.set_index(index_by, inplace=True)
         self.lowest_repetition_coefficient = None
-
-
+        self.table_index = defaultdict(dict)
+        self.indexed_tables = dict()
+        self.dirty_heap = []
+        self.dirty_keys = set()
+        self.seqs = dict()
+        self._seq = 0
+
+    def is_empty(self):
+        return self.cache.empty
+
+    def index_query(self, key, query):
+        db_tables = get_db_tables(query["unique_db_instance"], query["read_tables"])
+        for db_table in db_tables:
+            self.table_index[db_table][key] = None
+
+        self.indexed_tables[key] = db_tables
+        self._seq += 1
+        self.seqs[key] = self._seq
+        if query.get("dirty", False) == True:
+            self.push_dirty([key])
+
+    def unindex_query(self, key):
+        self.seqs.pop(key, None)
+        self.dirty_keys.discard(key)
+        for db_table in self.indexed_tables.pop(key, []):
+            keys = self.table_index.get(db_table)
+            if keys is None:
+                continue
+
+            keys.pop(key, None)
+            if not keys:
+                del self.table_index[db_table]
+
+    def is_stale_dirty(self, item):
+        key = item[2]
+
+        return self.seqs.get(key) != item[1] or key not in self.dirty_keys
+
+    def push_dirty(self, keys):
+        self.dirty_keys.update(keys)
+        rows = self.cache.loc[keys, ["repetition_coefficient", "load"]]
+        for key, repetition_coefficient, load in zip(keys, rows["repetition_coefficient"], rows["load"]):
+            heapq.heappush(self.dirty_heap, (get_refresh_priority(repetition_coefficient, load), self.seqs[key], key))
+
+        if len(self.dirty_heap) > 2 * len(self.seqs) + 64:
+            self.dirty_heap = [item for item in self.dirty_heap if not self.is_stale_dirty(item)]
+            heapq.heapify(self.dirty_heap)
+
+    def update_field(self, key, col, value):
+        super().update_field(key, col, value)
+        if col == "dirty":
+            if value and key not in self.dirty_keys:
+                self.push_dirty([key])
+            elif not value:
+                self.dirty_keys.discard(key)
+
+    def get_affected_keys(self, db_tables):
+        """
+        Looks up cached queries reading any of the given tables
+        :param db_tables: iterable of (unique_db_instance, table) pairs
+        :return: list of query hashes in cache order
+        """
+        affected_keys = dict()
+        for db_table in db_tables:
+            keys = self.table_index.get(db_table)
+            if keys:
+                affected_keys.update(keys)
+
+        return list(affected_keys)
+
+    def get_affected_repetition(self, db_tables):
+        """
+        :param db_tables: iterable of (unique_db_instance, table) pairs
+        :return: sum of the repetition coefficients of the cached queries reading any of the given tables
+        """
+        keys = self.get_affected_keys(db_tables)
+        if not keys:
+            return 0
+
+        return self.cache.loc[keys, "repetition_coefficient"].sum()
+
+    @profiled("cache.mark_dirty")
+    def mark_dirty(self, db_tables, delta, accumulate=False):
+        """
+        Marks cached queries reading any of the given tables as dirty and sets (or accumulates) their delta
+        :param db_tables: iterable of (unique_db_instance, table) pairs that were written
+        :param delta: write volume to set/add as delta
+        :param accumulate: add delta to the existing one instead of overwriting it
+        :return: list of affected query hashes
+        """
+        keys = self.get_affected_keys(db_tables)
+        self.profiler.record("cache.invalidation_scan", len(keys))
+        if not keys:
+            return keys
+
+        self.cache.loc[keys, "dirty"] = True
+        new_dirty = [key for key in keys if key not in self.dirty_keys]
+        if new_dirty:
+            self.push_dirty(new_dirty)
+        if accumulate:
+            self.cache.loc[keys, "delta"] += delta
+        else:
+            self.cache.loc[keys, "delta"] = delta
+
+        return keys
+
+    @profiled("cache.get_affected_queries")
     def get_affected_queries(self, query):
-        mask1 = self.cache["read_tables"].apply(lambda tables: query.write_table in tables)
-        mask2 = self.cache["unique_db_instance"] == query.unique_db_instance
+        keys = self.get_affected_keys([(query.unique_db_instance, query.write_table)])
+        self.profiler.record("cache.invalidation_scan", len(keys))
         self.insights["get_requests"] += 1
 
-        return self.cache[mask1 & mask2]
+        return self.cache.loc[keys]
+
+    @profiled("cache.get_refresh_candidates")
+    def get_refresh_candidates(self, count):
+        items = pop_refresh_items(self.dirty_heap, count, self.is_stale_dirty)
+        self.profiler.record("cache.refresh_candidates", len(items))
+
+        return list(self.cache.loc[[item[2] for item in items]].iterrows())
 
     def select_query_for_eviction(self):
         return self.cache["repetition_coefficient"].idxmin()
@@ -38,20 +162,24 @@ class RepetitionAwareCache(CacheBase):
     def evict_query(self, key):
         evicted_space = self.cache.loc[key]["size"]
         self.cache = self.cache.drop(index=key)
+        self.unindex_query(key)
         self.lowest_repetition_coefficient = self.cache["repetition_coefficient"].min()
         self.usage -= evicted_space
 
+    @profiled("cache.evict")
     def evict(self, space):
         evicted_space = 0
         while evicted_space < space:
             query_hash = self.select_query_for_eviction()
             evicted_space += self.cache.loc[query_hash]["size"]
             self.cache = self.cache.drop(index=query_hash)
+            self.unindex_query(query_hash)
             self.lowest_repetition_coefficient = self.cache["repetition_coefficient"].min()
             self.insights["evictions"] += 1
 
         self.usage -= evicted_space
 
+    @profiled("cache.put")
     def put(self, key, query):
         self.insights["put_requests"] += 1
 
@@ -77,6 +205,7 @@ class RepetitionAwareCache(CacheBase):
                 return False
 
         self.cache.loc[key] = query
+        self.index_query(key, query)
 
         if self.lowest_repetition_coefficient is None or query["repetition_coefficient"] < self.lowest_repetition_coefficient:
             self.lowest_repetition_coefficient = query["repetition_coefficient"]
@@ -84,3 +213,12 @@ class RepetitionAwareCache(CacheBase):
         self.usage += query["size"]
 
         return True
+
+    def reset(self):
+        super().reset()
+        self.lowest_repetition_coefficient = None
+        self.table_index = defaultdict(dict)
+        self.indexed_tables = dict()
+        self.dirty_heap = []
+        self.dirty_keys = set()
+        self.seqs = dict()
@@ -0,0 +1,259 @@
+import heapq
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from cache.base import CacheBase, get_refresh_priority, pop_refresh_items
+from utils.interning import get_db_tables
+from utils.profiler import profiled
+
+
+class CacheEntry:
+    __slots__ = ("key", "size", "repetition_coefficient", "dirty", "delta", "db_tables", "seq", "values")
+
+    def __init__(self, key, values, seq):
+        self.key = key
+        self.values = values
+        self.size = values["size"]
+        self.repetition_coefficient = values["repetition_coefficient"]
+        self.dirty = values.get("dirty", False)
+        self.delta = values.get("delta", 0)
+        self.db_tables = get_db_tables(values["unique_db_instance"], values["read_tables"])
+        self.seq = seq
+
+    def __getitem__(self, col):
+        if col == "dirty":
+            return self.dirty
+        if col == "delta":
+            return self.delta
+
+        return self.values[col]
+
+    def __setitem__(self, col, value):
+        if col == "dirty":
+            self.dirty = value
+        elif col == "delta":
+            self.delta = value
+
+        self.values[col] = value
+
+    def to_dict(self):
+        record = dict(self.values)
+        if "dirty" in record:
+            record["dirty"] = self.dirty
+        if "delta" in record:
+            record["delta"] = self.delta
+
+        return record
+
+
+class DictRepetitionAwareCache(CacheBase):
+    """
+    Same eviction policy as RepetitionAwareCache, stored as plain Python objects instead of a DataFrame:
+
+    cache = { query_hash: CacheEntry }
+    heap = [ (repetition_coefficient, seq, query_hash) ] # min-heap, stale items are skipped lazily
+    dirty_heap = [ (refresh priority, seq, query_hash) ] # dirty entries, see get_refresh_priority
+    table_index = { (unique_db_instance, table): { query_hash: None, ... } }
+    """
+
+    def __init__(self, max_capacity, structure, types, index_by, cache_type="s3"):
+        super().__init__(max_capacity, cache_type)
+        self.index_by = index_by
+        self.columns = [col for col in structure if col != index_by]
+        self.cache = dict()
+        self.heap = []
+        self.dirty_heap = []
+        self._seq = 0
+        self.table_index = defaultdict(dict)
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def is_empty(self):
+        return not self.cache
+
+    @property
+    def lowest_repetition_coefficient(self):
+        self._clean_heap()
+        if not self.heap:
+            return None
+
+        return self.heap[0][0]
+
+    def _is_stale(self, item):
+        entry = self.cache.get(item[2])
+
+        return entry is None or entry.seq != item[1]
+
+    def _clean_heap(self):
+        while self.heap and self._is_stale(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def _compact_heap(self):
+        # re-cached queries leave stale heap items behind
+        if len(self.heap) > 2 * len(self.cache) + 64:
+            self.heap = [item for item in self.heap if not self._is_stale(item)]
+            heapq.heapify(self.heap)
+
+    def _is_stale_dirty(self, item):
+        entry = self.cache.get(item[2])
+
+        return entry is None or entry.seq != item[1] or not entry.dirty
+
+    def _push_dirty(self, entry):
+        heapq.heappush(self.dirty_heap, (get_refresh_priority(entry.repetition_coefficient, entry["load"]), entry.seq, entry.key))
+        if len(self.dirty_heap) > 2 * len(self.cache) + 64:
+            self.dirty_heap = [item for item in self.dirty_heap if not self._is_stale_dirty(item)]
+            heapq.heapify(self.dirty_heap)
+
+    def get(self, key):
+        self.insights["get_requests"] += 1
+        item = self.cache.get(key)
+
+        if item is None:
+            self.insights["cache_misses"] += 1
+        else:
+            self.insights["cache_hits"] += 1
+
+        return item
+
+    def update_field(self, key, col, value):
+        entry = self.cache[key]
+        was_dirty = entry.dirty
+        entry[col] = value
+        if entry.dirty and not was_dirty:
+            self._push_dirty(entry)
+
+    def to_frame(self, keys=None):
+        if keys is None:
+            keys = list(self.cache)
+
+        records = [self.cache[key].to_dict() for key in keys]
+        df = pd.DataFrame(records, columns=self.columns, index=pd.Index(keys, name=self.index_by))
+
+        return df
+
+    def get_affected_keys(self, db_tables):
+        affected_keys = dict()
+        for db_table in db_tables:
+            keys = self.table_index.get(db_table)
+            if keys:
+                affected_keys.update(keys)
+
+        return list(affected_keys)
+
+    def get_affected_repetition(self, db_tables):
+        return sum(self.cache[key].repetition_coefficient for key in self.get_affected_keys(db_tables))
+
+    @profiled("cache.mark_dirty")
+    def mark_dirty(self, db_tables, delta, accumulate=False):
+        keys = self.get_affected_keys(db_tables)
+        self.profiler.record("cache.invalidation_scan", len(keys))
+        for key in keys:
+            entry = self.cache[key]
+            if not entry.dirty:
+                entry.dirty = True
+                self._push_dirty(entry)
+            entry.delta = entry.delta + delta if accumulate else delta
+
+        return keys
+
+    @profiled("cache.get_affected_queries")
+    def get_affected_queries(self, query):
+        keys = self.get_affected_keys([(query.unique_db_instance, query.write_table)])
+        self.profiler.record("cache.invalidation_scan", len(keys))
+        self.insights["get_requests"] += 1
+
+        return self.to_frame(keys)
+
+    @profiled("cache.get_refresh_candidates")
+    def get_refresh_candidates(self, count):
+        items = pop_refresh_items(self.dirty_heap, count, self._is_stale_dirty)
+        self.profiler.record("cache.refresh_candidates", len(items))
+        entries = [self.cache[item[2]] for item in items]
+
+        return [(entry.key, pd.Series(entry.to_dict(), index=self.columns, name=entry.key)) for entry in entries]
+
+    def select_query_for_eviction(self):
+        self._clean_heap()
+
+        return self.heap[0][2]
+
+    def _remove(self, key):
+        entry = self.cache.pop(key)
+        for db_table in entry.db_tables:
+            keys = self.table_index.get(db_table)
+            if keys is None:
+                continue
+
+            keys.pop(key, None)
+            if not keys:
+                del self.table_index[db_table]
+
+        return entry
+
+    def evict_query(self, key):
+        entry = self._remove(key)
+        self.usage -= entry.size
+
+    @profiled("cache.evict")
+    def evict(self, space):
+        evicted_space = 0
+        while evicted_space < space and self.cache:
+            query_hash = self.select_query_for_eviction()
+            heapq.heappop(self.heap)
+            evicted_space += self._remove(query_hash).size
+            self.insights["evictions"] += 1
+
+        self.usage -= evicted_space
+
+    @profiled("cache.put")
+    def put(self, key, query):
+        self.insights["put_requests"] += 1
+
+        # if query already in cache => evict and re-cache
+        if key in self.cache:
+            self.evict_query(key)
+
+        if query["size"] < 0 or query["repetition_coefficient"] == 0 or (self.max_capacity and query["size"] > self.max_capacity):
+            return False
+
+        if not self.can_fit(query["size"]):
+            if query["repetition_coefficient"] > self.lowest_repetition_coefficient:
+                remaining_space = self.max_capacity - self.usage
+                space = query["size"] - remaining_space
+                self.evict(space)
+            else:
+                return False
+
+        values = {col: query.get(col, np.nan) for col in self.columns}
+        self._seq += 1
+        entry = CacheEntry(key, values, self._seq)
+        self.cache[key] = entry
+        for db_table in entry.db_tables:
+            self.table_index[db_table][key] = None
+
+        heapq.heappush(self.heap, (entry.repetition_coefficient, entry.seq, key))
+        self._compact_heap()
+        if entry.dirty:
+            self._push_dirty(entry)
+
+        self.usage += entry.size
+
+        return True
+
+    def reset(self):
+        self.cache = dict()
+        self.usage = 0
+        self.insights = {
+            "cache_misses": 0,
+            "cache_hits": 0,
+            "get_requests": 0,
+            "put_requests": 0,
+            "evictions": 0,
+        }
+        self.heap = []
+        self.dirty_heap = []
+        self.table_index = defaultdict(dict)
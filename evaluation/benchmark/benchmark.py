@@ -0,0 +1,275 @@
+import argparse
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from evaluation.hw_params import HW_PARAMETERS
+from evaluation.parameter_space.experiment import ParameterSpaceExperiment
+from evaluation.utils import get_latency_report
+from execution_model.models.eager import EagerExecutionModel
+from execution_model.models.hybrid import HybridModel
+from execution_model.models.lazy import LazyExecutionModel
+from execution_model.models.one_off import OneOffExecutionModel
+from utils.file import load_json, load_workload, save_json_file, save_workload
+from workload_analyzer.workload_insights import WorkloadInsights
+from workload_generator.generator import WorkloadGenerator
+
+ROOT_PATH = Path(__file__).parents[2]
+BENCHMARK_PATH = Path(__file__).parent
+
+
+def get_peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """
+    Wall time and peak RSS per stage. The peak is the process peak at the end of the stage, every task runs in
+    a fresh process (run_task), so it covers the stage and the earlier stages of the same task.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages.append({
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 4),
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+        })
+
+
+def run_generation(config, wl_path):
+    """
+    WorkloadGenerator.generate_workload timed per stage, the workload is stored at wl_path for the models
+    """
+    timer = StageTimer()
+    generator = WorkloadGenerator(config)
+    rng = generator.get_rng()
+
+    with timer.stage("generation"):
+        query_pool = generator.generate_query_pool(rng)
+
+    with timer.stage("scheduling"):
+        scheduled_queries = generator.schedule_queries(query_pool, rng)
+
+    with timer.stage("preprocess_workload"):
+        wl = generator.prepare_workload(scheduled_queries)
+
+    with timer.stage("insights"):
+        WorkloadInsights(wl).get_insights()
+
+    save_workload(wl, wl_path)
+
+    return timer.stages
+
+
+def create_model(model, wl, config, cache_config):
+    if model == "one_off":
+        return OneOffExecutionModel(wl)
+    if model == "eager":
+        return EagerExecutionModel(wl, cache_config)
+    if model == "lazy":
+        return LazyExecutionModel(wl, cache_config)
+    if model == "hybrid":
+        return HybridModel(wl, cache_config, ParameterSpaceExperiment.get_load_ref(config, wl))
+
+    raise ValueError(f"Unknown model: {model}")
+
+
+def run_model(model, config, wl_path, cache_config, hw_params):
+    """
+    Plan generation, costing and latency of one execution model
+    """
+    timer = StageTimer()
+    wl = load_workload(wl_path)
+    np.random.seed(config["seed"])
+
+    with timer.stage(f"{model}/plan"):
+        execution_model = create_model(model, wl, config, cache_config)
+        plan = execution_model.generate_workload_execution_plan()
+
+    with timer.stage(f"{model}/cost"):
+        execution_model.get_cost(hw_params)
+
+    with timer.stage(f"{model}/latency"):
+        plan["runtime"] = execution_model.get_cost_report(hw_params).runtime_per_query
+        get_latency_report(plan, hw_params)
+
+    return timer.stages
+
+
+def run_task(function, *args):
+    """
+    Runs function in a fresh process, so the peak RSS of a task does not include earlier tasks
+    """
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(function, *args).result()
+
+
+class Benchmark:
+    """
+    Times the simulator stages (generation, scheduling, preprocess_workload, insights and plan/cost/latency of
+    every execution model) for growing workload sizes. Runs are appended to results/history.json and compared
+    against results/baseline.json, a stage regresses if its time or peak RSS grows by more than the tolerance.
+    """
+
+    def __init__(self, config_path=None, results_dir=None):
+        self.config = load_json(config_path or BENCHMARK_PATH / "config.json")
+        self.results_dir = Path(results_dir or BENCHMARK_PATH / "results")
+        self.history_path = self.results_dir / "history.json"
+        self.baseline_path = self.results_dir / "baseline.json"
+        self.hw_params = {
+            "instance": HW_PARAMETERS["aws_instances"][self.config["instance"]],
+            "cache": HW_PARAMETERS["cache"][self.config["cache"]],
+        }
+
+    def get_workload_config(self, size):
+        config = load_json(ROOT_PATH / self.config["presets"][self.config["preset"]])
+        config["size"] = size
+        config["seed"] = self.config["seed"]
+
+        return config
+
+    def run(self, sizes=None, models=None):
+        """
+        :param sizes: workload sizes, defaults to the config
+        :param models: execution models, defaults to the config (each is skipped above its max_size)
+        :return: run (dict) with one result row per (size, stage)
+        """
+        results = []
+        with tempfile.TemporaryDirectory() as data_dir:
+            for size in sizes or self.config["sizes"]:
+                config = self.get_workload_config(size)
+                wl_path = Path(data_dir) / f"wl_{size}.parquet"
+
+                print(f"Size {size}: generation")
+                results += [{"size": size, **stage} for stage in run_task(run_generation, config, wl_path)]
+
+                for model in models or self.config["models"]:
+                    if size > self.config["max_size"].get(model, size):
+                        print(f"Size {size}: skipping {model} (max_size)")
+                        continue
+
+                    print(f"Size {size}: {model}")
+                    stages = run_task(run_model, model, config, wl_path, self.config["cache_config"], self.hw_params)
+                    results += [{"size": size, **stage} for stage in stages]
+
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "preset": self.config["preset"],
+            "results": results,
+        }
+
+    def load_history(self):
+        if not self.history_path.exists():
+            return []
+
+        return load_json(self.history_path)
+
+    def save(self, run):
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        save_json_file(self.load_history() + [run], self.history_path)
+
+    def save_baseline(self, run):
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        save_json_file(run, self.baseline_path)
+
+    def compare(self, run, baseline=None):
+        """
+        :param baseline: run to compare with, defaults to results/baseline.json
+        :return: list of regressions { size, stage, metric, baseline, value, change }
+        """
+        if baseline is None:
+            if not self.baseline_path.exists():
+                return []
+            baseline = load_json(self.baseline_path)
+
+        tolerances = self.config["regression"]
+        metrics = [
+            ("seconds", tolerances["time_tolerance"], tolerances["min_seconds"]),
+            ("peak_rss_mb", tolerances["rss_tolerance"], tolerances["min_rss_mb"]),
+        ]
+        reference = {(row["size"], row["stage"]): row for row in baseline["results"]}
+
+        regressions = []
+        for row in run["results"]:
+            base = reference.get((row["size"], row["stage"]))
+            if base is None:
+                continue
+
+            for metric, tolerance, min_change in metrics:
+                change = row[metric] - base[metric]
+                if change > min_change and row[metric] > base[metric] * (1 + tolerance):
+                    regressions.append({
+                        "size": row["size"],
+                        "stage": row["stage"],
+                        "metric": metric,
+                        "baseline": base[metric],
+                        "value": row[metric],
+                        "change": round(change / base[metric], 3) if base[metric] else float("inf"),
+                    })
+
+        return regressions
+
+    @staticmethod
+    def get_report(run):
+        """
+        :return: pd.DataFrame with the seconds and peak RSS per stage (rows) and size (columns)
+        """
+        df = pd.DataFrame(run["results"])
+        stages = list(dict.fromkeys(df["stage"]))
+
+        return df.pivot(index="stage", columns="size", values=["seconds", "peak_rss_mb"]).reindex(stages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulator stages across workload sizes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="Workload sizes, defaults to the config")
+    parser.add_argument("--models", type=str, nargs="+", default=None, help="Execution models, defaults to the config")
+    parser.add_argument("--config", type=str, default=None, help="Benchmark config, defaults to config.json")
+    parser.add_argument("--save_baseline", action="store_true", help="Store this run as the new baseline")
+    args = parser.parse_args()
+
+    benchmark = Benchmark(args.config)
+    run = benchmark.run(args.sizes, args.models)
+    regressions = benchmark.compare(run)
+    benchmark.save(run)
+    if args.save_baseline:
+        benchmark.save_baseline(run)
+
+    print(Benchmark.get_report(run).to_string())
+    for regression in regressions:
+        print(
+            "REGRESSION size={size} stage={stage} {metric}: {baseline} -> {value} (+{change:.0%})".format(**regression)
+        )
+
+    sys.exit(1 if regressions else 0)
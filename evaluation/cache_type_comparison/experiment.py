@@ -3,13 +3,16 @@ from pathlib import Path
 import pandas as pd
 
 from evaluation.hw_params import HW_PARAMETERS
-from evaluation.utils import estimate_latency
+from evaluation.utils import get_query_latency
 from execution_model.models.hybrid import HybridModel
-from utils.file import load_json
+from pricing_calculator.batch_pricing import BatchPricing
+from utils.artifact_cache import ArtifactCache
+from utils.file import load_json, load_workload, save_plan
 
 
 class CacheTypeComparison:
     def __init__(self):
+        self.artifact_cache = ArtifactCache("artifacts")
         self.wls = [
             "wl1",
              "wl2",
@@ -32,7 +35,7 @@ class CacheTypeComparison:
         path.mkdir(parents=True, exist_ok=True)
 
         for wl_name in self.wls:
-            wl = pd.read_csv(f"data/{wl_name}/wl.csv")
+            wl = load_workload(f"data/{wl_name}/wl.csv")
             wl["hour"] = wl["hour"].astype(int)
             wl_config = load_json(f"data/{wl_name}/config.json")
             cache_size = self.cache_size_map[wl_name]
@@ -49,28 +52,36 @@ class CacheTypeComparison:
                 "cpu_time": wl["cpu_time"].median(),
             }
 
-            for cache_type in cache_types:
-                print(f"Workload: {wl_name}, cache_type: {cache_type}")
-                cache_params = HW_PARAMETERS["cache"][cache_type]
-                hw_params = {
+            # the cache type only changes the pricing, the plan is simulated once and priced for every cache type
+            print(f"Workload: {wl_name}")
+            cache_config = {
+                "max_capacity": cache_size * 1e9,
+                "cache_type": "gp3"
+            }
+            model = HybridModel(wl, cache_config, load_ref, artifact_cache=self.artifact_cache)
+            plan = model.generate_workload_execution_plan()
+
+            profiles = {
+                cache_type: {
                     "instance": HW_PARAMETERS["aws_instances"]["c5n.large"],
-                    "cache": cache_params
-                }
-                cache_config = {
-                    "max_capacity": cache_size * 1e9,
-                    "cost_per_gb": cache_params["cost_per_gb"],
-                    "put_cost": cache_params["put_cost"],
-                    "get_cost": cache_params["get_cost"],
-                    "cache_type": "gp3"
+                    "cache": HW_PARAMETERS["cache"][cache_type]
                 }
-                model = HybridModel(wl, cache_config, load_ref)
-                plan = model.generate_workload_execution_plan()
-                plan["latency"] = estimate_latency(plan, hw_params)
+                for cache_type in cache_types
+            }
+            # every cache type is billed for the provisioned capacity, like the gp3 model it is simulated with
+            pricing = BatchPricing(plan, model.cache.max_capacity, model.cache.max_capacity)
+            costs = pricing.get_costs(profiles)
+            runtime = pricing.get_runtime_per_query(profiles)
+
+            for cache_type in cache_types:
+                print(f"Workload: {wl_name}, cache_type: {cache_type}")
+                plan["runtime"] = runtime[cache_type].to_numpy()
+                plan["latency"] = get_query_latency(plan)
 
-                plan.to_csv(f"{result_path}/plan_{wl_name}_{cache_type}.csv")
+                save_plan(plan, f"{result_path}/plan_{wl_name}_{cache_type}.parquet")
 
-                storage_cost = model.get_storage_cost(hw_params)
-                compute_cost = model.get_compute_cost(hw_params)
+                storage_cost = costs.at[cache_type, "storage_cost"]
+                compute_cost = costs.at[cache_type, "compute_cost"]
                 total_cost = compute_cost + storage_cost
 
                 row = {
@@ -1,18 +1,22 @@
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from cache.miss_ratio_curve import MissRatioCurve
+
 from evaluation.hw_params import HW_PARAMETERS
 from execution_model.models.eager import EagerExecutionModel
 from execution_model.models.hybrid import HybridModel
 from execution_model.models.lazy import LazyExecutionModel
 from execution_model.models.one_off import OneOffExecutionModel
-from execution_model.utils.const import WORKLOAD_TYPES_DICT
-from utils.file import load_json
+from utils.artifact_cache import ArtifactCache
+from utils.file import load_json, load_workload, save_plan
 
 
 class CostComparisonExperiment:
     def __init__(self, wl, wl_config):
+        self.artifact_cache = ArtifactCache("artifacts")
         self.wl = wl
         self.wl_config = wl_config
 
@@ -39,6 +43,48 @@ class CostComparisonExperiment:
             "cpu_time": self.wl["cpu_time"].median(),
         }
 
+    def get_capacity_curve(self, cache_sizes):
+        """
+        Hits and hit ratio of the cache for every size, from one pass over the workload
+        :param cache_sizes: cache sizes in GB
+        """
+        curve = MissRatioCurve(self.wl).get_curve(np.asarray(cache_sizes, dtype="float64") * 1e9)
+        curve.insert(0, "cache_size", cache_sizes)
+
+        return curve
+
+    @staticmethod
+    def select_cache_sizes(curve, count):
+        """
+        Smallest and largest size, then the sizes with the largest hit ratio gain over the next smaller size
+        :param curve: get_capacity_curve
+        :return: sorted list of at most count cache sizes (GB)
+        """
+        curve = curve.sort_values("cache_size")
+        sizes = curve["cache_size"].tolist()
+        if len(sizes) <= count:
+            return sizes
+
+        gains = curve["hit_ratio"].diff().iloc[1:-1]
+        selected = [sizes[0], sizes[-1]]
+        selected += curve.loc[gains.sort_values(ascending=False, kind="stable").index, "cache_size"].tolist()[:count - 2]
+
+        return sorted(selected)
+
+    def get_cache_sizes(self, result_path):
+        """
+        Cache sizes to simulate, cache_size_range_gb by default. Opt-in: with candidate_cache_sizes_gb (e.g. 20
+        sizes) and cache_sizes_to_simulate in config.json, the capacity curve of the candidates is saved as
+        capacity_curve.csv and only the cache_sizes_to_simulate most interesting ones are simulated (replaces
+        cache_size_range_gb, name the results accordingly)
+        """
+        if "candidate_cache_sizes_gb" not in self.config:
+            return self.config["cache_size_range_gb"]
+
+        curve = self.get_capacity_curve(self.config["candidate_cache_sizes_gb"])
+        curve.to_csv(f"{result_path}/capacity_curve.csv", index=False)
+
+        return self.select_cache_sizes(curve, self.config["cache_sizes_to_simulate"])
 
     def run(self):
         result_path = f"results/{self.name}_with_pending"
@@ -50,15 +96,15 @@ class CostComparisonExperiment:
             "cache": self.cache_params
         }
 
-        one_off_model = OneOffExecutionModel(self.wl)
+        one_off_model = OneOffExecutionModel(self.wl, artifact_cache=self.artifact_cache)
         one_off_plan = one_off_model.generate_workload_execution_plan()
-        one_off_plan.to_csv(f"{result_path}/one_off_plan.csv")
+        save_plan(one_off_plan, f"{result_path}/one_off_plan.parquet")
         one_off_comp_cost = one_off_model.get_compute_cost(hw_params)
         one_off_sto_cost = one_off_model.get_storage_cost(hw_params)
         one_off_pending_cost = one_off_model.get_pending_cost(hw_params)
         one_off_cost = one_off_model.get_cost(hw_params)
 
-        cache_sizes = self.config["cache_size_range_gb"]
+        cache_sizes = self.get_cache_sizes(result_path)
         data = []
 
         for size in cache_sizes:
@@ -77,9 +123,9 @@ class CostComparisonExperiment:
 
             # hybrid
             print("Hybrid Running")
-            hybrid_model = HybridModel(self.wl, self.cache_config, self.load_ref)
+            hybrid_model = HybridModel(self.wl, self.cache_config, self.load_ref, artifact_cache=self.artifact_cache)
             hybrid_plan = hybrid_model.generate_workload_execution_plan()
-            hybrid_plan.to_csv(f"{result_path}/hybrid_plan_{size}.csv")
+            save_plan(hybrid_plan, f"{result_path}/hybrid_plan_{size}.parquet")
             comp_cost = hybrid_model.get_compute_cost(hw_params)
             sto_cost = hybrid_model.get_storage_cost(hw_params)
             pending_cost = hybrid_model.get_pending_cost(hw_params)
@@ -98,9 +144,9 @@ class CostComparisonExperiment:
 
             # eager
             print("Eager Running")
-            eager_model = EagerExecutionModel(self.wl, self.cache_config)
+            eager_model = EagerExecutionModel(self.wl, self.cache_config, artifact_cache=self.artifact_cache)
             eager_plan = eager_model.generate_workload_execution_plan()
-            eager_plan.to_csv(f"{result_path}/eager_plan_{size}.csv")
+            save_plan(eager_plan, f"{result_path}/eager_plan_{size}.parquet")
             comp_cost = eager_model.get_compute_cost(hw_params)
             sto_cost = eager_model.get_storage_cost(hw_params)
             pending_cost = eager_model.get_pending_cost(hw_params)
@@ -119,9 +165,9 @@ class CostComparisonExperiment:
 
             # lazy
             print("Lazy Running")
-            lazy_model = LazyExecutionModel(self.wl, self.cache_config)
+            lazy_model = LazyExecutionModel(self.wl, self.cache_config, artifact_cache=self.artifact_cache)
             lazy_plan = lazy_model.generate_workload_execution_plan()
-            lazy_plan.to_csv(f"{result_path}/lazy_plan_{size}.csv")
+            save_plan(lazy_plan, f"{result_path}/lazy_plan_{size}.parquet")
             comp_cost = lazy_model.get_compute_cost(hw_params)
             sto_cost = lazy_model.get_storage_cost(hw_params)
             pending_cost = lazy_model.get_pending_cost(hw_params)
@@ -152,7 +198,7 @@ class CostComparisonExperiment:
 
 if __name__ == "__main__":
     path = "data/wl1"
-    wl = pd.read_csv(f"{path}/wl.csv").astype(WORKLOAD_TYPES_DICT)
+    wl = load_workload(f"{path}/wl.csv")
     wl_config = load_json(f"{path}/config.json")
     experiment = CostComparisonExperiment(wl, wl_config)
     experiment.run()
\ No newline at end of file
@@ -1,9 +1,300 @@
 HW_PARAMETERS = {
+  # on-demand Linux prices (us-east-1), network_speed in Gbps (baseline or "up to" bandwidth of the size)
   "aws_instances": {
+    "c5.large": {
+      "vCPUs": 2,
+      "network_speed": 10,
+      "price_per_hour": 0.085
+    },
+    "c5.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 10,
+      "price_per_hour": 0.17
+    },
+    "c5.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 10,
+      "price_per_hour": 0.34
+    },
+    "c5.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 10,
+      "price_per_hour": 0.68
+    },
+    "c5.9xlarge": {
+      "vCPUs": 36,
+      "network_speed": 12,
+      "price_per_hour": 1.53
+    },
+    "c5.12xlarge": {
+      "vCPUs": 48,
+      "network_speed": 12,
+      "price_per_hour": 2.04
+    },
+    "c5.18xlarge": {
+      "vCPUs": 72,
+      "network_speed": 25,
+      "price_per_hour": 3.06
+    },
+    "c5.24xlarge": {
+      "vCPUs": 96,
+      "network_speed": 25,
+      "price_per_hour": 4.08
+    },
     "c5n.large": {
       "vCPUs": 2,
       "network_speed": 25,
       "price_per_hour": 0.108
+    },
+    "c5n.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 25,
+      "price_per_hour": 0.216
+    },
+    "c5n.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 25,
+      "price_per_hour": 0.432
+    },
+    "c5n.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 25,
+      "price_per_hour": 0.864
+    },
+    "c5n.9xlarge": {
+      "vCPUs": 36,
+      "network_speed": 50,
+      "price_per_hour": 1.944
+    },
+    "c5n.18xlarge": {
+      "vCPUs": 72,
+      "network_speed": 100,
+      "price_per_hour": 3.888
+    },
+    "c6i.large": {
+      "vCPUs": 2,
+      "network_speed": 12.5,
+      "price_per_hour": 0.085
+    },
+    "c6i.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 12.5,
+      "price_per_hour": 0.17
+    },
+    "c6i.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 12.5,
+      "price_per_hour": 0.34
+    },
+    "c6i.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 12.5,
+      "price_per_hour": 0.68
+    },
+    "c6i.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 12.5,
+      "price_per_hour": 1.36
+    },
+    "c6i.12xlarge": {
+      "vCPUs": 48,
+      "network_speed": 18.75,
+      "price_per_hour": 2.04
+    },
+    "c6i.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 25,
+      "price_per_hour": 2.72
+    },
+    "c6i.24xlarge": {
+      "vCPUs": 96,
+      "network_speed": 37.5,
+      "price_per_hour": 4.08
+    },
+    "c6i.32xlarge": {
+      "vCPUs": 128,
+      "network_speed": 50,
+      "price_per_hour": 5.44
+    },
+    "c6in.large": {
+      "vCPUs": 2,
+      "network_speed": 25,
+      "price_per_hour": 0.1134
+    },
+    "c6in.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 30,
+      "price_per_hour": 0.2268
+    },
+    "c6in.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 40,
+      "price_per_hour": 0.4536
+    },
+    "c6in.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 50,
+      "price_per_hour": 0.9072
+    },
+    "c6in.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 50,
+      "price_per_hour": 1.8144
+    },
+    "c6in.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 100,
+      "price_per_hour": 3.6288
+    },
+    "c6in.32xlarge": {
+      "vCPUs": 128,
+      "network_speed": 200,
+      "price_per_hour": 7.2576
+    },
+    "c7g.large": {
+      "vCPUs": 2,
+      "network_speed": 12.5,
+      "price_per_hour": 0.0725
+    },
+    "c7g.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 12.5,
+      "price_per_hour": 0.145
+    },
+    "c7g.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 15,
+      "price_per_hour": 0.29
+    },
+    "c7g.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 15,
+      "price_per_hour": 0.58
+    },
+    "c7g.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 15,
+      "price_per_hour": 1.16
+    },
+    "c7g.12xlarge": {
+      "vCPUs": 48,
+      "network_speed": 22.5,
+      "price_per_hour": 1.74
+    },
+    "c7g.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 30,
+      "price_per_hour": 2.32
+    },
+    "m5.large": {
+      "vCPUs": 2,
+      "network_speed": 10,
+      "price_per_hour": 0.096
+    },
+    "m5.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 10,
+      "price_per_hour": 0.192
+    },
+    "m5.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 10,
+      "price_per_hour": 0.384
+    },
+    "m5.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 10,
+      "price_per_hour": 0.768
+    },
+    "m5.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 10,
+      "price_per_hour": 1.536
+    },
+    "m5.12xlarge": {
+      "vCPUs": 48,
+      "network_speed": 12,
+      "price_per_hour": 2.304
+    },
+    "m5.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 20,
+      "price_per_hour": 3.072
+    },
+    "m5.24xlarge": {
+      "vCPUs": 96,
+      "network_speed": 25,
+      "price_per_hour": 4.608
+    },
+    "m6i.large": {
+      "vCPUs": 2,
+      "network_speed": 12.5,
+      "price_per_hour": 0.096
+    },
+    "m6i.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 12.5,
+      "price_per_hour": 0.192
+    },
+    "m6i.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 12.5,
+      "price_per_hour": 0.384
+    },
+    "m6i.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 12.5,
+      "price_per_hour": 0.768
+    },
+    "m6i.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 12.5,
+      "price_per_hour": 1.536
+    },
+    "m6i.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 25,
+      "price_per_hour": 3.072
+    },
+    "m6i.32xlarge": {
+      "vCPUs": 128,
+      "network_speed": 50,
+      "price_per_hour": 6.144
+    },
+    "r5.large": {
+      "vCPUs": 2,
+      "network_speed": 10,
+      "price_per_hour": 0.126
+    },
+    "r5.xlarge": {
+      "vCPUs": 4,
+      "network_speed": 10,
+      "price_per_hour": 0.252
+    },
+    "r5.2xlarge": {
+      "vCPUs": 8,
+      "network_speed": 10,
+      "price_per_hour": 0.504
+    },
+    "r5.4xlarge": {
+      "vCPUs": 16,
+      "network_speed": 10,
+      "price_per_hour": 1.008
+    },
+    "r5.8xlarge": {
+      "vCPUs": 32,
+      "network_speed": 10,
+      "price_per_hour": 2.016
+    },
+    "r5.16xlarge": {
+      "vCPUs": 64,
+      "network_speed": 20,
+      "price_per_hour": 4.032
+    },
+    "r5.24xlarge": {
+      "vCPUs": 96,
+      "network_speed": 25,
+      "price_per_hour": 6.048
     }
   },
   "cache": {
@@ -25,6 +316,52 @@ HW_PARAMETERS = {
       "type": "gp3",
       "throughput_mb_per_s": 125,
       "extra_cost": 0
+    },
+    "gp2":{
+      "cost_per_gb": 0.1,
+      "put_cost": 0,
+      "get_cost": 0,
+      "request_latency_min": 1,
+      "request_latency_max": 2,
+      "type": "gp2",
+      "throughput_mb_per_s": 250,
+      "extra_cost": 0
+    },
+    "st1":{
+      "cost_per_gb": 0.045,
+      "put_cost": 0,
+      "get_cost": 0,
+      "request_latency_min": 5,
+      "request_latency_max": 10,
+      "type": "st1",
+      "throughput_mb_per_s": 500,
+      "extra_cost": 0
+    },
+    "s3_express": {
+      "cost_per_gb": 0.16,
+      "put_cost": 0.0025, # per 1000 requests
+      "get_cost": 0.0002, # per 1000 requests
+      "request_latency_min": 5,
+      "request_latency_max": 10,
+      "type": "s3",
+      "extra_cost": 0
     }
   }
 }
+
+
+def get_hw_profiles(instances=None, caches=None):
+    """
+    Hardware parameters of every (instance, cache) pair, e.g. for BatchPricing
+    :param instances: instance names, defaults to all aws_instances
+    :param caches: cache names, defaults to all caches
+    :return: { "instance/cache": { instance, cache } }
+    """
+    return {
+        f"{instance}/{cache}": {
+            "instance": HW_PARAMETERS["aws_instances"][instance],
+            "cache": HW_PARAMETERS["cache"][cache],
+        }
+        for instance in instances or HW_PARAMETERS["aws_instances"]
+        for cache in caches or HW_PARAMETERS["cache"]
+    }
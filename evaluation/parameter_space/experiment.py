@@ -1,3 +1,4 @@
+import copy
 from pathlib import Path
 
 import pandas as pd
@@ -7,14 +8,15 @@ from execution_model.models.eager import EagerExecutionModel
 from execution_model.models.hybrid import HybridModel
 from execution_model.models.lazy import LazyExecutionModel
 from execution_model.models.one_off import OneOffExecutionModel
-from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
-from utils.file import load_json, save_json_file
+from utils.artifact_cache import ArtifactCache
+from utils.file import load_json, save_json_file, save_workload, save_plan
 from workload_analyzer.workload_insights import WorkloadInsights
 from workload_generator.generator import WorkloadGenerator
 
 
 class ParameterSpaceExperiment:
     def __init__(self):
+        self.artifact_cache = ArtifactCache("artifacts")
         config_path = "config.json"
         self.config = load_json(config_path)
         self.cache_params = HW_PARAMETERS["cache"]["gp3"]
@@ -34,7 +36,11 @@ class ParameterSpaceExperiment:
     def run(self):
         pass
 
-    def generate_workloads(self):
+    def get_cells(self):
+        """
+        Workload configurations of the sweep
+        :return: list of { name, ratio_cat, repetitiveness, write_frequency, config, cache_config }
+        """
         bytes_scanned = [
             [
                 600,  # mb
@@ -103,24 +109,21 @@ class ParameterSpaceExperiment:
             "very_high"
         ]
 
-        config = self.config
-        result = []
+        cells = []
 
         for scan_size, write_size, cache, n1 in zip(bytes_scanned, write_volume, cache_sizes, name1):
-            config["query_config"]["bytes_scanned"] = {
-                "lower_bound_mb": scan_size[0],
-                "upper_bound_gb": scan_size[1]
-            }
-            config["query_config"]["write_volume"] = {
-                "lower_bound_mb": write_size[0],
-                "upper_bound_gb": write_size[1]
-            }
-            self.cache_config["max_capacity"] = cache
-
             for r, n2 in zip(repetitiveness, name2):
-                config["repetitiveness"] = r
                 for wf, n3 in zip(write_frequency, name3):
-                    print(f"Generating workload: workload_{n1}_{n2}_{n3}")
+                    config = copy.deepcopy(self.config)
+                    config["query_config"]["bytes_scanned"] = {
+                        "lower_bound_mb": scan_size[0],
+                        "upper_bound_gb": scan_size[1]
+                    }
+                    config["query_config"]["write_volume"] = {
+                        "lower_bound_mb": write_size[0],
+                        "upper_bound_gb": write_size[1]
+                    }
+                    config["repetitiveness"] = r
                     config["query_config"]["query_type_p"] = {
                         "select": 1 - wf,
                         "insert": wf,
@@ -128,94 +131,114 @@ class ParameterSpaceExperiment:
                         "update": 0
                     }
 
-                    result_path = f"data/redset_scan_3/workload_{n1}_{n2}_{n3}"
-                    path = Path(result_path)
-                    path.mkdir(parents=True, exist_ok=True)
-
-                    wl_generator = WorkloadGenerator(config)
-                    wl = wl_generator.generate_workload()
-                    insights = WorkloadInsights(wl).get_insights()
-
-                    wl.to_csv(f"{result_path}/wl.csv", index=False)
-                    save_json_file(insights, f"{result_path}/insights.json")
-                    save_json_file(config, f"{result_path}/config.json")
-                    save_json_file(self.hw_params, f"{result_path}/hw_params.json")
-                    save_json_file(self.cache_config, f"{result_path}/cache_config.json")
-
-                    one_off = OneOffExecutionModel(wl)
-                    one_off_plan = one_off.generate_workload_execution_plan()
-                    one_off_plan.to_csv(f"{result_path}/one_off_plan.csv")
-                    one_off_runtime = one_off.get_runtime(hw_parameters=self.hw_params)
-                    one_off_cost = one_off.get_cost(hw_parameters=self.hw_params)
-                    one_off_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=one_off_plan)
-
-                    load_ref = {
-                        "bytes_scanned": (config["query_config"]["bytes_scanned"]["lower_bound_mb"] * 1e6 +
-                                          config["query_config"]["bytes_scanned"][
-                                              "upper_bound_gb"] * 1e9) / 2,
-                        "result_size": (config["query_config"]["result_size"]["lower_bound_mb"] * 1e6 +
-                                        config["query_config"]["result_size"][
-                                            "upper_bound_gb"] * 1e9) / 2,
-                        "write_volume": (config["query_config"]["write_volume"]["lower_bound_mb"] * 1e6 +
-                                         config["query_config"]["write_volume"][
-                                             "upper_bound_gb"] * 1e9) / 2,
-                        "cpu_time": wl["cpu_time"].median(),
-                    }
-
-                    print("Hybrid Running")
-                    hybrid_model = HybridModel(wl, self.cache_config, load_ref)
-                    hybrid_plan = hybrid_model.generate_workload_execution_plan()
-                    hybrid_plan.to_csv(f"{result_path}/hybrid_plan.csv")
-                    pending_cost = hybrid_model.get_pending_cost(self.hw_params)
-                    hybrid_cost = hybrid_model.get_cost(self.hw_params)
-                    hybrid_runtime = hybrid_model.get_runtime(hw_parameters=self.hw_params)
-                    hybrid_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=hybrid_plan)
-                    hybrid_speedup = (one_off_runtime - hybrid_runtime) / one_off_runtime
-                    hybrid_cost_reduction = (one_off_cost - hybrid_cost) / one_off_cost
-
-                    print("Lazy Running")
-                    lazy_model = LazyExecutionModel(wl, self.cache_config)
-                    lazy_plan = lazy_model.generate_workload_execution_plan()
-                    lazy_plan.to_csv(f"{result_path}/lazy_plan.csv")
-                    pending_cost = lazy_model.get_pending_cost(self.hw_params)
-                    lazy_cost = lazy_model.get_cost(self.hw_params)
-                    lazy_runtime = lazy_model.get_runtime(hw_parameters=self.hw_params)
-                    lazy_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=lazy_plan)
-                    lazy_speedup = (one_off_runtime - lazy_runtime) / one_off_runtime
-                    lazy_cost_reduction = (one_off_cost - lazy_cost) / one_off_cost
-
-                    print("Eager Running")
-                    eager_model = EagerExecutionModel(wl, self.cache_config)
-                    eager_plan = eager_model.generate_workload_execution_plan()
-                    eager_plan.to_csv(f"{result_path}/eager_plan.csv")
-                    eager_cost = eager_model.get_cost(self.hw_params)
-                    eager_runtime = eager_model.get_runtime(hw_parameters=self.hw_params)
-                    eager_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=eager_plan)
-
-                    eager_speedup = (one_off_runtime - eager_runtime) / one_off_runtime
-                    eager_cost_reduction = (one_off_cost - eager_cost) / one_off_cost
-
-                    is_read = wl["query_type"] == "select"
-                    is_write = wl["query_type"] != "select"
-
-                    ratio = round(wl[is_write]["write_volume"].median() / wl[is_read]["bytes_scanned"].median(), 9)
-
-                    item = {
+                    cells.append({
+                        "name": f"workload_{n1}_{n2}_{n3}",
                         "ratio_cat": n1,
-                        "ratio": ratio,
-                        "bytes_scanned": wl["bytes_scanned"].median(),
-                        "write_volume": wl["write_volume"].median(),
-                        "write_frequency": wf,
                         "repetitiveness": r,
-                        "speedup": (hybrid_speedup + lazy_speedup + eager_speedup) / 3,
-                        "cost_reduction": (hybrid_cost_reduction + lazy_cost_reduction + eager_cost_reduction) / 3,
-                    }
-                    print(item)
-                    result.append(item)
+                        "write_frequency": wf,
+                        "config": config,
+                        "cache_config": {**self.cache_config, "max_capacity": cache},
+                    })
+
+        return cells
+
+    @staticmethod
+    def get_load_ref(config, wl):
+        return {
+            "bytes_scanned": (config["query_config"]["bytes_scanned"]["lower_bound_mb"] * 1e6 +
+                              config["query_config"]["bytes_scanned"][
+                                  "upper_bound_gb"] * 1e9) / 2,
+            "result_size": (config["query_config"]["result_size"]["lower_bound_mb"] * 1e6 +
+                            config["query_config"]["result_size"][
+                                "upper_bound_gb"] * 1e9) / 2,
+            "write_volume": (config["query_config"]["write_volume"]["lower_bound_mb"] * 1e6 +
+                             config["query_config"]["write_volume"][
+                                 "upper_bound_gb"] * 1e9) / 2,
+            "cpu_time": wl["cpu_time"].median(),
+        }
+
+    def generate_workloads(self):
+        result = []
+
+        for cell in self.get_cells():
+            config = cell["config"]
+            self.cache_config = cell["cache_config"]
+            n1, r, wf = cell["ratio_cat"], cell["repetitiveness"], cell["write_frequency"]
+            print(f"Generating workload: {cell['name']}")
+
+            result_path = f"data/redset_scan_3/{cell['name']}"
+            path = Path(result_path)
+            path.mkdir(parents=True, exist_ok=True)
+
+            wl_generator = WorkloadGenerator(config, artifact_cache=self.artifact_cache)
+            wl = wl_generator.generate_workload()
+            insights = WorkloadInsights(wl).get_insights()
+
+            save_workload(wl, f"{result_path}/wl.parquet")
+            save_json_file(insights, f"{result_path}/insights.json")
+            save_json_file(config, f"{result_path}/config.json")
+            save_json_file(self.hw_params, f"{result_path}/hw_params.json")
+            save_json_file(self.cache_config, f"{result_path}/cache_config.json")
+
+            one_off = OneOffExecutionModel(wl, artifact_cache=self.artifact_cache)
+            one_off_plan = one_off.generate_workload_execution_plan()
+            save_plan(one_off_plan, f"{result_path}/one_off_plan.parquet")
+            one_off_runtime = one_off.get_runtime(hw_parameters=self.hw_params)
+            one_off_cost = one_off.get_cost(hw_parameters=self.hw_params)
+            one_off_plan["runtime"] = one_off.get_cost_report(self.hw_params).runtime_per_query
+
+            load_ref = self.get_load_ref(config, wl)
+
+            print("Hybrid Running")
+            hybrid_model = HybridModel(wl, self.cache_config, load_ref, artifact_cache=self.artifact_cache)
+            hybrid_plan = hybrid_model.generate_workload_execution_plan()
+            save_plan(hybrid_plan, f"{result_path}/hybrid_plan.parquet")
+            pending_cost = hybrid_model.get_pending_cost(self.hw_params)
+            hybrid_cost = hybrid_model.get_cost(self.hw_params)
+            hybrid_runtime = hybrid_model.get_runtime(hw_parameters=self.hw_params)
+            hybrid_plan["runtime"] = hybrid_model.get_cost_report(self.hw_params).runtime_per_query
+            hybrid_speedup = (one_off_runtime - hybrid_runtime) / one_off_runtime
+            hybrid_cost_reduction = (one_off_cost - hybrid_cost) / one_off_cost
+
+            print("Lazy Running")
+            lazy_model = LazyExecutionModel(wl, self.cache_config, artifact_cache=self.artifact_cache)
+            lazy_plan = lazy_model.generate_workload_execution_plan()
+            save_plan(lazy_plan, f"{result_path}/lazy_plan.parquet")
+            pending_cost = lazy_model.get_pending_cost(self.hw_params)
+            lazy_cost = lazy_model.get_cost(self.hw_params)
+            lazy_runtime = lazy_model.get_runtime(hw_parameters=self.hw_params)
+            lazy_plan["runtime"] = lazy_model.get_cost_report(self.hw_params).runtime_per_query
+            lazy_speedup = (one_off_runtime - lazy_runtime) / one_off_runtime
+            lazy_cost_reduction = (one_off_cost - lazy_cost) / one_off_cost
+
+            print("Eager Running")
+            eager_model = EagerExecutionModel(wl, self.cache_config, artifact_cache=self.artifact_cache)
+            eager_plan = eager_model.generate_workload_execution_plan()
+            save_plan(eager_plan, f"{result_path}/eager_plan.parquet")
+            eager_cost = eager_model.get_cost(self.hw_params)
+            eager_runtime = eager_model.get_runtime(hw_parameters=self.hw_params)
+            eager_plan["runtime"] = eager_model.get_cost_report(self.hw_params).runtime_per_query
+
+            eager_speedup = (one_off_runtime - eager_runtime) / one_off_runtime
+            eager_cost_reduction = (one_off_cost - eager_cost) / one_off_cost
+
+            is_read = wl["query_type"] == "select"
+            is_write = wl["query_type"] != "select"
+
+            ratio = round(wl[is_write]["write_volume"].median() / wl[is_read]["bytes_scanned"].median(), 9)
+
+            item = {
+                "ratio_cat": n1,
+                "ratio": ratio,
+                "bytes_scanned": wl["bytes_scanned"].median(),
+                "write_volume": wl["write_volume"].median(),
+                "write_frequency": wf,
+                "repetitiveness": r,
+                "speedup": (hybrid_speedup + lazy_speedup + eager_speedup) / 3,
+                "cost_reduction": (hybrid_cost_reduction + lazy_cost_reduction + eager_cost_reduction) / 3,
+            }
+            print(item)
+            result.append(item)
 
         result_df = pd.DataFrame(result)
         result_df.to_csv(f"results/redset_scan_3.csv", index=False)
@@ -8,8 +8,7 @@ from execution_model.models.eager import EagerExecutionModel
 from execution_model.models.hybrid import HybridModel
 from execution_model.models.lazy import LazyExecutionModel
 from execution_model.models.one_off import OneOffExecutionModel
-from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
-from utils.file import load_json, save_json_file
+from utils.file import load_json, save_json_file, save_workload, save_plan
 from workload_analyzer.workload_insights import WorkloadInsights
 from workload_generator.generator import WorkloadGenerator
 
@@ -105,17 +104,16 @@ class ParameterSpaceExperiment:
                     wl = wl_generator.generate_workload()
                     insights = WorkloadInsights(wl).get_insights()
 
-                    wl.to_csv(f"{result_path}/wl.csv", index=False)
+                    save_workload(wl, f"{result_path}/wl.parquet")
                     save_json_file(insights, f"{result_path}/insights.json")
                     save_json_file(config, f"{result_path}/config.json")
 
                     one_off = OneOffExecutionModel(wl)
                     one_off_plan = one_off.generate_workload_execution_plan()
-                    one_off_plan.to_csv(f"{result_path}/one_off_plan.csv")
+                    save_plan(one_off_plan, f"{result_path}/one_off_plan.parquet")
                     one_off_runtime = one_off.get_runtime(hw_parameters=self.hw_params)
                     one_off_cost = one_off.get_cost(hw_parameters=self.hw_params)
-                    one_off_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=one_off_plan)
+                    one_off_plan["runtime"] = one_off.get_cost_report(self.hw_params).runtime_per_query
 
                     load_ref = {
                         "bytes_scanned": (config["query_config"]["bytes_scanned"]["lower_bound_mb"] * 1e6 +
@@ -133,35 +131,32 @@ class ParameterSpaceExperiment:
                     print("Hybrid Running")
                     hybrid_model = HybridModel(wl, self.cache_config, load_ref)
                     hybrid_plan = hybrid_model.generate_workload_execution_plan()
-                    hybrid_plan.to_csv(f"{result_path}/hybrid_plan.csv")
+                    save_plan(hybrid_plan, f"{result_path}/hybrid_plan.parquet")
                     pending_cost = hybrid_model.get_pending_cost(self.hw_params)
                     hybrid_cost = hybrid_model.get_cost(self.hw_params)
                     hybrid_runtime = hybrid_model.get_runtime(hw_parameters=self.hw_params)
-                    hybrid_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=hybrid_plan)
+                    hybrid_plan["runtime"] = hybrid_model.get_cost_report(self.hw_params).runtime_per_query
                     hybrid_speedup = (one_off_runtime - hybrid_runtime) / one_off_runtime
                     hybrid_cost_reduction = (one_off_cost - hybrid_cost) / one_off_cost
 
                     print("Lazy Running")
                     lazy_model = LazyExecutionModel(wl, self.cache_config)
                     lazy_plan = lazy_model.generate_workload_execution_plan()
-                    lazy_plan.to_csv(f"{result_path}/lazy_plan.csv")
+                    save_plan(lazy_plan, f"{result_path}/lazy_plan.parquet")
                     pending_cost = lazy_model.get_pending_cost(self.hw_params)
                     lazy_cost = lazy_model.get_cost(self.hw_params)
                     lazy_runtime = lazy_model.get_runtime(hw_parameters=self.hw_params)
-                    lazy_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=lazy_plan)
+                    lazy_plan["runtime"] = lazy_model.get_cost_report(self.hw_params).runtime_per_query
                     lazy_speedup = (one_off_runtime - lazy_runtime) / one_off_runtime
                     lazy_cost_reduction = (one_off_cost - lazy_cost) / one_off_cost
 
                     print("Eager Running")
                     eager_model = EagerExecutionModel(wl, self.cache_config)
                     eager_plan = eager_model.generate_workload_execution_plan()
-                    eager_plan.to_csv(f"{result_path}/eager_plan.csv")
+                    save_plan(eager_plan, f"{result_path}/eager_plan.parquet")
                     eager_cost = eager_model.get_cost(self.hw_params)
                     eager_runtime = eager_model.get_runtime(hw_parameters=self.hw_params)
-                    eager_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                               wl=eager_plan)
+                    eager_plan["runtime"] = eager_model.get_cost_report(self.hw_params).runtime_per_query
 
                     eager_speedup = (one_off_runtime - eager_runtime) / one_off_runtime
                     eager_cost_reduction = (one_off_cost - eager_cost) / one_off_cost
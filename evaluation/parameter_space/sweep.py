@@ -0,0 +1,205 @@
+import copy
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from evaluation.parameter_space.experiment import ParameterSpaceExperiment
+from execution_model.models.eager import EagerExecutionModel
+from execution_model.models.hybrid import HybridModel
+from execution_model.models.lazy import LazyExecutionModel
+from execution_model.models.one_off import OneOffExecutionModel
+from utils.artifact_cache import ArtifactCache
+from utils.file import save_json_file, save_workload, save_plan
+from workload_analyzer.workload_insights import WorkloadInsights
+from workload_generator.generator import WorkloadGenerator
+
+MODELS = ["one_off", "hybrid", "lazy", "eager"]
+
+RESULT_COLUMNS = [
+    "name", "model", "seed", "ratio_cat", "ratio", "bytes_scanned", "write_volume", "write_frequency",
+    "repetitiveness", "runtime", "cost",
+]
+
+
+def get_task_seed(cell_seed, model):
+    return int(np.random.SeedSequence([cell_seed, MODELS.index(model)]).generate_state(1)[0])
+
+
+def run_model(cell, model, seed, hw_params, data_dir=None, artifact_dir=None, profile=False):
+    """
+    Runs one execution model on the workload of a cell, the workload is regenerated from the cell seed
+    so every model of the cell sees the same queries
+    :param profile: store the phase timers and counters of the model next to its plan ({model}_profile.json)
+    :return: result row (dict)
+    """
+    artifact_cache = None if artifact_dir is None else ArtifactCache(artifact_dir)
+    config = copy.deepcopy(cell["config"])
+    config["seed"] = seed
+    wl = WorkloadGenerator(config, artifact_cache=artifact_cache).generate_workload()
+
+    np.random.seed(get_task_seed(seed, model))
+    if model == "one_off":
+        execution_model = OneOffExecutionModel(wl, artifact_cache=artifact_cache, profile=profile)
+    elif model == "hybrid":
+        load_ref = ParameterSpaceExperiment.get_load_ref(config, wl)
+        execution_model = HybridModel(
+            wl.copy(), cell["cache_config"], load_ref, artifact_cache=artifact_cache, profile=profile
+        )
+    elif model == "lazy":
+        execution_model = LazyExecutionModel(
+            wl.copy(), cell["cache_config"], artifact_cache=artifact_cache, profile=profile
+        )
+    elif model == "eager":
+        execution_model = EagerExecutionModel(
+            wl.copy(), cell["cache_config"], artifact_cache=artifact_cache, profile=profile
+        )
+    else:
+        raise ValueError(f"Unknown model: {model}")
+
+    plan = execution_model.generate_workload_execution_plan()
+    runtime = execution_model.get_runtime(hw_parameters=hw_params)
+    cost = execution_model.get_cost(hw_params)
+
+    if data_dir is not None:
+        result_path = Path(data_dir) / cell["name"]
+        result_path.mkdir(parents=True, exist_ok=True)
+        save_plan(plan, result_path / f"{model}_plan.parquet")
+        if profile:
+            execution_model.save_profile(result_path / f"{model}_profile.json")
+        if model == "one_off":
+            save_workload(wl, result_path / "wl.parquet")
+            save_json_file(WorkloadInsights(wl).get_insights(), result_path / "insights.json")
+            save_json_file(config, result_path / "config.json")
+            save_json_file(hw_params, result_path / "hw_params.json")
+            save_json_file(cell["cache_config"], result_path / "cache_config.json")
+
+    is_read = wl["query_type"] == "select"
+    is_write = ~is_read
+
+    return {
+        "name": cell["name"],
+        "model": model,
+        "seed": seed,
+        "ratio_cat": cell["ratio_cat"],
+        "ratio": round(wl[is_write]["write_volume"].median() / wl[is_read]["bytes_scanned"].median(), 9),
+        "bytes_scanned": wl["bytes_scanned"].median(),
+        "write_volume": wl["write_volume"].median(),
+        "write_frequency": cell["write_frequency"],
+        "repetitiveness": cell["repetitiveness"],
+        "runtime": runtime,
+        "cost": cost,
+    }
+
+
+class ParameterSpaceSweep:
+    """
+    Runs every (cell, model) pair of the parameter space experiment as an independent task on a process pool.
+    Rows are appended to results_path as soon as a task completes, tasks already in results_path are skipped,
+    so an interrupted sweep resumes where it stopped.
+    """
+
+    def __init__(
+        self, experiment, results_path, data_dir=None, artifact_dir="artifacts", max_workers=None, profile=False
+    ):
+        """
+        :param experiment: ParameterSpaceExperiment providing the cells, hw and cache parameters
+        :param results_path: csv with one row per (cell, model)
+        :param data_dir: directory for workloads and plans, None to skip writing them
+        :param artifact_dir: ArtifactCache directory shared by the workers, None to disable
+        :param max_workers: process count, defaults to os.cpu_count()
+        :param profile: store a profile (phase timers and counters) next to every plan, needs data_dir
+        """
+        self.experiment = experiment
+        self.results_path = Path(results_path)
+        self.data_dir = data_dir
+        self.artifact_dir = artifact_dir
+        self.max_workers = max_workers or os.cpu_count()
+        self.profile = profile
+
+    def get_tasks(self):
+        base_seed = self.experiment.config["seed"]
+        tasks = []
+        for i, cell in enumerate(self.experiment.get_cells()):
+            for model in MODELS:
+                tasks.append((cell, model, base_seed + i))
+
+        return tasks
+
+    def get_completed(self):
+        if not self.results_path.exists():
+            return set()
+
+        done = pd.read_csv(self.results_path, usecols=["name", "model"])
+
+        return set(zip(done["name"], done["model"]))
+
+    def run(self):
+        completed = self.get_completed()
+        tasks = [task for task in self.get_tasks() if (task[0]["name"], task[1]) not in completed]
+        print(f"Running {len(tasks)} tasks ({len(completed)} already done) on {self.max_workers} processes")
+
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not self.results_path.exists()
+
+        with open(self.results_path, "a", newline="") as f, ProcessPoolExecutor(self.max_workers) as executor:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+            if write_header:
+                writer.writeheader()
+                f.flush()
+
+            futures = {
+                executor.submit(
+                    run_model,
+                    cell,
+                    model,
+                    seed,
+                    self.experiment.hw_params,
+                    self.data_dir,
+                    self.artifact_dir,
+                    self.profile,
+                ): (cell["name"], model)
+                for cell, model, seed in tasks
+            }
+            for future in as_completed(futures):
+                row = future.result()
+                writer.writerow(row)
+                f.flush()
+                print(f"Done: {futures[future]}")
+
+        return self.summarize()
+
+    def summarize(self):
+        """
+        Averages speedup and cost reduction of hybrid, lazy and eager over one-off per cell
+        (same columns as ParameterSpaceExperiment.generate_workloads)
+        """
+        df = pd.read_csv(self.results_path)
+        one_off = df[df["model"] == "one_off"].set_index("name")[["runtime", "cost"]]
+        models = df[df["model"] != "one_off"].join(one_off, on="name", rsuffix="_one_off")
+        models["speedup"] = (models["runtime_one_off"] - models["runtime"]) / models["runtime_one_off"]
+        models["cost_reduction"] = (models["cost_one_off"] - models["cost"]) / models["cost_one_off"]
+
+        return models.groupby("name").agg(
+            ratio_cat=("ratio_cat", "first"),
+            ratio=("ratio", "first"),
+            bytes_scanned=("bytes_scanned", "first"),
+            write_volume=("write_volume", "first"),
+            write_frequency=("write_frequency", "first"),
+            repetitiveness=("repetitiveness", "first"),
+            speedup=("speedup", "mean"),
+            cost_reduction=("cost_reduction", "mean"),
+        ).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    sweep = ParameterSpaceSweep(
+        ParameterSpaceExperiment(),
+        results_path="results/redset_scan_3_runs.csv",
+        data_dir="data/redset_scan_3",
+    )
+    result_df = sweep.run()
+    result_df.to_csv("results/redset_scan_3.csv", index=False)
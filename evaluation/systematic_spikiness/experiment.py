@@ -8,9 +8,9 @@ from execution_model.models.eager import EagerExecutionModel
 from execution_model.models.hybrid import HybridModel
 from execution_model.models.lazy import LazyExecutionModel
 from execution_model.models.one_off import OneOffExecutionModel
-from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
-from utils.file import load_json, save_json_file
-from utils.workload import estimate_query_load
+from utils.artifact_cache import ArtifactCache
+from utils.file import load_json, save_json_file, save_workload, save_plan
+from utils.workload import estimate_load_vectorized
 from workload_analyzer.workload_insights import WorkloadInsights
 from workload_generator.generator import WorkloadGenerator
 from pathlib import Path
@@ -20,6 +20,7 @@ import seaborn.objects as so
 
 class SystematicSpikiness:
     def __init__(self):
+        self.artifact_cache = ArtifactCache("artifacts")
         config_path = "config.json"
         self.config = load_json(config_path)
         self.cache_params = HW_PARAMETERS["cache"]["gp3"]
@@ -174,7 +175,7 @@ class SystematicSpikiness:
 
         result = []
 
-        wl_generator = WorkloadGenerator(self.config)
+        wl_generator = WorkloadGenerator(self.config, artifact_cache=self.artifact_cache)
         wl = wl_generator.generate_workload()
         insights = WorkloadInsights(wl).get_insights()
 
@@ -185,24 +186,23 @@ class SystematicSpikiness:
             "cpu_time": wl["cpu_time"].max(),
         }
 
-        wl.to_csv(f"{result_path}/wl.csv", index=False)
+        save_workload(wl, f"{result_path}/wl.parquet")
         save_json_file(insights, f"{result_path}/insights.json")
         save_json_file(self.config, f"{result_path}/config.json")
         save_json_file(self.hw_params, f"{result_path}/hw_params.json")
         save_json_file(self.cache_config, f"{result_path}/cache_config.json")
 
         # run one-off
-        one_off = OneOffExecutionModel(wl)
+        one_off = OneOffExecutionModel(wl, artifact_cache=self.artifact_cache)
         one_off_plan = one_off.generate_workload_execution_plan()
         one_off_runtime = one_off.get_runtime(hw_parameters=self.hw_params)
         one_off_cost = one_off.get_cost(hw_parameters=self.hw_params)
-        one_off_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                   wl=one_off_plan)
-        one_off_plan.loc[:, "load"] =  one_off_plan.apply(lambda q: estimate_query_load(q, load_ref), axis=1)
+        one_off_plan["runtime"] = one_off.get_cost_report(self.hw_params).runtime_per_query
+        one_off_plan.loc[:, "load"] = estimate_load_vectorized(one_off_plan, load_ref)
 
         one_off_insights = WorkloadInsights(one_off_plan).get_insights()
         one_off_latency = get_latency_props(one_off_plan, self.hw_params)
-        one_off_plan.to_csv(f"{result_path}/one_off_plan.csv")
+        save_plan(one_off_plan, f"{result_path}/one_off_plan.parquet")
 
         one_off_item ={
             "cost": {
@@ -223,13 +223,12 @@ class SystematicSpikiness:
         }
 
         print("Hybrid Running")
-        hybrid_model = HybridModel(wl, self.cache_config, load_ref)
+        hybrid_model = HybridModel(wl, self.cache_config, load_ref, artifact_cache=self.artifact_cache)
         hybrid_plan = hybrid_model.generate_workload_execution_plan()
         pending_cost = hybrid_model.get_pending_cost(self.hw_params)
         hybrid_cost = hybrid_model.get_cost(self.hw_params)
         hybrid_runtime = hybrid_model.get_runtime(hw_parameters=self.hw_params)
-        hybrid_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                   wl=hybrid_plan)
+        hybrid_plan["runtime"] = hybrid_model.get_cost_report(self.hw_params).runtime_per_query
         hybrid_speedup = (one_off_runtime - hybrid_runtime) / one_off_runtime
         hybrid_cost_reduction = (one_off_cost - hybrid_cost) / one_off_cost
         hybrid_insights = WorkloadInsights(hybrid_plan).get_insights()
@@ -252,17 +251,16 @@ class SystematicSpikiness:
             "latency": hybrid_latency,
             "workload_insights": hybrid_insights
         }
-        hybrid_plan.to_csv(f"{result_path}/hybrid_plan.csv")
+        save_plan(hybrid_plan, f"{result_path}/hybrid_plan.parquet")
 
         print("Lazy Running")
-        lazy_model = LazyExecutionModel(wl, self.cache_config)
+        lazy_model = LazyExecutionModel(wl, self.cache_config, artifact_cache=self.artifact_cache)
         lazy_plan = lazy_model.generate_workload_execution_plan()
         pending_cost = lazy_model.get_pending_cost(self.hw_params)
         lazy_cost = lazy_model.get_cost(self.hw_params)
         lazy_runtime = lazy_model.get_runtime(hw_parameters=self.hw_params)
-        lazy_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                   wl=lazy_plan)
-        lazy_plan.loc[:, "load"] =  lazy_plan.apply(lambda q: estimate_query_load(q, load_ref), axis=1)
+        lazy_plan["runtime"] = lazy_model.get_cost_report(self.hw_params).runtime_per_query
+        lazy_plan.loc[:, "load"] = estimate_load_vectorized(lazy_plan, load_ref)
         lazy_speedup = (one_off_runtime - lazy_runtime) / one_off_runtime
         lazy_cost_reduction = (one_off_cost - lazy_cost) / one_off_cost
         lazy_insights = WorkloadInsights(lazy_plan).get_insights()
@@ -285,16 +283,15 @@ class SystematicSpikiness:
             "latency": lazy_latency,
             "workload_insights": lazy_insights
         }
-        lazy_plan.to_csv(f"{result_path}/lazy_plan.csv")
+        save_plan(lazy_plan, f"{result_path}/lazy_plan.parquet")
 
         print("Eager Running")
-        eager_model = EagerExecutionModel(wl, self.cache_config)
+        eager_model = EagerExecutionModel(wl, self.cache_config, artifact_cache=self.artifact_cache)
         eager_plan = eager_model.generate_workload_execution_plan()
         eager_cost = eager_model.get_cost(self.hw_params)
         eager_runtime = eager_model.get_runtime(hw_parameters=self.hw_params)
-        eager_plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters=self.hw_params,
-                                                                                   wl=eager_plan)
-        eager_plan.loc[:, "load"] =  eager_plan.apply(lambda q: estimate_query_load(q, load_ref), axis=1)
+        eager_plan["runtime"] = eager_model.get_cost_report(self.hw_params).runtime_per_query
+        eager_plan.loc[:, "load"] = estimate_load_vectorized(eager_plan, load_ref)
 
 
         eager_speedup = (one_off_runtime - eager_runtime) / one_off_runtime
@@ -320,7 +317,7 @@ class SystematicSpikiness:
             "latency": eager_latency,
             "workload_insights": eager_insights
         }
-        eager_plan.to_csv(f"{result_path}/eager_plan.csv")
+        save_plan(eager_plan, f"{result_path}/eager_plan.parquet")
 
         result = {
             "one_off": one_off_item,
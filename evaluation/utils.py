@@ -70,34 +70,82 @@ def hourly_plot_all_models_for_cluster(one_off_plan, eager_plan, lazy_plan, hybr
     fig.savefig(f"{directory}/combined_plot.png", bbox_inches='tight')
 
 
-def get_latency_props(plan, hw_params):
-    def get_query_latency(q):
-        mask1 = plan["triggered_by"] == q["query_hash"]
-        mask2 = plan["query_hash"] != q["query_hash"]
-        triggered_q = plan[mask2 & mask1]
+def get_triggered_runtime(plan):
+    """
+    :return: pd.Series { query_hash: runtime of the queries it triggered (other than re-executions of itself) }
+    """
+    is_triggered = plan["triggered_by"].notna() & (plan["query_hash"] != plan["triggered_by"])
 
-        return q["runtime"] + triggered_q["runtime"].sum()
+    return plan[is_triggered].groupby("triggered_by")["runtime"].sum()
 
-    plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_params, plan)
 
-    mask1 = plan["execution_trigger"] == "immediate"
-    mask2 = plan["query_type"] == "select"
+def get_query_latency(plan, immediate_reads_only=True):
+    """
+    Latency of a read = its runtime + runtime of the work it triggered (e.g. pending writes)
+    :param plan: execution plan with runtime column
+    :param immediate_reads_only: NaN for everything but immediate selects, otherwise the runtime of the other queries
+    :return: pd.Series aligned with plan
+    """
+    is_immediate_read = (plan["execution_trigger"] == "immediate") & (plan["query_type"] == "select")
+    triggered_runtime = plan["query_hash"].map(get_triggered_runtime(plan)).fillna(0)
+    latency = plan["runtime"] + triggered_runtime.where(is_immediate_read, 0)
+
+    if immediate_reads_only:
+        return latency.where(is_immediate_read)
+
+    return latency
+
 
-    immediate_queries = plan[mask1 & mask2]
+def set_runtime(plan, hw_params):
+    """
+    Keeps the runtime column of plan if set (e.g. CostReport.runtime_per_query, so latency and cost come from the
+    same estimate), otherwise estimates it
+    """
+    if "runtime" not in plan.columns:
+        plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_params, plan)
 
-    immediate_queries.loc[:, "latency"] = immediate_queries.apply(lambda q: get_query_latency(q), axis=1)
 
-    latency = {
-        "mean": immediate_queries["latency"].mean(),
-        "max": immediate_queries["latency"].max(),
-        "min": immediate_queries["latency"].min(),
-        "q25": immediate_queries["latency"].quantile(0.25),
-        "q75": immediate_queries["latency"].quantile(0.25),
-        "q50": immediate_queries["latency"].quantile(0.5),
-        "std": immediate_queries["latency"].std()
+def get_latency_props(plan, hw_params):
+    set_runtime(plan, hw_params)
+    latency = get_query_latency(plan).dropna()
+
+    return {
+        "mean": latency.mean(),
+        "max": latency.max(),
+        "min": latency.min(),
+        "q25": latency.quantile(0.25),
+        "q75": latency.quantile(0.75),
+        "q50": latency.quantile(0.5),
+        "std": latency.std()
     }
 
-    return latency
+
+def get_latency_report(plan, hw_params):
+    """
+    Latency percentiles per execution_trigger (immediate reads include the work they triggered)
+    :return: pd.DataFrame indexed by execution_trigger (+ "all") with count, mean, p50, p95, p99, max
+    """
+    set_runtime(plan, hw_params)
+    latency = pd.DataFrame({
+        "execution_trigger": plan["execution_trigger"],
+        "latency": get_query_latency(plan, immediate_reads_only=False),
+    })
+
+    def summarize(values):
+        return pd.Series({
+            "count": len(values),
+            "mean": values.mean(),
+            "p50": values.quantile(0.5),
+            "p95": values.quantile(0.95),
+            "p99": values.quantile(0.99),
+            "max": values.max(),
+        })
+
+    report = latency.groupby("execution_trigger")["latency"].apply(summarize).unstack()
+    report.loc["all"] = summarize(latency["latency"])
+    report["count"] = report["count"].astype("int64")
+
+    return report
 
 def get_cost_props(model, hw_params):
     compute_cost = model.get_compute_cost(hw_params)
@@ -127,23 +175,6 @@ def get_cost_props(model, hw_params):
     return cost
 
 def estimate_latency(plan, hw_params):
-    def get_query_latency(q):
-        if q["query_type"] != "select" or q["execution_trigger"] != "immediate":
-            return None
-
-        mask1 = plan["triggered_by"] == q["query_hash"]
-        mask2 = plan["query_hash"] != q["query_hash"]
-        triggered_q = plan[mask2 & mask1]
-
-        return q["runtime"] + triggered_q["runtime"].sum()
-
     plan["runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_params, plan)
 
-    # mask1 = plan["execution_trigger"] == "immediate"
-    # mask2 = plan["query_type"] == "select"
-    #
-    # immediate_queries = plan[mask1 & mask2]
-
-    latency = plan.apply(lambda q: get_query_latency(q), axis=1)
-
-    return latency
+    return get_query_latency(plan)
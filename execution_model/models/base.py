@@ -1,38 +1,200 @@
+import json
 from abc import ABC, abstractmethod
 
-from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
-from pricing_calculator.pricing_calculator import PricingCalculator
+from cache.repetition_aware import RepetitionAwareCache
+from cache.repetition_aware_dict import DictRepetitionAwareCache
+from execution_model.utils.plan_builder import PlanBuilder
+from pricing_calculator.batch_pricing import BatchPricing
+from pricing_calculator.cost_report import CostReport
+from utils.artifact_cache import get_frame_hash
+from utils.file import save_json_file
+from utils.profiler import Profiler
+
+# plan columns added to the workload with their default values
+PLAN_DEFAULTS = {
+    "cache_result": False,
+    "cache_ir": False,
+    "write_delta": False,
+    "was_cached": False,
+    "cache_writes": 0,
+    "cache_reads": 0,
+}
 
 
 class BaseExecutionModel(ABC):
-    def __init__(self, wl):
+    def __init__(self, wl, artifact_cache=None, profile=False):
+        """
+        :param wl: pd.DataFrame workload
+        :param artifact_cache: utils.artifact_cache.ArtifactCache to reuse plans across runs, None to disable
+        :param profile: collect phase timers and counters (get_profile)
+        """
         self.wl = wl
-        # add new columns with default values
-        self.wl["cache_result"] = False
-        self.wl["cache_ir"] = False
-        self.wl["write_delta"] = False
-        self.wl["was_cached"] = False
-
-        self.wl["cache_writes"] = 0
-        self.wl["cache_reads"] = 0
+        # add new columns with default values (in place, the experiments share wl between models)
+        for col, value in PLAN_DEFAULTS.items():
+            self.wl[col] = value
 
         self.wl_execution_plan = None
+        self.profiler = Profiler(profile)
+        self.plan_builder = PlanBuilder(profiler=self.profiler)
         self.cache = None
+        self.artifact_cache = artifact_cache
+        self.artifact_key = None
+        # CostReport per hw_parameters, valid for cost_reports_plan only
+        self.cost_reports = dict()
+        self.cost_reports_plan = None
+
+    @staticmethod
+    def prepare_workload(wl):
+        """
+        :return: copy of wl with the plan columns set to their default values
+        """
+        return wl.assign(**PLAN_DEFAULTS)
 
     @abstractmethod
-    def generate_workload_execution_plan(self):
+    def execute_queries(self, wl):
+        """
+        Runs the queries of wl (prepared, in arrival order) against the model state and appends them to the plan
+        """
         pass
 
-    def get_runtime(self, hw_parameters):
+    def finish(self):
+        """
+        Runs what is still pending after the last query
+        """
+        pass
+
+    def process_chunk(self, wl):
+        """
+        Runs the next part of the workload, cache and pending queries are carried over from previous chunks
+        """
+        with self.profiler.phase("execute_queries"):
+            self.execute_queries(self.prepare_workload(wl))
+
+    def flush_plan(self, categorical=False):
+        """
+        :param categorical: string columns as pd.Categorical (PlanBuilder.build)
+        :return: plan rows produced since the last flush
+        """
+        plan = self.plan_builder.build(categorical)
+        self.plan_builder = PlanBuilder(profiler=self.profiler)
+
+        return plan
+
+    def generate_workload_execution_plan(self):
+        if self.wl_execution_plan is None and not self.load_execution_plan():
+            with self.profiler.phase("execute_queries"):
+                self.execute_queries(self.wl)
+            with self.profiler.phase("finish"):
+                self.finish()
+            with self.profiler.phase("plan.build"):
+                self.wl_execution_plan = self.plan_builder.build()
+            self.store_execution_plan()
+
+        return self.wl_execution_plan
+
+    @staticmethod
+    def create_cache(cache_config, structure, types, cache_backend="dataframe", profiler=None):
+        """
+        :param cache_backend: "dataframe" (RepetitionAwareCache) or "dict" (DictRepetitionAwareCache)
+        :param profiler: utils.profiler.Profiler shared with the model
+        """
+        cache_backends = {
+            "dataframe": RepetitionAwareCache,
+            "dict": DictRepetitionAwareCache,
+        }
+        if cache_backend not in cache_backends:
+            raise ValueError(f"Unknown cache backend: {cache_backend}")
+
+        cache = cache_backends[cache_backend](
+            max_capacity=cache_config["max_capacity"],
+            structure=structure,
+            types=types,
+            index_by="query_hash",
+            cache_type=cache_config["cache_type"]
+        )
+        if profiler is not None:
+            cache.profiler = profiler
+
+        return cache
+
+    def get_artifact_key(self):
+        """
+        Parts identifying the execution plan of this model, extended by models with more parameters
+        """
+        return {
+            "kind": "execution_plan",
+            "model": type(self).__name__,
+            "wl": get_frame_hash(self.wl),
+        }
+
+    def load_execution_plan(self):
+        """
+        Loads a previously generated plan (and the final cache state) from the artifact cache
+        :return: True if the plan was found
+        """
+        if self.artifact_cache is None:
+            return False
+
+        self.artifact_key = self.get_artifact_key()
+        artifact = self.artifact_cache.get(self.artifact_key)
+        if artifact is None:
+            return False
+
+        self.wl_execution_plan, metadata = artifact
+        if self.cache is not None:
+            self.cache.usage = metadata["cache_usage"]
+            self.cache.insights = metadata["cache_insights"]
+
+        return True
+
+    def store_execution_plan(self):
+        if self.artifact_cache is None:
+            return
+
+        metadata = dict()
+        if self.cache is not None:
+            metadata["cache_usage"] = float(self.cache.usage)
+            metadata["cache_insights"] = self.cache.insights
+
+        self.artifact_cache.put(self.artifact_key or self.get_artifact_key(), self.wl_execution_plan, metadata)
+
+    def get_cost_report(self, hw_parameters):
+        """
+        :return: CostReport of the plan, computed once per hw_parameters (and again once the plan was replaced)
+        """
         if self.wl_execution_plan is None:
             self.generate_workload_execution_plan()
 
-        return BasicRuntimeEstimator.get_wl_total_runtime(hw_parameters, self.wl_execution_plan)
-
-    def get_cost(self, hw_parameters):
+        if self.cost_reports_plan is not self.wl_execution_plan:
+            self.cost_reports = dict()
+            self.cost_reports_plan = self.wl_execution_plan
+
+        key = json.dumps(hw_parameters, sort_keys=True, default=str)
+        report = self.cost_reports.get(key)
+        if report is None:
+            with self.profiler.phase("cost"):
+                report = CostReport(hw_parameters, self.wl_execution_plan, self.get_cache_usage())
+            self.cost_reports[key] = report
+
+        return report
+
+    def get_costs(self, profiles):
+        """
+        Prices the plan on many hardware profiles at once
+        :param profiles: { name: hw_parameters }, e.g. evaluation.hw_params.get_hw_profiles()
+        :return: pd.DataFrame with the CostReport figures per profile (BatchPricing.get_costs)
+        """
         if self.wl_execution_plan is None:
             self.generate_workload_execution_plan()
 
+        with self.profiler.phase("cost"):
+            usage, max_capacity = (self.cache.usage, self.cache.max_capacity) if self.cache else (0, 0)
+            return BatchPricing(self.wl_execution_plan, usage, max_capacity).get_costs(profiles)
+
+    def get_runtime(self, hw_parameters):
+        return self.get_cost_report(hw_parameters).runtime
+
+    def get_cache_usage(self):
         cache_usage = 0
         if self.cache:
             if self.cache.cache_type == "s3":
@@ -40,26 +202,33 @@ class BaseExecutionModel(ABC):
             else:
                 cache_usage = self.cache.max_capacity # ebs (fixed capacity provisioned)
 
-        return PricingCalculator.get_total_cost(hw_parameters, self.wl_execution_plan, cache_usage)
+        return cache_usage
 
-    def get_compute_cost(self, hw_parameters):
-        if self.wl_execution_plan is None:
-            self.generate_workload_execution_plan()
+    def get_cost(self, hw_parameters):
+        return self.get_cost_report(hw_parameters).total_cost
 
-        return PricingCalculator.get_compute_cost(hw_parameters, self.wl_execution_plan)
+    def get_compute_cost(self, hw_parameters):
+        return self.get_cost_report(hw_parameters).compute_cost
 
     def get_storage_cost(self, hw_parameters):
-        if self.wl_execution_plan is None:
-            self.generate_workload_execution_plan()
-
-        cache_usage = 0
-        if self.cache:
-            if self.cache.cache_type == "s3":
-                cache_usage = self.cache.usage
-            else:
-                cache_usage = self.cache.max_capacity  # ebs (fixed capacity provisioned)
-
-        return PricingCalculator.get_storage_cost(hw_parameters, self.wl_execution_plan, cache_usage)
+        return self.get_cost_report(hw_parameters).storage_cost
 
     def get_pending_cost(self, hw_parameters):
-        return PricingCalculator.get_pending_cost(hw_parameters, self.wl_execution_plan)
\ No newline at end of file
+        return self.get_cost_report(hw_parameters).pending_cost
+
+    def get_profile(self):
+        """
+        :return: dict with the phase timers and counters of this run and the plan rows per execution trigger
+        """
+        profile = {"model": type(self).__name__, "enabled": self.profiler.enabled, **self.profiler.to_dict()}
+        if self.wl_execution_plan is not None:
+            profile["plan_rows"] = len(self.wl_execution_plan)
+            profile["plan_rows_by_trigger"] = {
+                str(trigger): int(count)
+                for trigger, count in self.wl_execution_plan["execution_trigger"].value_counts().items()
+            }
+
+        return profile
+
+    def save_profile(self, file_path):
+        save_json_file(self.get_profile(), file_path)
\ No newline at end of file
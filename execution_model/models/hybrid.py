@@ -1,73 +1,83 @@
+from collections import defaultdict
 from datetime import timedelta
 
-import numpy as np
-import pandas as pd
-
-from cache.repetition_aware import RepetitionAwareCache
 from execution_model.models.base import BaseExecutionModel
 from execution_model.utils.const import CACHE_COLS_LIST, CACHE_TYPES_DICT, WORKLOAD_PLAN_COL_LIST, ExecutionTrigger
 from execution_model.utils.dependency_graph import DependencyGraph
-from utils.workload import estimate_query_load
+from execution_model.utils.write_queue import WriteQueue
+from utils.interning import get_db_tables
+from utils.profiler import profiled
+from utils.workload import estimate_load_vectorized, estimate_query_load
+
+# weight of the reads seen in previous hours, per hour
+TABLE_READS_DECAY = 0.5
+# pending writes run per cache refresh round
+DEFERRED_WRITES_BATCH = 10
 
 
 class HybridModel(BaseExecutionModel):
-    def __init__(self, wl, cache_config, load_ref):
-        super().__init__(wl)
+    def __init__(self, wl, cache_config, load_ref, cache_backend="dataframe", artifact_cache=None, load_threshold=None,
+                 profile=False):
+        """
+        :param load_threshold: hourly load capacity, None to use the mean hourly load of wl (pass it when wl is
+            only the first chunk of a stream, see StreamingSimulation.get_load_threshold)
+        """
+        super().__init__(wl, artifact_cache, profile)
         self.cache_config = cache_config
-        self.cache = RepetitionAwareCache(
-            max_capacity=cache_config["max_capacity"],
-            structure=CACHE_COLS_LIST,
-            types=CACHE_TYPES_DICT,
-            index_by="query_hash",
-            cache_type=cache_config["cache_type"]
-        )
-        self.dependency_graph = DependencyGraph(
-            pd.DataFrame({}, columns=WORKLOAD_PLAN_COL_LIST +  ["id"])
-        )
+        self.cache_backend = cache_backend
+        self.cache = self.create_cache(cache_config, CACHE_COLS_LIST, CACHE_TYPES_DICT, cache_backend, self.profiler)
+        self.dependency_graph = DependencyGraph(WORKLOAD_PLAN_COL_LIST + ["id"], self.profiler)
+        self.write_queue = WriteQueue(self.dependency_graph)
         self.load_ref = load_ref
+        self.table_reads = defaultdict(float)
+        # repetition coefficients of all reads so far, scale of the cached read pressure
+        self.reads_count = 0
+        self.reads_repetition = 0
         # self.set_execution_hour()
         self.current_hour = 1
+        self.last_timestamp = None
         self.load_threshold = self.get_load_threshold()
-        self.hourly_load = { str(i): 0 for i in range(1, int(max(self.wl["hour"])) + 2) }
-        self.wl_execution_plan = pd.DataFrame(
-            columns=WORKLOAD_PLAN_COL_LIST
-        )
+        if load_threshold is not None:
+            self.load_threshold = load_threshold
+        self.hourly_load = dict()
+        if not self.wl.empty:
+            self.extend_hourly_load(max(self.wl["hour"]))
 
     def get_load_threshold(self):
-        self.wl["load"] = self.wl.apply(lambda query: estimate_query_load(query, self.load_ref), axis=1)
+        self.wl["load"] = estimate_load_vectorized(self.wl, self.load_ref)
         df_hr = self.wl.groupby(["hour"])["load"].sum().reset_index(name="load")
         load_threshold = df_hr["load"].mean()
 
         return 1 * load_threshold # 10% tolerance
 
+    def extend_hourly_load(self, last_hour):
+        for i in range(len(self.hourly_load) + 1, int(last_hour) + 2):
+            self.hourly_load[str(i)] = 0
+
     def run_dependencies(self, dependencies, timestamp, execution_trigger, triggered_by):
-        dependencies = dependencies.drop(columns="id")
-        queries_plan = dependencies.copy()
-        queries_plan.loc[:, "timestamp"] = timestamp
-        queries_plan.loc[:, "hour"] = self.current_hour
-        queries_plan.loc[:, "execution"] = "normal"
-        queries_plan.loc[:, "was_cached"] = False
-        queries_plan.loc[:, "cache_result"] = False
-        queries_plan.loc[:, "cache_ir"] = False
-        queries_plan.loc[:, "write_delta"] = False
-        queries_plan.loc[:, "execution_trigger"] = execution_trigger.value
-        queries_plan.loc[:, "triggered_by"] = triggered_by
+        write_delta = False
 
         # get affected queries
         # update deltas + mark as "dirty"
-        if not self.cache.cache.empty:
-            write_tables = set(dependencies["write_table"])
-            affected_queries_mask = self.cache.cache.apply(
-                lambda q: len(set(q["read_tables"].split(",")) & write_tables) > 0,
-                axis=1
-            )
-            self.cache.cache.loc[affected_queries_mask, "dirty"] = True
+        if not self.cache.is_empty():
+            write_tables = set(zip(dependencies["unique_db_instance"], dependencies["write_table"]))
             # FIXME: results in larger deltas but that is OK for now
-            self.cache.cache.loc[affected_queries_mask, "delta"] = dependencies["write_volume"].sum()
-            queries_plan.loc[:, "write_delta"] = True
-
-        self.wl_execution_plan = pd.concat([self.wl_execution_plan, queries_plan], ignore_index=True)
-        self.hourly_load[str(self.current_hour)] += queries_plan["load"].sum()
+            self.cache.mark_dirty(write_tables, dependencies["write_volume"].sum())
+            write_delta = True
+
+        self.plan_builder.extend(
+            dependencies,
+            timestamp=timestamp,
+            hour=self.current_hour,
+            execution="normal",
+            was_cached=False,
+            cache_result=False,
+            cache_ir=False,
+            write_delta=write_delta,
+            execution_trigger=execution_trigger.value,
+            triggered_by=triggered_by,
+        )
+        self.hourly_load[str(self.current_hour)] += dependencies["load"].sum()
 
     def execute_write(self, query,  trigger=ExecutionTrigger.IMMEDIATE, timestamp=None):
         if timestamp is None:
@@ -91,14 +101,9 @@ class HybridModel(BaseExecutionModel):
 
             self.dependency_graph.remove_with_dependencies(qid)
 
-            if not self.cache.cache.empty:
-                write_table = {query["write_table"]}
-                affected_queries_mask = self.cache.cache.apply(
-                    lambda q: len(set(q["read_tables"].split(",")) & write_table) > 0,
-                    axis=1
-                )
-                self.cache.cache.loc[affected_queries_mask, "dirty"] = True
-                self.cache.cache.loc[affected_queries_mask, "delta"] += query["write_volume"]
+            if not self.cache.is_empty():
+                write_table = {(query["unique_db_instance"], query["write_table"])}
+                self.cache.mark_dirty(write_table, query["write_volume"], accumulate=True)
                 query.loc["write_delta"] = True
 
             query["execution"] = "normal"
@@ -108,7 +113,7 @@ class HybridModel(BaseExecutionModel):
             query["hour"] = self.current_hour
 
             self.hourly_load[str(self.current_hour)] += query["load"]
-            self.wl_execution_plan.loc[len(self.wl_execution_plan)] = query
+            self.plan_builder.append(query)
         else:
             return False
 
@@ -167,7 +172,7 @@ class HybridModel(BaseExecutionModel):
 
         query.loc["load"] = estimate_query_load(query, self.load_ref)
         self.hourly_load[str(self.current_hour)] += query["load"]
-        self.wl_execution_plan.loc[len(self.wl_execution_plan)] = query
+        self.plan_builder.append(query)
 
     def execute_read(self, query):
         # normal execution
@@ -199,97 +204,161 @@ class HybridModel(BaseExecutionModel):
         query["execution_trigger"] = ExecutionTrigger.IMMEDIATE.value
         query["triggered_by"] = query["query_hash"]
         self.hourly_load[str(self.current_hour)] += query["load"]
-        self.wl_execution_plan.loc[len(self.wl_execution_plan)] = query
+        self.plan_builder.append(query)
 
+    @profiled("hybrid.refresh_cache")
     def refresh_cache(self, count, timestamp):
-        cache = self.cache.cache[self.cache.cache["dirty"]]
-        count = min(count, len(cache))
-        cache = cache.sort_values(by=["repetition_coefficient", "load"], ascending=False).iloc[:count]
-
-        for hash_index, query in cache.iterrows():
+        refreshed = 0
+        for hash_index, query in self.cache.get_refresh_candidates(count):
             if not hash_index in self.cache:
                 # checking if this query is still in cache (it could have been evicted)
                 continue
             query["cache_reads"] = 1
             self.execute_incrementally(query, hash_index, ExecutionTrigger.DEFERRED, timestamp)
+            refreshed += 1
             if self.load_threshold - self.hourly_load[str(self.current_hour)] <= 0:
                 break
 
-    def generate_workload_execution_plan(self):
-        if self.wl_execution_plan.empty:
-            last_timestamp = None
+        self.profiler.record("hybrid.refreshed_queries", refreshed)
+
+    def get_artifact_key(self):
+        return {
+            **super().get_artifact_key(),
+            "cache_config": self.cache_config,
+            "load_ref": self.load_ref,
+            "cache_backend": self.cache_backend,
+            "load_threshold": float(self.load_threshold),
+        }
+
+    def count_table_reads(self, query):
+        self.reads_count += 1
+        self.reads_repetition += query["repetition_coefficient"]
+        for db_table in get_db_tables(query["unique_db_instance"], query["read_tables"]):
+            self.table_reads[db_table] += 1
+
+    def decay_table_reads(self):
+        for db_table in list(self.table_reads):
+            self.table_reads[db_table] *= TABLE_READS_DECAY
+            if self.table_reads[db_table] < 0.01:
+                del self.table_reads[db_table]
+
+    def get_read_pressure(self, write_key):
+        """
+        Reads that would trigger the write: cached queries reading its table, weighted by their repetition
+        coefficient relative to the mean of all reads so far, + recent reads of the table
+        """
+        if write_key is None:
+            return 0
+
+        cached_pressure = 0
+        if self.reads_repetition > 0:
+            mean_repetition = self.reads_repetition / self.reads_count
+            cached_pressure = self.cache.get_affected_repetition([write_key]) / mean_repetition
+
+        return cached_pressure + self.table_reads.get(write_key, 0)
+
+    @profiled("hybrid.get_write_queue")
+    def get_write_queue(self):
+        """
+        :return: WriteQueue round over the pending writes, priority = read pressure per load
+        """
+        return self.write_queue.get_round(self.get_read_pressure)
+
+    @profiled("hybrid.run_deferred")
+    def run_deferred(self):
+        """
+        Uses the capacity left in the current hour to refresh the cache and run pending writes, writes with the
+        highest read pressure first, writes that do not fit anymore are skipped
+        """
+        queue = self.get_write_queue()
+        skipped = []
+        iterations = 0
+        deferred_writes = 0
+        while self.load_threshold - self.hourly_load[str(self.current_hour)] > 0:
+            iterations += 1
+            # refresh cache for repetitive & expensive queries
+            self.refresh_cache(20, self.last_timestamp)
+
+            # try to execute more pending queries
+            executed = 0
+            while queue and executed < DEFERRED_WRITES_BATCH:
+                qid = self.write_queue.pop(queue)
+                if qid not in self.dependency_graph.nodes:
+                    continue # executed as dependency of another write
+
+                query = self.dependency_graph.get_query(qid)
+                if self.execute_write(query, ExecutionTrigger.DEFERRED, self.last_timestamp):
+                    executed += 1
+                else:
+                    skipped.append(query)
 
-            for _, query in self.wl.iterrows():
-                is_read = query["query_type"] == "select"
-                is_write = not is_read
+            deferred_writes += executed
+            if executed == 0:
+                break
 
-                h = query["hour"]
+        # writes that did not fit stay pending
+        for query in skipped:
+            if query["id"] in self.dependency_graph.nodes:
+                self.write_queue.push(self.dependency_graph.get_write_key(query), query["load"], query["id"])
 
-                if h > self.current_hour:
-                    # run pending writes
-                    # refresh cache
+        # one record per hour boundary
+        self.profiler.record("hybrid.refresh_iterations", iterations)
+        self.profiler.record("hybrid.deferred_writes", deferred_writes)
 
-                    while self.load_threshold - self.hourly_load[str(self.current_hour)] > 0:
-                        # refresh cache for repetitive & expensive queries
-                        self.refresh_cache(20, last_timestamp)
+    def process_chunk(self, wl):
+        super().process_chunk(wl.assign(load=estimate_load_vectorized(wl, self.load_ref)))
 
-                        # try to execute more pending queries
-                        key_pool = list(self.dependency_graph.dependencies.keys())
-                        count = min(10, len(key_pool))
-                        # TODO: prioritize (not randomly)
-                        keys = np.random.choice(key_pool, count)
-                        queries = self.dependency_graph.df[self.dependency_graph.df["id"].isin(keys)]
+    def execute_queries(self, wl):
+        if not wl.empty:
+            self.extend_hourly_load(wl["hour"].max())
 
-                        run_query = True
-                        for _, q in queries.iterrows():
-                            run_query = self.execute_write(q, ExecutionTrigger.DEFERRED, last_timestamp)
-                            if not run_query:
-                                break
+        for _, query in wl.iterrows():
+            is_read = query["query_type"] == "select"
+            is_write = not is_read
 
-                        if queries.empty or not run_query:
-                            break
+            h = query["hour"]
 
-                    self.current_hour += 1
+            if h > self.current_hour:
+                # run pending writes
+                # refresh cache
+                self.run_deferred()
+                self.decay_table_reads()
+                self.current_hour += 1
 
-                last_timestamp = query["timestamp"]
+            self.last_timestamp = query["timestamp"]
 
-                if is_write:
-                    # always pend - execute when needed or at the end of the hour if there is capacity left
-                    qid = self.dependency_graph.add_query(query)
-                    # self.execute_write(query)
-                    continue
+            if is_write:
+                # always pend - execute when needed or at the end of the hour if there is capacity left
+                qid = self.dependency_graph.add_query(query)
+                self.write_queue.push(self.dependency_graph.get_write_key(query), query["load"], qid)
+                # self.execute_write(query)
+                continue
 
-                query["cache_reads"] = 1
-                if query["query_hash"] in self.cache:
-                    self.execute_incrementally(query, query["query_hash"])
-                else:
-                    self.execute_read(query)
-
-            # schedule some pending queries on the last hour of execution
-            while self.load_threshold - self.hourly_load[str(self.current_hour)] > 0:
-                # refresh cache for repetitive & expensive queries
-                self.refresh_cache(20, last_timestamp)
-
-                # try to execute more pending queries
-                key_pool = list(self.dependency_graph.dependencies.keys())
-                count = min(10, len(key_pool))
-                keys = np.random.choice(key_pool, count)
-                queries = self.dependency_graph.df[self.dependency_graph.df["id"].isin(keys)]
-
-                run_query = True
-                for _, q in queries.iterrows():
-                    run_query = self.execute_write(q, ExecutionTrigger.DEFERRED, last_timestamp)
-                    if not run_query:
-                        break
-
-                if queries.empty or not run_query:
-                    break
-
-            if not self.dependency_graph.df.empty:
-                pending_queries = self.dependency_graph.df
-                self.current_hour += 1
-                last_timestamp = last_timestamp + timedelta(hours=1)
-                self.run_dependencies(pending_queries, last_timestamp, ExecutionTrigger.PENDING, None)
+            self.count_table_reads(query)
+            query["cache_reads"] = 1
+            if query["query_hash"] in self.cache:
+                self.execute_incrementally(query, query["query_hash"])
+            else:
+                self.execute_read(query)
+
+    def finish(self):
+        # schedule some pending queries on the last hour of execution
+        self.run_deferred()
+
+        if not self.dependency_graph.is_empty():
+            pending_queries = self.dependency_graph.df
+            self.current_hour += 1
+            self.last_timestamp = self.last_timestamp + timedelta(hours=1)
+            self.run_dependencies(pending_queries, self.last_timestamp, ExecutionTrigger.PENDING, None)
+
+    def flush_plan(self, categorical=False):
+        plan = super().flush_plan(categorical)
+        plan.loc[:, "threshold"] = self.load_threshold
+
+        return plan
+
+    def generate_workload_execution_plan(self):
+        super().generate_workload_execution_plan()
 
         self.wl_execution_plan.loc[:, "threshold"] = self.load_threshold
         return self.wl_execution_plan
@@ -1,19 +1,20 @@
 from execution_model.models.base import BaseExecutionModel
 from execution_model.utils.const import ExecutionTrigger
+from execution_model.utils.plan_builder import PlanBuilder
 
 
 class OneOffExecutionModel(BaseExecutionModel):
-    def __init__(self, wl):
-        super().__init__(wl)
+    def __init__(self, wl, artifact_cache=None, profile=False):
+        super().__init__(wl, artifact_cache, profile)
+        self.plan_builder = PlanBuilder(capacity=len(self.wl), profiler=self.profiler)
 
-    def generate_workload_execution_plan(self):
-        if self.wl_execution_plan is None:
-            self.wl_execution_plan = self.wl
-            self.wl_execution_plan["execution"] = "normal"
-            self.wl_execution_plan["execution_trigger"] = ExecutionTrigger.IMMEDIATE.value
-            self.wl_execution_plan["triggered_by"] = self.wl_execution_plan["query_hash"]
-
-        return self.wl_execution_plan
+    def execute_queries(self, wl):
+        self.plan_builder.extend(
+            wl,
+            execution="normal",
+            execution_trigger=ExecutionTrigger.IMMEDIATE.value,
+            triggered_by=wl["query_hash"].to_numpy(),
+        )
 
     def get_cost(self, hw_parameters):
         return super().get_cost(
@@ -0,0 +1,157 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from execution_model.utils.const import ExecutionTrigger
+from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
+from pricing_calculator.pricing_calculator import PricingCalculator
+from utils.file import iter_workload_chunks, load_plan, save_plan
+from utils.workload import estimate_load_vectorized
+
+LOAD_COLUMNS = ["bytes_scanned", "result_size", "write_volume", "cpu_time", "hour"]
+
+
+class StreamingSimulation:
+    """
+    Runs an execution model over a workload Parquet file one hour at a time, for traces that do not fit in memory.
+    Cache and pending queries stay in the model between the chunks, the plan rows of each chunk are written to
+    plan_dir (part-00000.parquet, ...) as soon as the chunk is done. Memory is bounded by one hour of queries
+    plus the model state (cache, pending writes). Models constructed with profile=True also get their profile
+    written to plan_dir (profile.json).
+
+        stream = StreamingSimulation("wl.parquet", "plan")
+        model = LazyExecutionModel(stream.get_schema(), cache_config)
+        stream.run(model)
+        cost = stream.get_cost(hw_params)
+    """
+
+    def __init__(self, wl_path, plan_dir, batch_size=65536):
+        """
+        :param wl_path: workload Parquet file, ordered by timestamp
+        :param plan_dir: directory for the plan parts
+        :param batch_size: rows read from wl_path at once
+        """
+        self.wl_path = wl_path
+        self.plan_dir = Path(plan_dir)
+        self.batch_size = batch_size
+        self.plan_paths = []
+        self.model = None
+        # CostReport figures per hw_parameters, valid for the plan of the last run
+        self.cost_reports = dict()
+
+    def get_chunks(self, columns=None):
+        return iter_workload_chunks(self.wl_path, columns, self.batch_size)
+
+    def get_schema(self):
+        """
+        :return: empty workload with the columns and types of wl_path, to construct the models
+        """
+        return next(self.get_chunks()).head(0)
+
+    def get_load_threshold(self, load_ref):
+        """
+        Mean hourly load (HybridModel.get_load_threshold) computed chunk by chunk
+        """
+        hourly_load = []
+        for chunk in self.get_chunks(LOAD_COLUMNS):
+            hourly_load.append(estimate_load_vectorized(chunk, load_ref).sum())
+
+        return 1 * pd.Series(hourly_load).mean()
+
+    def write_plan(self, plan):
+        if plan.empty:
+            return
+
+        path = self.plan_dir / f"part-{len(self.plan_paths):05d}.parquet"
+        save_plan(plan, path)
+        self.plan_paths.append(path)
+
+    def run(self, model):
+        """
+        :param model: execution model constructed with get_schema() (HybridModel with load_threshold)
+        :return: paths of the plan parts
+        """
+        self.plan_dir.mkdir(parents=True, exist_ok=True)
+        for path in self.plan_dir.glob("part-*.parquet"):
+            path.unlink()
+        profile_path = self.plan_dir / "profile.json"
+        profile_path.unlink(missing_ok=True)
+
+        self.model = model
+        self.plan_paths = []
+        self.cost_reports = dict()
+        for chunk in self.get_chunks():
+            model.process_chunk(chunk)
+            self.write_plan(model.flush_plan(categorical=True))
+
+        with model.profiler.phase("finish"):
+            model.finish()
+        self.write_plan(model.flush_plan(categorical=True))
+        if model.profiler.enabled:
+            model.save_profile(profile_path)
+
+        return self.plan_paths
+
+    def iter_plan(self, columns=None):
+        for path in self.plan_paths:
+            yield load_plan(path, columns)
+
+    def get_plan(self):
+        """
+        :return: the whole plan (only for plans that fit in memory)
+        """
+        return pd.concat(list(self.iter_plan()), ignore_index=True)
+
+    def get_cost_report(self, hw_parameters):
+        """
+        CostReport figures of the whole plan. The per-query runtime is estimated once per plan part and every
+        runtime and cost figure is derived from it, so they agree with each other.
+        :return: dict (CostReport.to_dict)
+        """
+        key = json.dumps(hw_parameters, sort_keys=True, default=str)
+        report = self.cost_reports.get(key)
+        if report is not None:
+            return report
+
+        runtime = 0
+        pending_runtime = 0
+        cache_writes = 0
+        cache_reads = 0
+        start, end = None, None
+        for plan in self.iter_plan():
+            runtime_per_query = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters, plan)
+            runtime += runtime_per_query.sum()
+            pending_runtime += runtime_per_query[plan["execution_trigger"] == ExecutionTrigger.PENDING.value].sum()
+            cache_writes += plan["cache_writes"].sum()
+            cache_reads += plan["cache_reads"].sum()
+            timestamps = pd.to_datetime(plan["timestamp"])
+            start = timestamps.min() if start is None else min(start, timestamps.min())
+            end = timestamps.max() if end is None else max(end, timestamps.max())
+
+        price_per_second = hw_parameters["instance"]["price_per_hour"] / 3600
+        duration_seconds = (end - start).total_seconds() if start is not None else 0
+        capacity_cost = PricingCalculator.get_cache_capacity_cost(
+            hw_parameters, self.model.get_cache_usage(), duration_seconds
+        )
+        request_cost = PricingCalculator.get_request_cost(hw_parameters, cache_writes, cache_reads)
+        compute_cost = runtime * price_per_second
+
+        report = {
+            "runtime": float(runtime),
+            "compute_cost": float(compute_cost),
+            "capacity_cost": float(capacity_cost),
+            "request_cost": float(request_cost),
+            "storage_cost": float(capacity_cost + request_cost),
+            "pending_cost": float(pending_runtime * price_per_second),
+            "total_cost": float(compute_cost + capacity_cost + request_cost),
+        }
+        self.cost_reports[key] = report
+
+        return report
+
+    def get_runtime(self, hw_parameters):
+        return self.get_cost_report(hw_parameters)["runtime"]
+
+    def get_cost(self, hw_parameters):
+        return self.get_cost_report(hw_parameters)["total_cost"]
@@ -65,6 +65,17 @@ WORKLOAD_PLAN_TYPES = WORKLOAD_TYPES_DICT | {
     'triggered_by': 'object',
 }
 
+# string columns the PlanBuilder stores as int32 ids (utils.interning.Interner), strings again at build/export
+INTERNED_COLUMNS = [
+    'query_hash',
+    'query_type',
+    'read_tables',
+    'write_table',
+    'execution',
+    'execution_trigger',
+    'triggered_by',
+]
+
 CACHE_COLS_LIST = WORKLOAD_COLS_LIST + ["size", "dirty", "delta"]
 
 CACHE_TYPES_DICT = WORKLOAD_TYPES_DICT | {
@@ -78,4 +89,11 @@ class ExecutionTrigger(Enum):
     DEFERRED = "deferred"
     TRIGGERED_BY_READ = "triggered_by_read"
     TRIGGERED_BY_WRITE = "triggered_by_write"
-    PENDING = "pending"
\ No newline at end of file
+    PENDING = "pending"
+
+# known values of the enum columns, interned first so their ids (categorical codes) are the same in every plan
+CATEGORIES = {
+    'query_type': ["select", "insert", "update", "delete"],
+    'execution': ["normal", "incremental"],
+    'execution_trigger': [trigger.value for trigger in ExecutionTrigger],
+}
@@ -1,89 +1,137 @@
 import pandas as pd
-from typing import Set, Dict
+from typing import Set, Dict, List, Tuple, Iterable
 from collections import defaultdict
 
+from utils.interning import get_db_tables
+from utils.profiler import Profiler, profiled
+
 class DependencyGraph:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df  # DataFrame containing all queries
+    """
+    nodes = { id: { column: value, ... } } # pending queries
+    dependencies = { id: { ids of pending writes the query depends on } }
+    dependents = { id: { ids of pending queries depending on this write } }
+    write_index = { (unique_db_instance, write_table): { ids of pending writes } }
+    """
+
+    def __init__(self, columns: List[str], profiler: Profiler = None):
+        self.profiler = profiler or Profiler()
+        self.columns = list(columns)
+        if "id" not in self.columns:
+            self.columns.append("id")
+
+        self.nodes: Dict[int, dict] = dict()
         self.dependencies: Dict[int, Set[int]] = defaultdict(set)
+        self.dependents: Dict[int, Set[int]] = defaultdict(set)
+        self.write_index: Dict[Tuple, Set[int]] = defaultdict(set)
         self._id_counter = 0
 
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.get_queries(self.nodes.keys())
+
+    def is_empty(self) -> bool:
+        return not self.nodes
+
+    @staticmethod
+    def get_write_key(row):
+        write_table = row["write_table"]
+        if not isinstance(write_table, str) or not write_table:
+            return None
+
+        return row["unique_db_instance"], write_table
+
+    @profiled("dependency_graph.add_query")
     def add_query(self, new_row: pd.Series):
         new_id = self._id_counter
         self._id_counter += 1
 
-        new_row["id"] = new_id
-        self.df.loc[len(self.df)] = new_row
+        record = new_row.reindex(self.columns).to_dict()
+        record["id"] = new_id
+        self.nodes[new_id] = record
 
-        def find_dependencies(tables):
-            if not tables:
-                return False
+        dep_ids = set()
+        for db_table in get_db_tables(record["unique_db_instance"], record["read_tables"]):
+            dep_ids.update(self.write_index.get(db_table, ()))
 
-            read_tables = new_row["read_tables"].split(",")
-            read_tables = set(read_tables)
+        self.dependencies[new_id] = dep_ids
+        for dep in dep_ids:
+            self.dependents[dep].add(new_id)
 
-            write_tables = {tables}
+        write_key = self.get_write_key(record)
+        if write_key is not None:
+            self.write_index[write_key].add(new_id)
 
-            affected_tables = set(read_tables & write_tables)
+        self.profiler.record("dependency_graph.size", len(self.nodes))
 
-            return len(affected_tables) > 0
+        return new_id
 
-        mask1 = self.df["write_table"].notna()
-        mask2 = new_row["unique_db_instance"] == self.df["unique_db_instance"]
-        mask3 = self.df["write_table"].apply(lambda tables: find_dependencies(tables))
-        mask4 = self.df["id"] != new_row["id"]
+    def get_query(self, query_id: int) -> pd.Series:
+        return pd.Series(self.nodes[query_id], index=self.columns)
 
-        dep_rows = self.df.loc[mask1 & mask2 & mask3 & mask4, "id"]
-        self.dependencies[new_id] = set(dep_rows)
+    def get_queries(self, query_ids: Iterable[int]) -> pd.DataFrame:
+        ids = sorted(qid for qid in set(query_ids) if qid in self.nodes)
+        records = [self.nodes[qid] for qid in ids]
 
-        return new_id
+        return pd.DataFrame(records, columns=self.columns)
 
     def get_all_dependency_ids(self, query_id: int) -> Set[int]:
         visited = set()
-        def dfs(qid):
-            for dep in self.dependencies.get(qid, []):
+        stack = [query_id]
+        while stack:
+            for dep in self.dependencies.get(stack.pop(), ()):
                 if dep not in visited:
                     visited.add(dep)
-                    dfs(dep)
-        dfs(query_id)
+                    stack.append(dep)
 
         return visited
 
+    @profiled("dependency_graph.get_all_dependencies")
     def get_all_dependencies(self, query_id):
         deps = self.get_all_dependency_ids(query_id)
-        mask = self.df["id"].isin(deps)
+        self.profiler.record("dependency_graph.dependencies", len(deps))
 
-        return self.df[mask]
+        return self.get_queries(deps)
+
+    def _remove_node(self, query_id):
+        record = self.nodes.pop(query_id)
+
+        for dep in self.dependencies.pop(query_id, ()):
+            dependents = self.dependents.get(dep)
+            if dependents is not None:
+                dependents.discard(query_id)
+
+        for dependent in self.dependents.pop(query_id, ()):
+            deps = self.dependencies.get(dependent)
+            if deps is not None:
+                deps.discard(query_id)
+
+        write_key = self.get_write_key(record)
+        if write_key is not None:
+            write_ids = self.write_index[write_key]
+            write_ids.discard(query_id)
+            if not write_ids:
+                del self.write_index[write_key]
 
     def remove(self, query_id):
-        if query_id not in self.df["id"].values:
+        if query_id not in self.nodes:
             return False
 
-        vals = self.dependencies.values()
-        flat_deps = set().union(*vals)
-
-        if query_id in flat_deps:
+        if self.dependents.get(query_id):
             return False
 
-        all_to_remove = query_id
-        self.df = self.df[~self.df["id"].isin(all_to_remove)].reset_index(drop=True)
-        self.dependencies.pop(query_id)
+        self._remove_node(query_id)
 
         return True
 
+    @profiled("dependency_graph.remove_with_dependencies")
     def remove_with_dependencies(self, query_id: int) -> bool:
-        if query_id not in self.df["id"].values:
+        if query_id not in self.nodes:
             return False
 
         all_deps = self.get_all_dependency_ids(query_id)
         all_to_remove = all_deps | {query_id}
-        self.df = self.df[~self.df["id"].isin(all_to_remove)].reset_index(drop=True)
 
         for qid in all_to_remove:
-            self.dependencies.pop(qid, None)
-
-        for deps in self.dependencies.values():
-            deps.difference_update(all_to_remove)
+            self._remove_node(qid)
 
         return True
-
@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+from execution_model.utils.const import CATEGORIES, INTERNED_COLUMNS, WORKLOAD_PLAN_COL_LIST, WORKLOAD_PLAN_TYPES
+from utils.interning import Interner
+from utils.profiler import Profiler, profiled
+
+
+class PlanBuilder:
+    """
+    Accumulates execution plan rows into preallocated, typed column buffers and materializes the plan once.
+    Buffers grow by doubling, so appending a row or a batch is amortized O(columns).
+
+    Missing values are stored as False (bool), NaT, NaN or None. int64 columns are promoted to float64
+    when they receive missing or fractional values (e.g. incremental result sizes) instead of truncating them.
+    The string columns in INTERNED_COLUMNS are buffered as int32 ids (-1 for missing values) and turned back
+    into strings (or categoricals) by build.
+    """
+
+    def __init__(self, columns=None, types=None, capacity=1024, profiler=None):
+        self.profiler = profiler or Profiler()
+        self.columns = list(WORKLOAD_PLAN_COL_LIST if columns is None else columns)
+        types = WORKLOAD_PLAN_TYPES if types is None else types
+        self.size = 0
+        self.capacity = max(int(capacity), 1)
+        self.interners = {
+            col: Interner(CATEGORIES.get(col, ()))
+            for col in self.columns
+            if col in INTERNED_COLUMNS and types.get(col, "object") == "object"
+        }
+        self.buffers = {
+            col: np.empty(self.capacity, dtype=np.int32 if col in self.interners else np.dtype(types.get(col, "object")))
+            for col in self.columns
+        }
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, count):
+        required = self.size + count
+        if required <= self.capacity:
+            return
+
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+
+        for col, buffer in self.buffers.items():
+            resized = np.empty(capacity, dtype=buffer.dtype)
+            resized[:self.size] = buffer[:self.size]
+            self.buffers[col] = resized
+
+        self.capacity = capacity
+
+    def _promote(self, col):
+        self.buffers[col] = self.buffers[col].astype("float64")
+
+    def _coerce_value(self, col, value):
+        kind = self.buffers[col].dtype.kind
+
+        if kind == "O":
+            return value
+
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            if kind == "b":
+                return False
+            if kind == "M":
+                return np.datetime64("NaT")
+            if kind == "i":
+                self._promote(col)
+
+            return np.nan
+
+        if kind == "i" and isinstance(value, (float, np.floating)) and not float(value).is_integer():
+            self._promote(col)
+
+        return value
+
+    def _set_values(self, col, start, end, values):
+        interner = self.interners.get(col)
+        if interner is not None:
+            if np.ndim(values) == 0:
+                self.buffers[col][start:end] = interner.get_id(values)
+            else:
+                self.buffers[col][start:end] = interner.get_ids(values)
+            return
+
+        if np.ndim(values) == 0:
+            value = self._coerce_value(col, values)
+            self.buffers[col][start:end] = value
+            return
+
+        buffer = self.buffers[col]
+        kind = buffer.dtype.kind
+        values = np.asarray(values)
+        values_kind = values.dtype.kind
+
+        if kind == "O" or values_kind == kind or (kind in "if" and values_kind in "iub"):
+            buffer[start:end] = values
+            return
+
+        values = pd.Series(values, copy=False)
+        if kind == "b":
+            values = values.where(values.notna(), False).astype(bool)
+        elif kind == "M":
+            values = pd.to_datetime(values)
+        elif kind == "i":
+            values = pd.to_numeric(values)
+            if values.dtype.kind == "f" and not (values.notna().all() and (values % 1 == 0).all()):
+                self._promote(col)
+                buffer = self.buffers[col]
+
+        buffer[start:end] = values.to_numpy()
+
+    @profiled("plan.append")
+    def append(self, row, **overrides):
+        """
+        :param row: pd.Series or dict with (a superset of) the plan columns
+        :param overrides: column values replacing the ones in row
+        """
+        self.profiler.record("plan.rows_appended")
+        self._reserve(1)
+        i = self.size
+        for col in self.columns:
+            if col in overrides:
+                value = overrides[col]
+            else:
+                value = row.get(col, None)
+
+            interner = self.interners.get(col)
+            if interner is not None:
+                value = interner.get_id(value)
+            else:
+                value = self._coerce_value(col, value)
+            self.buffers[col][i] = value
+
+        self.size += 1
+
+    @profiled("plan.extend")
+    def extend(self, rows, **overrides):
+        """
+        :param rows: pd.DataFrame with (a superset of) the plan columns
+        :param overrides: scalars or arrays (one value per row) replacing the columns in rows
+        """
+        count = len(rows)
+        if count == 0:
+            return
+
+        self.profiler.record("plan.rows_appended", count)
+        self._reserve(count)
+        start, end = self.size, self.size + count
+        for col in self.columns:
+            if col in overrides:
+                values = overrides[col]
+            elif col in rows.columns:
+                values = rows[col].to_numpy()
+            else:
+                values = None
+
+            self._set_values(col, start, end, values)
+
+        self.size = end
+
+    def column(self, col, categorical=False):
+        values = self.buffers[col][:self.size]
+        interner = self.interners.get(col)
+        if interner is None:
+            return values
+        if categorical:
+            return interner.get_categorical(values)
+
+        return interner.get_values(values)
+
+    def build(self, categorical=False):
+        """
+        :param categorical: return the interned columns as pd.Categorical instead of strings
+        """
+        return pd.DataFrame(
+            {col: self.column(col, categorical).copy() for col in self.columns},
+            columns=self.columns,
+        )
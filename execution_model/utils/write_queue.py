@@ -0,0 +1,79 @@
+import heapq
+from collections import defaultdict
+
+# loads below are clamped, so writes without load do not get an infinite priority
+MIN_LOAD = 0.01
+
+
+class WriteQueue:
+    """
+    Pending writes of a DependencyGraph, ordered by read pressure per load. The read pressure only depends on the
+    write key (DependencyGraph.get_write_key), so the writes are kept in one min-heap of (load, id) per key and
+    come out of it in priority order. A round only ranks the keys, O(keys) to start it and O(log n) per write.
+    Writes that were executed as dependencies stay in the heaps until they surface, a heap is compacted when it
+    doubled since it was last cleaned.
+
+    heaps = { write_key: [ (load, id), ... ] }
+    round = [ (-pressure / load, load, id, write_key, pressure), ... ] # head write of every key
+    """
+
+    def __init__(self, dependency_graph):
+        self.dependency_graph = dependency_graph
+        self.heaps = defaultdict(list)
+        self.limits = dict()
+
+    def is_pending(self, query_id):
+        return query_id in self.dependency_graph.nodes
+
+    def push(self, write_key, load, query_id):
+        heap = self.heaps[write_key]
+        heapq.heappush(heap, (max(load, MIN_LOAD), query_id))
+        if len(heap) > self.limits.get(write_key, 64):
+            heap[:] = [item for item in heap if self.is_pending(item[1])]
+            heapq.heapify(heap)
+            self.limits[write_key] = 2 * len(heap) + 64
+
+    def get_head(self, write_key):
+        """
+        :return: (load, id) of the next pending write of write_key, None if there is none
+        """
+        heap = self.heaps[write_key]
+        while heap and not self.is_pending(heap[0][1]):
+            heapq.heappop(heap)
+
+        return heap[0] if heap else None
+
+    def get_round(self, get_pressure):
+        """
+        :param get_pressure: write_key -> read pressure, evaluated once per key for the whole round
+        :return: round heap for pop
+        """
+        queue = []
+        for write_key in list(self.heaps):
+            head = self.get_head(write_key)
+            if head is None:
+                del self.heaps[write_key]
+                self.limits.pop(write_key, None)
+                continue
+
+            pressure = get_pressure(write_key)
+            queue.append((-pressure / head[0], head[0], head[1], write_key, pressure))
+
+        heapq.heapify(queue)
+
+        return queue
+
+    def pop(self, queue):
+        """
+        Takes the write with the highest priority of the round out of the queue (push it again to keep it pending
+        for the next round), the next write of its key takes its place in the round
+        :return: id, it may have been executed as a dependency since the round started
+        """
+        _, _, query_id, write_key, pressure = heapq.heappop(queue)
+        heapq.heappop(self.heaps[write_key])
+
+        head = self.get_head(write_key)
+        if head is not None:
+            heapq.heappush(queue, (-pressure / head[0], head[0], head[1], write_key, pressure))
+
+        return query_id
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from execution_model.utils.const import ExecutionTrigger
+from pricing_calculator.const import GiB_TO_BYTES, S3_NETWORK_SPEED_SCALE
+from pricing_calculator.pricing_calculator import PricingCalculator
+
+COMPONENTS = ["cpu_time", "network_bytes", "cache_bytes", "cache_requests", "cache_request_latency_draws"]
+
+
+class BatchPricing:
+    """
+    Runtime and cost of one execution plan on many hardware profiles ({ name: hw_parameters }, e.g. from
+    evaluation.hw_params.get_hw_profiles). BasicRuntimeEstimator.estimate_runtime_per_query is linear in a few
+    per-query components, so the plan is reduced to them once and every profile only contributes a weight vector:
+
+        runtime (queries x profiles) = components (queries x COMPONENTS) @ weights (COMPONENTS x profiles)
+
+    The cache request latencies are drawn once and shared by all profiles. With one profile and the same
+    random state the results match CostReport.
+    """
+
+    def __init__(self, plan, usage, max_capacity):
+        """
+        :param plan: pd.DataFrame execution plan
+        :param usage: cached bytes at the end of the plan (cache.usage)
+        :param max_capacity: provisioned cache capacity in bytes (cache.max_capacity)
+        """
+        self.usage = usage
+        self.max_capacity = max_capacity
+        execution = plan["execution"].to_numpy()
+        is_incremental = execution == "incremental"
+
+        scanned = plan["bytes_scanned"].to_numpy(dtype="float64") + plan["write_volume"].to_numpy(dtype="float64")
+        result_size = plan["result_size"].to_numpy(dtype="float64")
+        cache_bytes = plan["cache_result"].to_numpy(dtype="float64") * result_size
+        cache_bytes += plan["cache_ir"].to_numpy(dtype="float64") * plan["intermediate_result_size"].to_numpy(dtype="float64")
+        cache_bytes += plan["write_delta"].to_numpy(dtype="float64") * plan["write_volume"].to_numpy(dtype="float64")
+        cache_bytes += plan["was_cached"].to_numpy(dtype="float64") * result_size
+        cache_requests = plan["cache_reads"].to_numpy(dtype="float64") + plan["cache_writes"].to_numpy(dtype="float64")
+
+        # incremental executions read from the cache, normal ones from S3
+        self.components = np.column_stack([
+            plan["cpu_time"].to_numpy(dtype="float64"),
+            np.where(is_incremental, 0, scanned),
+            np.where(is_incremental, scanned, 0) + cache_bytes,
+            cache_requests,
+            cache_requests * np.random.random_sample(len(plan)),
+        ])
+        # like the estimator, rows with an unknown execution or missing values have no runtime
+        self.valid = (is_incremental | (execution == "normal")) & np.isfinite(self.components).all(axis=1)
+        self.components[~self.valid] = 0
+
+        is_pending = plan["execution_trigger"].to_numpy() == ExecutionTrigger.PENDING.value
+        self.totals = self.components.sum(axis=0)
+        self.pending_totals = self.components[is_pending].sum(axis=0)
+
+        timestamps = pd.to_datetime(plan["timestamp"])
+        self.duration_seconds = (timestamps.max() - timestamps.min()).total_seconds()
+        self.cache_writes = plan["cache_writes"].sum()
+        self.cache_reads = plan["cache_reads"].sum()
+
+    def get_cache_usage(self, hw_parameters):
+        """
+        Cached bytes billed on a profile, like BaseExecutionModel.get_cache_usage
+        """
+        if hw_parameters["cache"]["type"] == "s3":
+            return self.usage
+
+        return self.max_capacity # ebs (fixed capacity provisioned)
+
+    @staticmethod
+    def get_weights(profiles):
+        """
+        :return: np.array (COMPONENTS x profiles), seconds per unit of each component
+        """
+        weights = np.empty((len(COMPONENTS), len(profiles)))
+        for i, hw_parameters in enumerate(profiles.values()):
+            instance, cache = hw_parameters["instance"], hw_parameters["cache"]
+            network_speed = instance["network_speed"] * GiB_TO_BYTES * S3_NETWORK_SPEED_SCALE * 0.8
+            if cache["type"] == "s3":
+                cache_speed = network_speed
+            else:
+                cache_speed = cache["throughput_mb_per_s"] * 10e6
+
+            weights[:, i] = [
+                1 / instance["vCPUs"],
+                1 / network_speed,
+                1 / cache_speed,
+                cache["request_latency_min"] / 1000,
+                (cache["request_latency_max"] - cache["request_latency_min"]) / 1000,
+            ]
+
+        return weights
+
+    def get_runtime_per_query(self, profiles):
+        """
+        :return: pd.DataFrame with the runtime of every query (rows) on every profile (columns)
+        """
+        runtime = self.components @ self.get_weights(profiles)
+        runtime[~self.valid] = np.nan
+
+        return pd.DataFrame(runtime, columns=list(profiles))
+
+    def get_costs(self, profiles):
+        """
+        :return: pd.DataFrame indexed by profile with the CostReport figures (runtime, compute_cost, capacity_cost,
+            request_cost, storage_cost, pending_cost, total_cost)
+        """
+        weights = self.get_weights(profiles)
+        price_per_second = np.array([hw["instance"]["price_per_hour"] for hw in profiles.values()]) / 3600
+
+        costs = pd.DataFrame(index=pd.Index(list(profiles), name="profile"))
+        costs["runtime"] = self.totals @ weights
+        costs["compute_cost"] = costs["runtime"] * price_per_second
+        costs["capacity_cost"] = [
+            PricingCalculator.get_cache_capacity_cost(hw, self.get_cache_usage(hw), self.duration_seconds)
+            for hw in profiles.values()
+        ]
+        costs["request_cost"] = [
+            PricingCalculator.get_request_cost(hw, self.cache_writes, self.cache_reads)
+            for hw in profiles.values()
+        ]
+        costs["storage_cost"] = costs["capacity_cost"] + costs["request_cost"]
+        costs["pending_cost"] = (self.pending_totals @ weights) * price_per_second
+        costs["total_cost"] = costs["compute_cost"] + costs["storage_cost"]
+
+        return costs
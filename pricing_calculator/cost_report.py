@@ -0,0 +1,52 @@
+import pandas as pd
+
+from execution_model.utils.const import ExecutionTrigger
+from pricing_calculator.basic_runtime_estimator import BasicRuntimeEstimator
+from pricing_calculator.pricing_calculator import PricingCalculator
+
+
+class CostReport:
+    """
+    Runtime and cost of an execution plan on one hardware configuration. The per-query runtime is estimated once
+    (it draws the cache request latencies) and every runtime and cost figure is derived from it, so they agree
+    with each other. Like PricingCalculator, it sets the network_speed, total_runtime and timestamp columns of plan.
+    """
+
+    def __init__(self, hw_parameters, plan, cache_usage):
+        """
+        :param plan: pd.DataFrame execution plan
+        :param cache_usage: cached bytes billed for the plan duration (BaseExecutionModel.get_cache_usage)
+        """
+        self.hw_parameters = hw_parameters
+        self.cache_usage = cache_usage
+
+        plan["total_runtime"] = BasicRuntimeEstimator.estimate_runtime_per_query(hw_parameters, plan)
+        self.runtime_per_query = plan["total_runtime"]
+        self.runtime = self.runtime_per_query.sum()
+
+        price_per_second = hw_parameters["instance"]["price_per_hour"] / 3600
+        self.compute_cost = self.runtime * price_per_second
+        is_pending = plan["execution_trigger"] == ExecutionTrigger.PENDING.value
+        self.pending_cost = self.runtime_per_query[is_pending].sum() * price_per_second
+
+        plan["timestamp"] = pd.to_datetime(plan["timestamp"])
+        self.duration_seconds = (plan["timestamp"].max() - plan["timestamp"].min()).total_seconds()
+        self.capacity_cost = PricingCalculator.get_cache_capacity_cost(
+            hw_parameters, cache_usage, self.duration_seconds
+        )
+        self.request_cost = PricingCalculator.get_request_cost(
+            hw_parameters, plan["cache_writes"].sum(), plan["cache_reads"].sum()
+        )
+        self.storage_cost = self.capacity_cost + self.request_cost
+        self.total_cost = self.compute_cost + self.storage_cost
+
+    def to_dict(self):
+        return {
+            "runtime": float(self.runtime),
+            "compute_cost": float(self.compute_cost),
+            "capacity_cost": float(self.capacity_cost),
+            "request_cost": float(self.request_cost),
+            "storage_cost": float(self.storage_cost),
+            "pending_cost": float(self.pending_cost),
+            "total_cost": float(self.total_cost),
+        }
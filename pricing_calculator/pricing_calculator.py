@@ -23,15 +23,31 @@ class PricingCalculator:
     def get_storage_cost(hw_parameters, wl, cache_usage):
         wl["timestamp"] = pd.to_datetime(wl["timestamp"])
         duration_seconds = (wl["timestamp"].max() - wl["timestamp"].min()).total_seconds()
+        cache_cost = PricingCalculator.get_cache_capacity_cost(hw_parameters, cache_usage, duration_seconds)
+        cache_cost += PricingCalculator.get_request_cost(
+            hw_parameters, wl["cache_writes"].sum(), wl["cache_reads"].sum()
+        )
+
+        return cache_cost
+
+    @staticmethod
+    def get_cache_capacity_cost(hw_parameters, cache_usage, duration_seconds):
         month_in_seconds = 30 * 24 * 60 * 60
-        cache_cost = cache_usage * hw_parameters["cache"]["cost_per_gb"] / 1e9 * duration_seconds / month_in_seconds
 
-        if hw_parameters["cache"]["type"] == "s3":
-            s3_put_requests_cost = wl["cache_writes"].sum() * hw_parameters["cache"]["put_cost"] / 1000
-            s3_get_requests_cost = wl["cache_reads"].sum() * hw_parameters["cache"]["get_cost"] / 1000
-            cache_cost += s3_put_requests_cost + s3_get_requests_cost
+        return cache_usage * hw_parameters["cache"]["cost_per_gb"] / 1e9 * duration_seconds / month_in_seconds
 
-        return cache_cost
+    @staticmethod
+    def get_request_cost(hw_parameters, put_requests, get_requests):
+        """
+        S3 request cost (0 for block storage caches)
+        """
+        if hw_parameters["cache"]["type"] != "s3":
+            return 0
+
+        s3_put_requests_cost = put_requests * hw_parameters["cache"]["put_cost"] / 1000
+        s3_get_requests_cost = get_requests * hw_parameters["cache"]["get_cost"] / 1000
+
+        return s3_put_requests_cost + s3_get_requests_cost
 
     @staticmethod
     def get_pending_cost(hw_parameters, wl):
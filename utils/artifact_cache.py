@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SOURCE_PACKAGES = ["cache", "execution_model", "pricing_calculator", "utils", "workload_generator"]
+METADATA_KEY = b"artifact_metadata"
+
+_code_version = None
+
+
+def get_code_version():
+    """
+    :return: hash over the sources that produce workloads and plans
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for package in SOURCE_PACKAGES:
+            for path in sorted((ROOT_DIR / package).rglob("*.py")):
+                digest.update(str(path.relative_to(ROOT_DIR)).encode("utf-8"))
+                digest.update(path.read_bytes())
+        _code_version = digest.hexdigest()
+
+    return _code_version
+
+
+def get_frame_hash(df):
+    """
+    :return: content hash of a DataFrame (values, index and column names)
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed on-disk store for workloads and execution plans.
+    Each artifact is one Parquet file named by the hash of its key parts and the code version, extra state
+    (e.g. cache usage) is kept in the file metadata. Files are evicted least recently used first once the
+    directory grows beyond max_size bytes.
+    """
+
+    def __init__(self, directory="artifacts", max_size=10e9, code_version=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.code_version = get_code_version() if code_version is None else code_version
+
+    def get_key(self, parts):
+        """
+        :param parts: dict identifying the artifact, e.g. { kind, config, model, cache_config, load_ref }
+        """
+        payload = json.dumps({**parts, "code_version": self.code_version}, sort_keys=True, default=str)
+
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        return self.directory / f"{key}.parquet"
+
+    def get(self, parts):
+        """
+        :return: (pd.DataFrame, metadata dict) or None on a miss
+        """
+        path = self.get_path(self.get_key(parts))
+        try:
+            table = pq.read_table(path)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+        os.utime(path)  # LRU: mtime is the last access
+        metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+
+        return table.to_pandas(), json.loads(metadata) if metadata else {}
+
+    def put(self, parts, df, metadata=None):
+        key = self.get_key(parts)
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps(metadata or {}, default=str),
+        })
+
+        # write next to the target and rename, concurrent readers never see partial files
+        tmp_path = self.directory / f".{key}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.get_path(key))
+        self.evict()
+
+        return key
+
+    def get_size(self):
+        return sum(path.stat().st_size for path in self.directory.glob("*.parquet"))
+
+    def evict(self):
+        files = []
+        for path in self.directory.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(item[1] for item in files)
+        for _, file_size, path in sorted(files, key=lambda item: item[0]):
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= file_size
+
+    def clear(self):
+        for path in self.directory.glob("*.parquet"):
+            path.unlink(missing_ok=True)
@@ -4,3 +4,11 @@ import hashlib
 def generate_hash(*values):
     combined = "-".join(map(str, values)).encode('utf-8')
     return hashlib.md5(combined).hexdigest()
+
+
+def generate_hashes(*columns):
+    """
+    generate_hash over rows of equally long columns
+    :return: list of hashes
+    """
+    return [generate_hash(*values) for values in zip(*columns)]
@@ -2,6 +2,17 @@ import json
 import os
 import uuid
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from execution_model.utils.const import INTERNED_COLUMNS, WORKLOAD_PLAN_TYPES, WORKLOAD_TYPES_DICT
+
+# low-cardinality / highly repetitive string columns, stored as Arrow dictionaries
+DICTIONARY_COLUMNS = INTERNED_COLUMNS
+
 
 def create_result_directory(name, base_path="result"):
     """Creates a uniquely named directory for a new result and returns the path."""
@@ -22,3 +33,101 @@ def load_json(file_path):
 def save_json_file(obj, file_path):
     with open(file_path, mode="w") as f:
         json.dump(obj, f, indent=4)
+
+
+def apply_types(df, types, categorical=False):
+    """
+    Casts the columns of df listed in types, columns that cannot be cast (e.g. int with missing values) are kept as is
+    :param categorical: keep categorical (dictionary) columns instead of casting them to object
+    """
+    for col, dtype in types.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if categorical and isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if dtype == "int64" and df[col].dtype.kind == "f" and not (df[col] % 1 == 0).all():
+            continue  # fractional (e.g. incremental) sizes
+
+        try:
+            df[col] = df[col].astype(dtype)
+        except (ValueError, TypeError):
+            pass
+
+    return df
+
+
+def save_parquet(df, file_path, dictionary_columns=DICTIONARY_COLUMNS, compression="zstd"):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    for col in dictionary_columns:
+        i = table.schema.get_field_index(col)
+        if i >= 0 and not pa.types.is_dictionary(table.schema.field(i).type):
+            table = table.set_column(i, col, pc.dictionary_encode(table.column(i)))
+
+    pq.write_table(table, file_path, compression=compression)
+
+
+def load_parquet(file_path, columns=None, types=None, memory_map=True, categorical=False):
+    """
+    :param columns: columns to read, None for all
+    :param types: { column: dtype } applied after reading
+    :param memory_map: map the file instead of reading it into a buffer
+    :param categorical: return dictionary columns as pd.Categorical
+    """
+    table = pq.read_table(file_path, columns=columns, memory_map=memory_map)
+    df = table.to_pandas()
+
+    return apply_types(df, types or {}, categorical)
+
+
+def load_frame(file_path, types, columns=None, memory_map=True, categorical=False):
+    """
+    Reads a Parquet or (legacy) CSV file and casts it to types
+    """
+    if str(file_path).endswith(".csv"):
+        return apply_types(pd.read_csv(file_path, usecols=columns), types)
+
+    return load_parquet(file_path, columns, types, memory_map, categorical)
+
+
+def save_workload(wl, file_path):
+    save_parquet(wl, file_path)
+
+
+def load_workload(file_path, columns=None, memory_map=True, categorical=False):
+    return load_frame(file_path, WORKLOAD_TYPES_DICT, columns, memory_map, categorical)
+
+
+def iter_workload_chunks(file_path, columns=None, batch_size=65536, memory_map=True):
+    """
+    Reads a workload Parquet file (ordered by hour) one hour at a time, only one record batch and the
+    rows of the current hour are in memory
+    :return: generator of pd.DataFrame, one per hour
+    """
+    parquet_file = pq.ParquetFile(file_path, memory_map=memory_map)
+    rest = None
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        df = batch.to_pandas()
+        if rest is not None:
+            df = pd.concat([rest, df], ignore_index=True)
+
+        # split at the hour changes, the last hour can continue in the next batch
+        hours = df["hour"].to_numpy()
+        bounds = np.flatnonzero(hours[1:] != hours[:-1]) + 1
+        start = 0
+        for end in bounds:
+            yield apply_types(df.iloc[start:end].reset_index(drop=True), WORKLOAD_TYPES_DICT)
+            start = end
+
+        rest = df.iloc[start:]
+
+    if rest is not None and not rest.empty:
+        yield apply_types(rest.reset_index(drop=True), WORKLOAD_TYPES_DICT)
+
+
+def save_plan(plan, file_path):
+    save_parquet(plan, file_path)
+
+
+def load_plan(file_path, columns=None, memory_map=True, categorical=False):
+    return load_frame(file_path, WORKLOAD_PLAN_TYPES, columns, memory_map, categorical)
@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+def is_missing(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+class Interner:
+    """
+    Dense int32 ids for hashable values (query hashes, table names, enum values), missing values get id -1
+
+    ids = { value: id }
+    values = [ value, ... ] # by id
+    """
+
+    def __init__(self, values=()):
+        """
+        :param values: values interned upfront, e.g. the known values of an enum (their ids stay stable)
+        """
+        self.ids = dict()
+        self.values = []
+        for value in values:
+            self.get_id(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def get_id(self, value):
+        value_id = self.ids.get(value)
+        if value_id is not None:
+            return value_id
+
+        if is_missing(value):
+            return -1
+
+        value_id = len(self.values)
+        self.ids[value] = value_id
+        self.values.append(value)
+
+        return value_id
+
+    def get_ids(self, values):
+        """
+        :param values: array-like of values
+        :return: np.array (int32) of ids, the dictionary is only consulted once per distinct value
+        """
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        if len(uniques) == 0:
+            return np.full(len(codes), -1, dtype=np.int32)
+
+        mapping = np.fromiter((self.get_id(value) for value in uniques), dtype=np.int32, count=len(uniques))
+
+        return np.where(codes >= 0, mapping[codes], -1).astype(np.int32)
+
+    def get_values(self, ids):
+        """
+        :return: np.array (object) of the values, None for id -1
+        """
+        # the trailing None is picked up by id -1
+        values = np.empty(len(self.values) + 1, dtype=object)
+        values[:-1] = self.values
+
+        return values[ids]
+
+    def get_categorical(self, ids):
+        """
+        :return: pd.Categorical over all interned values, NaN for id -1
+        """
+        return pd.Categorical.from_codes(ids, categories=pd.Index(self.values, dtype=object))
+
+
+@lru_cache(maxsize=65536)
+def split_tables(read_tables):
+    """
+    Table names of a comma-joined read_tables value, split once per distinct value
+    :return: tuple of table names
+    """
+    return tuple(read_tables.split(","))
+
+
+@lru_cache(maxsize=65536)
+def get_db_tables(db_instance, read_tables):
+    """
+    :return: tuple of (unique_db_instance, table) pairs read by a query, the keys of the table indexes
+    """
+    return tuple((db_instance, table) for table in split_tables(read_tables))
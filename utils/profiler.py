@@ -0,0 +1,109 @@
+import functools
+import time
+from collections import defaultdict
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        timer = self.profiler.timers[self.name]
+        timer[0] += 1
+        timer[1] += time.perf_counter() - self.start
+        return False
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NO_PHASE = _NoPhase()
+
+
+def _plain(value):
+    # numpy scalars are not JSON serializable
+    return value.item() if hasattr(value, "item") else value
+
+
+class Profiler:
+    """
+    Phase timers and counters of a simulation run (models, cache, dependency graph, plan builder share one).
+    A disabled profiler only costs the enabled check at every call site.
+
+    timers = { phase: [calls, seconds] }
+    counters = { name: [count, total, max] } # e.g. scan sizes, one record per scan
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timers = defaultdict(lambda: [0, 0.0])
+        self.counters = defaultdict(lambda: [0, 0, 0])
+
+    def phase(self, name):
+        """
+        with profiler.phase("cache.put"): ...
+        """
+        if not self.enabled:
+            return NO_PHASE
+
+        return _Phase(self, name)
+
+    def record(self, name, value=1):
+        if not self.enabled:
+            return
+
+        counter = self.counters[name]
+        counter[0] += 1
+        counter[1] += value
+        if value > counter[2]:
+            counter[2] = value
+
+    def to_dict(self):
+        return {
+            "timers": {
+                name: {"calls": calls, "seconds": round(seconds, 6)}
+                for name, (calls, seconds) in sorted(self.timers.items())
+            },
+            "counters": {
+                name: {
+                    "count": count,
+                    "total": _plain(total),
+                    "max": _plain(max_value),
+                    "mean": _plain(total / count) if count else 0,
+                }
+                for name, (count, total, max_value) in sorted(self.counters.items())
+            },
+        }
+
+
+def profiled(name):
+    """
+    Times a method as phase name on self.profiler
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.profiler.enabled:
+                return method(self, *args, **kwargs)
+
+            with self.profiler.phase(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,17 +1,17 @@
-def get_affected_queries_condition(query, workload):
-    mask1 = workload["read_tables"].apply(lambda tables: query.write_table in tables)
-    mask2 = workload["unique_db_instance"] == query.unique_db_instance
+import pandas as pd
 
-    return mask1 & mask2
 
+LOAD_WEIGHTS = {
+    "bytes_scanned": 0.8,
+    "result_size": 0.5,
+    "write_volume": 0.8,
+    "cpu_time": 1.5,
+}
 
-def estimate_query_load(query, ref_values):
-    weights = {
-        "bytes_scanned": 0.8,
-        "result_size": 0.5,
-        "write_volume": 0.8,
-        "cpu_time": 1.5,
-    }
+
+def estimate_query_load(query, ref_values, weights=None):
+    if weights is None:
+        weights = LOAD_WEIGHTS
 
     bs_factor = 0 if ref_values["bytes_scanned"] == 0 else weights["bytes_scanned"] * query.bytes_scanned / ref_values["bytes_scanned"]
     rs_factor = 0 if ref_values["result_size"] == 0 else weights["result_size"] * query.result_size / ref_values["result_size"]
@@ -20,4 +20,26 @@ def estimate_query_load(query, ref_values):
 
     load = bs_factor + rs_factor + wv_factor + cpu_factor
 
-    return round(load, 2)
\ No newline at end of file
+    return round(load, 2)
+
+
+def estimate_load_vectorized(df, ref_values, weights=None):
+    """
+    Column-wise estimate_query_load
+    :param df: pd.DataFrame with bytes_scanned, result_size, write_volume and cpu_time
+    :param ref_values: reference value per column
+    :param weights: weight per column, defaults to LOAD_WEIGHTS
+    :return: pd.Series aligned with df
+    """
+    if weights is None:
+        weights = LOAD_WEIGHTS
+
+    load = pd.Series(0.0, index=df.index)
+    for col in ["bytes_scanned", "result_size", "write_volume"]:
+        if ref_values[col] != 0:
+            load = load + weights[col] * df[col] / ref_values[col]
+
+    if ref_values["cpu_time"] != 0:
+        load = load + weights["cpu_time"] * df["cpu_time"]
+
+    return load.round(2)
@@ -1,41 +1,125 @@
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
-from utils.file import load_json, save_json_file
-from workload_analyzer.redset_workload_extractor import RedsetWorkloadExtractor
+from utils.file import load_json, save_json_file, save_workload
+from workload_analyzer.redset_replay import RedsetTraceReplay, get_cluster_seed
+from workload_analyzer.redset_store import configure_connection
+from workload_analyzer.redset_workload_extractor import RedsetFleetExtractor, RedsetWorkloadExtractor
 from workload_analyzer.workload_insights import WorkloadInsights
 from workload_generator.generator import WorkloadGenerator
 
+
+def generate_cluster_workload(cluster_id, config):
+    wl_generator = WorkloadGenerator(config)
+    wl = wl_generator.generate_workload()
+    insights = WorkloadInsights(wl).get_insights()
+
+    directory =  Path(__file__).parent / f"cluster_workloads/c{cluster_id}"
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+
+    save_workload(wl, f"{directory}/wl.parquet")
+    save_json_file(insights, f"{directory}/insights.json")
+    save_json_file(config, f"{directory}/config.json")
+
+    return cluster_id
+
+
+def generate_fleet_workloads(cluster_ids, base_config, max_workers=None):
+    """
+    Extracts the configs of all clusters from one Redset pass and generates their workloads on a process pool,
+    each cluster is seeded from (base seed, cluster id) so results do not depend on scheduling
+    """
+    configs = RedsetFleetExtractor(cluster_ids).export_configs(base_config)
+    for cluster_id, config in configs.items():
+        config["seed"] = get_cluster_seed(base_config["seed"], cluster_id)
+
+    print(f"Generating workloads for {len(configs)} clusters")
+    with ProcessPoolExecutor(max_workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(generate_cluster_workload, cluster_id, config)
+            for cluster_id, config in configs.items()
+        ]
+        for future in as_completed(futures):
+            print(f"Done: cluster {future.result()}")
+
+
+def replay_fleet_workloads(cluster_ids, base_config):
+    """
+    Maps the Redset queries of the clusters onto the workload schema (no re-sampling)
+    """
+    replay = RedsetTraceReplay(cluster_ids, base_config)
+    for cluster_id in replay.get_cluster_ids():
+        wl = replay.get_workload(cluster_id)
+
+        directory =  Path(__file__).parent / f"cluster_workloads/c{cluster_id}"
+        directory.mkdir(parents=True, exist_ok=True)
+
+        save_workload(wl, f"{directory}/replay_wl.parquet")
+        save_json_file(WorkloadInsights(wl).get_insights(), f"{directory}/replay_insights.json")
+        print(f"Replayed cluster {cluster_id}: {len(wl)} queries")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate workload based on redset cluster traces")
-    parser.add_argument(
+    clusters = parser.add_mutually_exclusive_group(required=True)
+    clusters.add_argument(
         "--cluster_id",
         type=str,
-        required=True,
         help="ID of the cluster"
     )
-    args = parser.parse_args()
-
-    cluster_id = args.cluster_id
-
-    print("Generating workloads for cluster {}".format(cluster_id))
-    extractor = RedsetWorkloadExtractor(
-        cluster_id=cluster_id,
+    clusters.add_argument(
+        "--cluster_ids",
+        type=str,
+        nargs="+",
+        help="IDs of the clusters (fleet mode) or 'all'"
+    )
+    parser.add_argument(
+        "--max_workers",
+        type=int,
+        default=None,
+        help="Processes generating the fleet workloads, defaults to the CPU count"
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Store the Redset queries as workload (replay_wl.parquet) instead of generating a synthetic one"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="DuckDB threads, defaults to the CPU count"
+    )
+    parser.add_argument(
+        "--memory_limit",
+        type=str,
+        default=None,
+        help="DuckDB memory limit, e.g. 8GB"
     )
+    args = parser.parse_args()
+    configure_connection(args.threads, args.memory_limit)
 
     config_path =  Path(__file__).parent / "config.json"
     base_config = load_json(config_path)
-    config = extractor.export_config(base_config)
-    print("Size: ", config["size"])
 
-    wl_generator = WorkloadGenerator(config)
-    wl = wl_generator.generate_workload()
-    insights = WorkloadInsights(wl).get_insights()
+    if args.replay:
+        cluster_ids = [args.cluster_id] if args.cluster_id is not None else args.cluster_ids
+        replay_fleet_workloads("all" if cluster_ids == ["all"] else cluster_ids, base_config)
+    elif args.cluster_ids is not None:
+        cluster_ids = "all" if args.cluster_ids == ["all"] else args.cluster_ids
+        generate_fleet_workloads(cluster_ids, base_config, args.max_workers)
+    else:
+        cluster_id = args.cluster_id
 
-    directory =  Path(__file__).parent / f"cluster_workloads/c{cluster_id}"
-    path = Path(directory)
-    path.mkdir(parents=True, exist_ok=True)
+        print("Generating workloads for cluster {}".format(cluster_id))
+        extractor = RedsetWorkloadExtractor(
+            cluster_id=cluster_id,
+        )
 
-    wl.to_csv(f"{directory}/wl.csv", index=False)
-    save_json_file(insights, f"{directory}/insights.json")
-    save_json_file(config, f"{directory}/config.json")
+        config = extractor.export_config(base_config)
+        print("Size: ", config["size"])
+
+        generate_cluster_workload(cluster_id, config)
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from execution_model.utils.const import WORKLOAD_COLS_LIST, WORKLOAD_TYPES_DICT
+from utils.file import apply_types
+from utils.workload import estimate_load_vectorized
+from workload_analyzer.redset_workload_extractor import RedsetFleetExtractor
+from workload_generator.generator import WorkloadGenerator
+from workload_generator.query_generator.query_generator import QueryGenerator, WRITE_VOLUME_SCALE
+from workload_generator.query_generator.statistical_helpers import compute_lognormal_params
+
+
+def get_cluster_seed(seed, cluster_id):
+    return int(np.random.SeedSequence([seed, int(cluster_id)]).generate_state(1)[0])
+
+
+class RedsetTraceReplay:
+    """
+    Maps the queries of Redset cluster windows one to one onto the workload schema (WORKLOAD_COLS_LIST), so the
+    execution models run on the real query sequence instead of a workload re-sampled from the fitted config.
+
+    - query_hash: feature_fingerprint (queries without fingerprint are unique)
+    - bytes_scanned / cpu_time: mbytes_scanned / execution_duration_ms
+    - read_tables / write_table: the Redset table ids, a write to several tables becomes one write per table
+      (write volume split evenly)
+    - result_size / write_volume: not in Redset, drawn from the base config distributions like QueryGenerator does,
+      result sizes once per fingerprint so repetitions agree
+    """
+
+    def __init__(self, cluster_ids, base_config, start_time=None, duration_h=24, store_path=None):
+        """
+        :param cluster_ids: list of Redset instance ids or "all"
+        :param base_config: result_size, write_volume and ir_scale (query_config) and seed
+        """
+        self.base_config = base_config
+        self.extractor = RedsetFleetExtractor(cluster_ids, start_time, duration_h, store_path)
+        self.bytes_scanned_bounds = None
+
+    def get_cluster_ids(self):
+        return self.extractor.get_cluster_ids()
+
+    def get_ref_values(self, cluster_id, wl):
+        """
+        Load reference (WorkloadGenerator.get_ref_values) from the cluster bytes_scanned bounds and the base config
+        result_size and write_volume bounds, without fitting the full cluster config
+        """
+        if self.bytes_scanned_bounds is None:
+            self.bytes_scanned_bounds = self.extractor.estimate_bytes_scanned_bounds()
+
+        config = {
+            "query_config": {
+                "bytes_scanned": self.bytes_scanned_bounds[int(cluster_id)],
+                "result_size": self.base_config["query_config"]["result_size"],
+                "write_volume": self.base_config["query_config"]["write_volume"],
+            }
+        }
+
+        return WorkloadGenerator(config).get_ref_values(wl)
+
+    def load_queries(self, cluster_id):
+        return self.extractor.query(f"""
+            SELECT
+                coalesce(CAST(feature_fingerprint AS VARCHAR), 'query_' || rn) AS query_hash,
+                query_type,
+                CAST(round(coalesce(mbytes_scanned, 0) * 1e6) AS BIGINT) AS bytes_scanned,
+                coalesce(execution_duration_ms, 0) / 1000 AS cpu_time,
+                database_id AS unique_db_instance,
+                len(read_tables) AS num_read_tables,
+                hour,
+                coalesce(array_to_string(read_tables, ','), '') AS read_tables,
+                unnest(CASE
+                    WHEN query_type = 'select' OR len(write_tables) = 0 THEN [NULL::VARCHAR]
+                    ELSE write_tables
+                END) AS write_table,
+                1 / greatest(len(write_tables), 1) AS write_share,
+                arrival_timestamp AS timestamp
+            FROM (
+                SELECT
+                    *,
+                    list_filter(
+                        list_transform(string_split(coalesce(read_table_ids, ''), ','), x -> trim(x)), x -> x != ''
+                    ) AS read_tables,
+                    list_filter(
+                        list_transform(string_split(coalesce(write_table_ids, ''), ','), x -> trim(x)), x -> x != ''
+                    ) AS write_tables
+                FROM {{cluster}}
+                WHERE instance_id = {int(cluster_id)}
+            )
+            ORDER BY rn
+        """)
+
+    def get_workload(self, cluster_id):
+        """
+        :return: pd.DataFrame with WORKLOAD_COLS_LIST, ready for the execution models
+        """
+        query_config = self.base_config["query_config"]
+        rng = np.random.default_rng(get_cluster_seed(self.base_config["seed"], cluster_id))
+        wl = self.load_queries(cluster_id)
+        n = len(wl)
+        query_type = wl["query_type"].to_numpy()
+        is_select = query_type == "select"
+        bytes_scanned = wl["bytes_scanned"].to_numpy(dtype="float64")
+
+        # result_size (selects only), one draw per fingerprint
+        mu, sigma = compute_lognormal_params(
+            query_config["result_size"]["lower_bound_mb"], query_config["result_size"]["upper_bound_gb"]
+        )
+        hash_codes, unique_hashes = pd.factorize(wl["query_hash"])
+        result_size = rng.lognormal(mu, sigma, size=len(unique_hashes)).astype("int64")[hash_codes]
+        wl["result_size"] = np.where(is_select, result_size, 0)
+
+        # write_volume
+        mu, sigma = compute_lognormal_params(
+            query_config["write_volume"]["lower_bound_mb"], query_config["write_volume"]["upper_bound_gb"]
+        )
+        scale = wl["query_type"].map(WRITE_VOLUME_SCALE).fillna(0).to_numpy(dtype="float64")
+        write_volume = rng.lognormal(mu, sigma, size=n).astype("int64") * scale * wl["write_share"].to_numpy()
+        wl["write_volume"] = np.round(write_volume).astype("int64")
+
+        wl["intermediate_result_size"] = QueryGenerator(query_config).estimate_intermediate_results_sizes(
+            query_types=query_type,
+            bytes_scanned=bytes_scanned,
+            result_sizes=wl["result_size"].to_numpy(),
+            num_read_tables=wl["num_read_tables"].to_numpy(),
+        )
+
+        has_scan = bytes_scanned > 0
+        for col, ratio_col in [("result_size", "scan_to_result_ratio"), ("intermediate_result_size", "scan_to_i_result_ratio")]:
+            wl[ratio_col] = np.divide(
+                wl[col].to_numpy(dtype="float64"), bytes_scanned, out=np.zeros(n), where=has_scan
+            )
+
+        wl["repetition_coefficient"] = (wl.groupby("query_hash")["query_hash"].transform("count") - 1) / n
+        wl["load"] = estimate_load_vectorized(wl, self.get_ref_values(cluster_id, wl))
+
+        return apply_types(wl[WORKLOAD_COLS_LIST].copy(), WORKLOAD_TYPES_DICT)
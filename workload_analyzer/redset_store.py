@@ -0,0 +1,82 @@
+import argparse
+from pathlib import Path
+
+import duckdb
+
+redset_file_path =  Path(__file__).parent / "data/full.parquet"
+redset_store_path = Path(__file__).parent / "data/redset"
+
+connection_settings = {
+    "threads": None,
+    "memory_limit": None,
+}
+_connection = None
+
+
+def configure_connection(threads=None, memory_limit=None):
+    """
+    Sets the DuckDB limits, the connection is (re)created on the next get_connection call
+    :param threads: worker threads, None for the DuckDB default (all cores)
+    :param memory_limit: e.g. "8GB", None for the DuckDB default (80% of the RAM)
+    """
+    global _connection
+    connection_settings["threads"] = threads
+    connection_settings["memory_limit"] = memory_limit
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def get_connection():
+    global _connection
+    if _connection is None:
+        config = {key: str(value) for key, value in connection_settings.items() if value is not None}
+        _connection = duckdb.connect(config=config)
+
+    return _connection
+
+
+def has_store(store_path=None):
+    store_path = Path(redset_store_path if store_path is None else store_path)
+
+    return store_path.is_dir() and any(store_path.glob("instance_id=*"))
+
+
+def get_redset_source(store_path=None):
+    """
+    :return: FROM clause reading the partitioned store if it was ingested, the full Redset file otherwise
+    """
+    store_path = redset_store_path if store_path is None else store_path
+    if has_store(store_path):
+        return f"read_parquet('{Path(store_path)}/**/*.parquet', hive_partitioning = true)"
+
+    return f"read_parquet('{redset_file_path}')"
+
+
+def ingest_redset(source_path=None, store_path=None):
+    """
+    Rewrites Redset into a Hive-partitioned (instance_id, day) Parquet dataset, so queries filtering on
+    instance_id and day only read the files of their clusters and days. Run once after downloading Redset.
+    """
+    source_path = redset_file_path if source_path is None else source_path
+    store_path = redset_store_path if store_path is None else store_path
+
+    get_connection().execute(f"""
+        COPY (
+            SELECT *, CAST(arrival_timestamp AS DATE) AS day
+            FROM read_parquet('{source_path}')
+            ORDER BY arrival_timestamp
+        ) TO '{store_path}' (FORMAT PARQUET, PARTITION_BY (instance_id, day), OVERWRITE_OR_IGNORE)
+    """)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partition redset by instance_id and day")
+    parser.add_argument("--source", type=str, default=str(redset_file_path), help="Redset parquet file")
+    parser.add_argument("--store", type=str, default=str(redset_store_path), help="Output directory")
+    parser.add_argument("--threads", type=int, default=None, help="DuckDB threads")
+    parser.add_argument("--memory_limit", type=str, default=None, help="DuckDB memory limit, e.g. 8GB")
+    args = parser.parse_args()
+
+    configure_connection(args.threads, args.memory_limit)
+    ingest_redset(args.source, args.store)
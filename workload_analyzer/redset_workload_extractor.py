@@ -1,77 +1,199 @@
 import datetime
 import math
-from collections import Counter
-from pathlib import Path
+import uuid
 
-import duckdb
 import pandas as pd
 
-redset_file_path =  Path(__file__).parent / "data/full.parquet"
-db_connection = duckdb.connect()
-
-class RedsetWorkloadExtractor:
-    def __init__(self, cluster_id, start_time=None, duration_h=24):
-        self.cluster_id = cluster_id
-        self.start_time = self.get_start_time(start_time)
-        self.duration_h= duration_h
-        self.end_time = self.get_end_time()
-        self.cluster_data = self.load_from_redset()
-
-    def get_start_time(self, start_time):
-        if start_time is None:
-            start_time = db_connection.execute(f"""
-                SELECT median(arrival_timestamp) AS start_time
-                FROM '{redset_file_path}'
-                WHERE instance_id = {self.cluster_id}
-            """).fetchdf()
-
-        return start_time.iloc[0]["start_time"]
-
-    def get_end_time(self):
-        return self.start_time + datetime.timedelta(hours=self.duration_h)
+from workload_analyzer.redset_store import get_connection, get_redset_source, has_store
+
+class RedsetFleetExtractor:
+    """
+    Derives workload generator configs from the Redset traces of several clusters at once.
+    The queries of every cluster window (only the needed columns) and their per-table access counts (created on
+    first use) are kept in DuckDB temp tables, all statistics are computed as aggregations over them grouped by instance_id, so Redset is
+    scanned once for the whole fleet and only small result sets are converted to pandas.
+    Reads the partitioned store (see redset_store.ingest_redset) if it exists, the full Redset file otherwise.
+    """
+
+    def __init__(self, cluster_ids="all", start_time=None, duration_h=24, store_path=None):
+        """
+        :param cluster_ids: list of Redset instance ids or "all"
+        :param start_time: window start for every cluster, None for the median arrival time of each cluster
+        :param duration_h: window length
+        :param store_path: partitioned Redset store, None for redset_store.redset_store_path
+        """
+        self.cluster_ids = cluster_ids if cluster_ids == "all" else [int(cluster_id) for cluster_id in cluster_ids]
+        self.duration_h = duration_h
+        self.source = get_redset_source(store_path)
+        self.is_partitioned = has_store(store_path)
+        self.windows_table = self.load_windows(start_time)
+        self.cluster_table = self.load_from_redset()
+        self.tables_table = None
+        windows = self.query("SELECT instance_id, start_time FROM {windows} ORDER BY instance_id")
+        self.start_times = dict(zip(windows["instance_id"].tolist(), windows["start_time"]))
+
+    def get_cluster_filter(self, alias=None):
+        if self.cluster_ids == "all":
+            return "TRUE"
+
+        column = "instance_id" if alias is None else f"{alias}.instance_id"
+
+        return f"{column} IN ({', '.join(str(cluster_id) for cluster_id in self.cluster_ids)})"
+
+    def load_windows(self, start_time):
+        """
+        Start time of each cluster window, one Redset scan over (instance_id, arrival_timestamp)
+        :return: name of the temp table
+        """
+        table_name = f"windows_{uuid.uuid4().hex}"
+        start_time = "median(arrival_timestamp)" if start_time is None else f"min(TIMESTAMP '{start_time}')"
+        get_connection().execute(f"""
+            CREATE TEMP TABLE {table_name} AS
+            SELECT instance_id, {start_time} AS start_time
+            FROM {self.source}
+            WHERE {self.get_cluster_filter()}
+            GROUP BY instance_id
+        """)
+
+        return table_name
 
     def load_from_redset(self):
-        query = f"""
-            SELECT * FROM '{redset_file_path}'
-            WHERE instance_id = {self.cluster_id}
-            AND arrival_timestamp between '{self.start_time}' and '{self.end_time}'
-            ORDER BY arrival_timestamp ASC
-            """
-        cluster_data = db_connection.execute(query ).fetchdf()
-
-        cluster_data["arrival_timestamp"] = pd.to_datetime(cluster_data["arrival_timestamp"])
-        valid_q_type = cluster_data["query_type"].isin(["select", "insert", "update", "delete", "analyze"])
-        cluster_data = cluster_data[valid_q_type]
-
-        cluster_data.loc[cluster_data["query_type"] == "analyze", "query_type"] = "select"
-
-        start_time = cluster_data["arrival_timestamp"].min()
-        cluster_data["hour"] = ((cluster_data["arrival_timestamp"] - start_time).dt.total_seconds() // 3600 + 1).astype(
-            int)
-        cluster_data["read_table_ids"] = cluster_data["read_table_ids"].fillna("")
-        cluster_data["write_table_ids"] = cluster_data["write_table_ids"].fillna("")
-
-        return cluster_data
+        """
+        Selects the queries of every cluster window [start_time, start_time + duration_h] into a temp table with
+        analyze mapped to select, hour (1-based from the first query of the cluster), rn (arrival order within the
+        cluster) and NULL table ids as ''
+        :return: name of the temp table
+        """
+        table_name = f"cluster_{uuid.uuid4().hex}"
+        duration_us = int(self.duration_h * 3600 * 1e6)
+        day_filter = "TRUE"
+        if self.is_partitioned:
+            # constant bounds, so only the partitions of the window days are read
+            days = get_connection().execute(f"""
+                SELECT min(start_time)::DATE, (max(start_time) + to_microseconds({duration_us}))::DATE
+                FROM {self.windows_table}
+            """).fetchone()
+            day_filter = f"q.day BETWEEN '{days[0]}' AND '{days[1]}'"
+        get_connection().execute(f"""
+            CREATE TEMP TABLE {table_name} AS
+            WITH cluster_queries AS (
+                SELECT
+                    q.instance_id,
+                    q.arrival_timestamp,
+                    CASE WHEN q.query_type = 'analyze' THEN 'select' ELSE q.query_type END AS query_type,
+                    q.database_id,
+                    coalesce(q.read_table_ids, '') AS read_table_ids,
+                    coalesce(q.write_table_ids, '') AS write_table_ids,
+                    q.mbytes_scanned,
+                    q.execution_duration_ms,
+                    q.feature_fingerprint
+                FROM {self.source} q
+                JOIN {self.windows_table} w ON q.instance_id = w.instance_id
+                WHERE q.arrival_timestamp BETWEEN w.start_time AND w.start_time + to_microseconds({duration_us})
+                AND q.query_type IN ('select', 'insert', 'update', 'delete', 'analyze')
+                AND {self.get_cluster_filter("q")}
+                AND {day_filter}
+            )
+            SELECT
+                *,
+                (epoch_us(arrival_timestamp) - epoch_us(min(arrival_timestamp) OVER (PARTITION BY instance_id))) // 3600000000 + 1 AS hour,
+                row_number() OVER (PARTITION BY instance_id ORDER BY arrival_timestamp) AS rn
+            FROM cluster_queries
+        """)
+
+        return table_name
+
+    def load_table_accesses(self):
+        """
+        Counts the accesses per (instance_id, access, database_id, hour, table) into a temp table, first_rn/first_pos
+        locate the first access (query, position in the list). Table lists repeat, so they are grouped before splitting.
+        :return: name of the temp table
+        """
+        table_name = f"{self.cluster_table}_tables"
+        get_connection().execute(f"""
+            CREATE TEMP TABLE {table_name} AS
+            WITH table_lists AS (
+                SELECT instance_id, access, database_id, hour, table_ids, count(*) AS queries, min(rn) AS first_rn
+                FROM (
+                    SELECT instance_id, rn, hour, database_id, 'read' AS access, read_table_ids AS table_ids
+                    FROM {self.cluster_table}
+                    UNION ALL
+                    SELECT instance_id, rn, hour, database_id, 'write' AS access, write_table_ids AS table_ids
+                    FROM {self.cluster_table}
+                )
+                GROUP BY ALL
+            ), table_accesses AS (
+                SELECT
+                    instance_id, access, database_id, hour, queries, first_rn,
+                    unnest(string_split(table_ids, ',')) AS table_id,
+                    generate_subscripts(string_split(table_ids, ','), 1) AS pos
+                FROM table_lists
+            )
+            SELECT
+                instance_id, access, database_id, hour, trim(table_id) AS table_id,
+                sum(queries) AS accesses, min(first_rn) AS first_rn, arg_min(pos, first_rn) AS first_pos
+            FROM table_accesses
+            GROUP BY ALL
+        """)
+
+        return table_name
+
+    def query(self, sql):
+        if "{tables}" in sql and self.tables_table is None:
+            self.tables_table = self.load_table_accesses()
+
+        return get_connection().execute(sql.format(
+            windows=self.windows_table,
+            cluster=self.cluster_table,
+            tables=self.tables_table,
+        )).fetchdf()
+
+    def get_cluster_ids(self):
+        """
+        :return: ids of the clusters with queries in their window
+        """
+        return self.query("SELECT DISTINCT instance_id FROM {cluster} ORDER BY instance_id")["instance_id"].tolist()
+
+    def get_size(self):
+        sizes = self.query("SELECT instance_id, count(*) AS size FROM {cluster} GROUP BY instance_id")
+
+        return dict(zip(sizes["instance_id"].tolist(), sizes["size"].tolist()))
 
     def get_num_db(self):
-        return self.cluster_data["database_id"].nunique()
+        db_counts = self.query("""
+            SELECT instance_id, count(DISTINCT database_id) AS db_count
+            FROM {cluster}
+            GROUP BY instance_id
+        """)
+
+        return dict(zip(db_counts["instance_id"].tolist(), db_counts["db_count"].tolist()))
+
+    def get_tables_per_hour(self):
+        """
+        Distinct read or written tables per cluster and hour (an empty table list counts as table '')
+        :return: pd.Series { (instance_id, hour): tables_count }
+        """
+        tables = self.query("""
+            SELECT instance_id, hour, count(DISTINCT table_id) AS tables_count
+            FROM {tables}
+            GROUP BY instance_id, hour
+        """)
+
+        return tables.set_index(["instance_id", "hour"])["tables_count"]
 
     def get_num_tables(self, h=None):
-        if not h:
-            df = self.cluster_data
-        else:
-            mask = self.cluster_data["hour"] == h
-            df = self.cluster_data.loc[mask]
+        where = "" if not h else f"WHERE hour = {int(h)}"
+        tables = self.query(f"""
+            SELECT instance_id, count(DISTINCT table_id) AS tables_count
+            FROM {{tables}}
+            {where}
+            GROUP BY instance_id
+        """)
 
-        all_read_tables = df["read_table_ids"].str.split(",").explode()
-        all_write_tables = df["write_table_ids"].str.split(",").explode()
-        all_tables = pd.concat([all_read_tables, all_write_tables])
-        unique_tables = all_tables.str.strip().unique()
-
-        return len(unique_tables)
+        return dict(zip(tables["instance_id"].tolist(), tables["tables_count"].tolist()))
 
     def get_df_hourly(self, df):
-        df_hourly = df.groupby(["hour"]).size().reset_index(name="load")
+        df_hourly = df.groupby(["hour"])["load"].sum().reset_index(name="load")
         max_hr = max(df_hourly["hour"].max() + 1, 25)
         if df.empty:
             max_hr = 25
@@ -83,143 +205,257 @@ class RedsetWorkloadExtractor:
         return df_hourly
 
     def extract_hourly_distributions(self):
-        read_condition = self.cluster_data["query_type"].isin(["select"])
-        read_queries = self.cluster_data[read_condition]
-        df_hourly = self.get_df_hourly(read_queries)
-        df_hourly['hour'] = df_hourly['hour'].astype(str)
-        df_hourly["p"] = df_hourly["load"]
-        df_hourly.drop('load', inplace=True, axis=1)
-        df_hourly["p"] = df_hourly["p"] / len(read_queries) if len(read_queries) > 0 else 0
-        df_hourly["tables_count"] = df_hourly.apply(lambda row: self.get_num_tables(row["hour"]), axis=1)
-        df_hourly.set_index("hour", inplace=True)
-        read_hourly_distributions = df_hourly.to_dict(orient="index")
-
-        write_condition = ~read_condition
-        write_queries = self.cluster_data[write_condition]
-        df_hourly = self.get_df_hourly(write_queries)
-        df_hourly['hour'] = df_hourly['hour'].astype(str)
-        df_hourly["p"] = df_hourly["load"]
-        df_hourly.drop('load', inplace=True, axis=1)
-        df_hourly["p"] = df_hourly["p"] / len(write_queries) if len(write_queries) != 0 else 0
-        df_hourly["tables_count"] = df_hourly.apply(lambda row: self.get_num_tables(row["hour"]), axis=1)
-        df_hourly.set_index("hour", inplace=True)
-        write_hourly_distributions = df_hourly.to_dict(orient="index")
-
-        return read_hourly_distributions, write_hourly_distributions
+        """
+        :return: { instance_id: (read_hourly_distributions, write_hourly_distributions) }
+        """
+        hourly_counts = self.query("""
+            SELECT instance_id, hour, query_type = 'select' AS is_read, count(*) AS load
+            FROM {cluster}
+            GROUP BY ALL
+        """)
+        tables_per_hour = self.get_tables_per_hour()
+
+        distributions = dict()
+        for cluster_id, cluster_counts in hourly_counts.groupby("instance_id"):
+            cluster_tables = tables_per_hour.loc[cluster_id]
+
+            cluster_distributions = []
+            for is_read in [True, False]:
+                queries = cluster_counts[cluster_counts["is_read"] == is_read]
+                total = queries["load"].sum()
+                df_hourly = self.get_df_hourly(queries)
+                df_hourly["p"] = df_hourly["load"] / total if total > 0 else 0
+                df_hourly["tables_count"] = df_hourly["hour"].map(cluster_tables).fillna(0).astype(int)
+                df_hourly['hour'] = df_hourly['hour'].astype(str)
+                df_hourly.drop('load', inplace=True, axis=1)
+                df_hourly.set_index("hour", inplace=True)
+                cluster_distributions.append(df_hourly.to_dict(orient="index"))
+
+            distributions[cluster_id] = tuple(cluster_distributions)
+
+        return distributions
 
     def estimate_bytes_scanned_bounds(self):
-        lower_bound_mb, upper_bound_mb = self.cluster_data["mbytes_scanned"].quantile([.02,.97])
+        bounds = self.query("""
+            SELECT
+                instance_id,
+                quantile_cont(mbytes_scanned, 0.02) AS lower_bound_mb,
+                quantile_cont(mbytes_scanned, 0.97) AS upper_bound_mb
+            FROM {cluster}
+            GROUP BY instance_id
+        """)
 
         return {
-            "lower_bound_mb": lower_bound_mb,
-            "upper_bound_gb": upper_bound_mb / 1e3
+            row.instance_id: {
+                "lower_bound_mb": row.lower_bound_mb,
+                "upper_bound_gb": row.upper_bound_mb / 1e3
+            }
+            for row in bounds.itertuples()
         }
 
+    def get_read_tables_counts(self):
+        """
+        :return: pd.DataFrame with the number of queries per cluster and read table count (an empty list counts as 1)
+        """
+        return self.query("""
+            SELECT instance_id, len(string_split(read_table_ids, ',')) AS read_tables, count(*) AS queries
+            FROM {cluster}
+            GROUP BY instance_id, read_tables
+            ORDER BY instance_id, read_tables
+        """)
+
     def get_read_tables_distribution(self):
-        read_tables_counts = self.cluster_data['read_table_ids'].apply(lambda x: len(x.split(',')))
-        read_table_counts = read_tables_counts.value_counts(normalize=True).sort_index().astype(float)
+        distributions = dict()
+        for cluster_id, counts in self.get_read_tables_counts().groupby("instance_id", sort=False):
+            p = counts["queries"] / counts["queries"].sum()
+            distributions[cluster_id] = dict(zip(counts["read_tables"].tolist(), p.astype(float).tolist()))
+
+        return distributions
+
+    def get_table_access_pattern(self, access):
+        """
+        Access frequencies of the read or written tables per database, tables ordered by first access.
+        Databases are looked up as 0..db_count - 1, databases without accesses get an empty distribution.
+        :return: { instance_id: { db_id: { table: p } } }
+        """
+        accesses = self.query(f"""
+            SELECT
+                instance_id, database_id, table_id,
+                sum(accesses) / sum(sum(accesses)) OVER (PARTITION BY instance_id, database_id) AS p
+            FROM {{tables}}
+            WHERE access = '{access}' AND table_id != ''
+            GROUP BY instance_id, database_id, table_id
+            ORDER BY instance_id, database_id, min(first_rn), arg_min(first_pos, first_rn)
+        """)
+        by_db = {
+            key: dict(zip(group["table_id"], group["p"].astype(float)))
+            for key, group in accesses.groupby(["instance_id", "database_id"], sort=False)
+        }
 
-        return read_table_counts.to_dict()
+        return {
+            cluster_id: {db_id: by_db.get((cluster_id, db_id), dict()) for db_id in range(db_count)}
+            for cluster_id, db_count in self.get_num_db().items()
+        }
 
     def get_table_read_access_pattern(self):
-        db_ids = self.cluster_data["database_id"].nunique()
-        dist = dict()
-        for db_id in range(db_ids):
-            mask = self.cluster_data['database_id'] == db_id
-            data = self.cluster_data[mask]
+        return self.get_table_access_pattern("read")
 
-            table_reads = data['read_table_ids'].dropna().str.split(',')
-            flat_list = [table.strip() for sublist in table_reads for table in sublist if table.strip() != '']
-            counts = Counter(flat_list)
+    def get_table_write_access_pattern(self):
+        return self.get_table_access_pattern("write")
 
-            # Step 3: Compute percentages
-            total_accesses = sum(counts.values())
-            distribution = {table: (count / total_accesses) for table, count in counts.items()}
+    def get_db_access_pattern(self):
+        accesses = self.query("""
+            SELECT instance_id, database_id, count(*) / sum(count(*)) OVER (PARTITION BY instance_id) AS p
+            FROM {cluster}
+            GROUP BY instance_id, database_id
+            ORDER BY instance_id, min(rn)
+        """)
 
-            dist[db_id] = distribution
+        return {
+            cluster_id: dict(zip(group["database_id"].tolist(), group["p"].astype(float).tolist()))
+            for cluster_id, group in accesses.groupby("instance_id", sort=False)
+        }
 
-        return dist
+    def max_read_tables_per_query(self):
+        max_read_tables = self.get_read_tables_counts().groupby("instance_id")["read_tables"].max()
 
-    def get_table_write_access_pattern(self):
-        db_ids = self.cluster_data["database_id"].nunique()
-        dist = dict()
-        for db_id in range(db_ids):
-            mask = self.cluster_data['database_id'] == db_id
-            data = self.cluster_data[mask]
+        return {cluster_id: int(count) for cluster_id, count in max_read_tables.items()}
 
-            table_reads = data['write_table_ids'].dropna().str.split(',')
-            flat_list = [table.strip() for sublist in table_reads for table in sublist if table.strip() != '']
-            counts = Counter(flat_list)
+    def estimate_repetitiveness(self):
+        counts = self.query("""
+            SELECT
+                instance_id,
+                count(*) AS size,
+                count(DISTINCT feature_fingerprint) + max(CASE WHEN feature_fingerprint IS NULL THEN 1 ELSE 0 END) AS unique_queries
+            FROM {cluster}
+            GROUP BY instance_id
+        """)
 
-            # Step 3: Compute percentages
-            total_accesses = sum(counts.values())
-            distribution = {table: (count / total_accesses) for table, count in counts.items()}
+        return {
+            row.instance_id: round((row.size - row.unique_queries) / row.size, 4)
+            for row in counts.itertuples()
+        }
 
-            dist[db_id] = distribution
+    def estimate_query_type_frequencies(self):
+        counts = self.query("""
+            SELECT instance_id, query_type, count(*) AS queries
+            FROM {cluster}
+            GROUP BY instance_id, query_type
+        """)
+
+        frequencies = dict()
+        for cluster_id, cluster_counts in counts.groupby("instance_id"):
+            cluster_counts = cluster_counts.set_index("query_type")["queries"]
+            size = cluster_counts.sum()
+            frequencies[cluster_id] = {
+                query_type: math.floor(cluster_counts.get(query_type, 0) / size * 1000) / 1000
+                for query_type in ["select", "insert", "update", "delete"]
+            }
+
+        return frequencies
+
+    def export_configs(self, base_config):
+        """
+        :return: { instance_id: config } for the clusters with queries in their window
+        """
+        hourly_distributions = self.extract_hourly_distributions()
+        sizes = self.get_size()
+        query_type_p = self.estimate_query_type_frequencies()
+        bytes_scanned = self.estimate_bytes_scanned_bounds()
+        max_num_read_tables = self.max_read_tables_per_query()
+        read_tables_distribution = self.get_read_tables_distribution()
+        db_access_dist = self.get_db_access_pattern()
+        db_count = self.get_num_db()
+        table_count = self.get_num_tables()
+        tables_read_access_dist = self.get_table_read_access_pattern()
+        tables_write_access_dist = self.get_table_write_access_pattern()
+        repetitiveness = self.estimate_repetitiveness()
+
+        configs = dict()
+        for cluster_id in self.get_cluster_ids():
+            h_dist_r, h_dist_w = hourly_distributions[cluster_id]
+            configs[cluster_id] = {
+                "size": sizes[cluster_id],
+                "query_config": {
+                    "query_type_p": query_type_p[cluster_id],
+                    "bytes_scanned": bytes_scanned[cluster_id],
+                    "result_size": base_config["query_config"]["result_size"],
+                    "write_volume": base_config["query_config"]["write_volume"],
+                    "max_num_read_tables": max_num_read_tables[cluster_id],
+                    "read_tables_distribution": read_tables_distribution[cluster_id],
+                    "db_access_dist": db_access_dist[cluster_id],
+                    "ir_scale": base_config["query_config"]["ir_scale"],
+                    "db_count": db_count[cluster_id],
+                },
+                "scheduler_config": {
+                    "hourly_distribution_r": h_dist_r,
+                    "hourly_distribution_w": h_dist_w,
+                    "start_time": self.start_times[cluster_id].strftime('%Y-%m-%d %H:%M:%S'),
+                    "duration_h": self.duration_h,
+                    "table_count": table_count[cluster_id],
+                    "tables_read_access_dist": tables_read_access_dist[cluster_id],
+                    "tables_write_access_dist": tables_write_access_dist[cluster_id],
+                },
+                "repetitiveness": repetitiveness[cluster_id],
+                "seed": base_config["seed"]
+            }
+
+        return configs
 
-        return dist
 
-    def get_db_access_pattern(self):
-        db_list = list(self.cluster_data["database_id"])
-        counts = Counter(db_list)
-        total_accesses = sum(counts.values())
-        distribution = {table: (count / total_accesses) for table, count in counts.items()}
+class RedsetWorkloadExtractor:
+    """
+    Single cluster view of RedsetFleetExtractor
+    """
 
-        return distribution
+    def __init__(self, cluster_id, start_time=None, duration_h=24, store_path=None):
+        self.cluster_id = int(cluster_id)
+        self.duration_h= duration_h
+        self.fleet = RedsetFleetExtractor([self.cluster_id], self.get_start_time(start_time), duration_h, store_path)
+        self.start_time = self.fleet.start_times[self.cluster_id]
+        self.end_time = self.get_end_time()
 
-    def max_read_tables_per_query(self):
-        read_tables_counts = self.cluster_data['read_table_ids'].apply(lambda x: len(x.split(',')))
+    def get_start_time(self, start_time):
+        if start_time is None:
+            return None
 
-        return int(read_tables_counts.max())
+        return pd.Timestamp(start_time.iloc[0]["start_time"])
 
-    def estimate_repetitiveness(self):
-        unique_exact_queries = self.cluster_data.drop_duplicates("feature_fingerprint")
-        exact_repetitiveness = (len(self.cluster_data) - len(unique_exact_queries)) / len(self.cluster_data)
+    def get_end_time(self):
+        return self.start_time + datetime.timedelta(hours=self.duration_h)
 
-        return round(exact_repetitiveness, 4)
+    def get_num_db(self):
+        return self.fleet.get_num_db()[self.cluster_id]
 
-    def estimate_query_type_frequencies(self):
-        num_insert_queries = len(self.cluster_data[self.cluster_data["query_type"] == "insert"])
-        num_update_queries = len(self.cluster_data[self.cluster_data["query_type"] == "update"])
-        num_delete_queries = len(self.cluster_data[self.cluster_data["query_type"] == "delete"])
-        num_select_queries = len(self.cluster_data[self.cluster_data["query_type"] == "select"])
+    def get_num_tables(self, h=None):
+        return self.fleet.get_num_tables(h).get(self.cluster_id, 0)
 
-        size = len(self.cluster_data)
+    def extract_hourly_distributions(self):
+        return self.fleet.extract_hourly_distributions()[self.cluster_id]
 
-        return {
-            "select": math.floor(num_select_queries / size * 1000) / 1000,
-            "insert": math.floor(num_insert_queries / size * 1000) / 1000,
-            "update": math.floor(num_update_queries / size * 1000) / 1000,
-            "delete": math.floor(num_delete_queries / size * 1000) / 1000
-        }
+    def estimate_bytes_scanned_bounds(self):
+        return self.fleet.estimate_bytes_scanned_bounds()[self.cluster_id]
 
-    def export_config(self, base_config):
-        h_dist_r, h_dist_w = self.extract_hourly_distributions()
+    def get_read_tables_distribution(self):
+        return self.fleet.get_read_tables_distribution()[self.cluster_id]
 
-        return {
-            "size": len(self.cluster_data),
-            "query_config": {
-                "query_type_p": self.estimate_query_type_frequencies(),
-                "bytes_scanned": self.estimate_bytes_scanned_bounds(),
-                "result_size": base_config["query_config"]["result_size"],
-                "write_volume": base_config["query_config"]["write_volume"],
-                "max_num_read_tables": self.max_read_tables_per_query(),
-                "read_tables_distribution": self.get_read_tables_distribution(),
-                "db_access_dist": self.get_db_access_pattern(),
-                "ir_scale": base_config["query_config"]["ir_scale"],
-                "db_count": self.get_num_db(),
-            },
-            "scheduler_config": {
-                "hourly_distribution_r": h_dist_r,
-                "hourly_distribution_w": h_dist_w,
-                "start_time": self.start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                "duration_h": self.duration_h,
-                "table_count": self.get_num_tables(),
-                "tables_read_access_dist": self.get_table_read_access_pattern(),
-                "tables_write_access_dist": self.get_table_write_access_pattern(),
-            },
-            "repetitiveness": self.estimate_repetitiveness(),
-            "seed": base_config["seed"]
-        }
+    def get_table_read_access_pattern(self):
+        return self.fleet.get_table_read_access_pattern()[self.cluster_id]
+
+    def get_table_write_access_pattern(self):
+        return self.fleet.get_table_write_access_pattern()[self.cluster_id]
 
+    def get_db_access_pattern(self):
+        return self.fleet.get_db_access_pattern()[self.cluster_id]
+
+    def max_read_tables_per_query(self):
+        return self.fleet.max_read_tables_per_query()[self.cluster_id]
+
+    def estimate_repetitiveness(self):
+        return self.fleet.estimate_repetitiveness()[self.cluster_id]
+
+    def estimate_query_type_frequencies(self):
+        return self.fleet.estimate_query_type_frequencies()[self.cluster_id]
 
+    def export_config(self, base_config):
+        return self.fleet.export_configs(base_config)[self.cluster_id]
@@ -1,39 +1,82 @@
 import numpy as np
 import pandas as pd
 
-from utils.workload import get_affected_queries_condition, estimate_query_load
+from utils.interning import split_tables
+from utils.workload import estimate_load_vectorized
 from workload_generator.query_generator.query_generator import QueryGenerator
 from workload_generator.scheduler.scheduler import QueryScheduler
 
 
 class WorkloadGenerator:
-    def __init__(self, config):
+    def __init__(self, config, artifact_cache=None):
+        """
+        :param config: generator config (incl. seed)
+        :param artifact_cache: utils.artifact_cache.ArtifactCache to reuse generated workloads, None to disable
+        """
         self.config = config
+        self.artifact_cache = artifact_cache
         self.ref_values = None
 
     def generate_workload(self):
+        artifact_key = {"kind": "workload", "config": self.config}
+        if self.artifact_cache is not None:
+            artifact = self.artifact_cache.get(artifact_key)
+            if artifact is not None:
+                workload, _ = artifact
+                self.ref_values = self.get_ref_values(workload)
+                return workload
+
+        rng = self.get_rng()
+        query_pool = self.generate_query_pool(rng)
+        scheduled_queries = self.schedule_queries(query_pool, rng)
+        workload = self.prepare_workload(scheduled_queries)
+
+        if self.artifact_cache is not None:
+            self.artifact_cache.put(artifact_key, workload)
+
+        return workload
+
+    def get_rng(self):
+        """
+        Seeds the global numpy state and returns the generator shared by the stages of generate_workload
+        """
         np.random.seed(self.config["seed"])
 
+        return np.random.default_rng(self.config["seed"])
+
+    def generate_query_pool(self, rng):
+        """
+        Unique queries and their repetitions in random order
+        """
         unique_queries_count, repetitions_count = self.get_unique_and_repeated_query_counts()
 
         # generate unique queries
-        query_generator = QueryGenerator(self.config["query_config"])
-        unique_queries = []
-        for count in range(unique_queries_count):
-            query = query_generator.generate_query()
-            unique_queries.append(query)
+        query_generator = QueryGenerator(self.config["query_config"], rng)
+        unique_queries = query_generator.generate_queries(unique_queries_count)
+
+        repetitions = rng.choice(unique_queries_count, size=repetitions_count, replace=True)
+        query_pool = pd.concat([unique_queries, unique_queries.iloc[repetitions]], ignore_index=True)
+
+        return query_pool.iloc[rng.permutation(len(query_pool))].reset_index(drop=True)
 
-        repetitions = np.random.choice(unique_queries, size=repetitions_count, replace=True).tolist()
-        queries = unique_queries + repetitions
-        np.random.shuffle(queries)
-        query_pool = pd.DataFrame(queries)
+    def schedule_queries(self, query_pool, rng):
+        query_scheduler = QueryScheduler(self.config["scheduler_config"], query_pool, rng)
 
-        query_scheduler = QueryScheduler(self.config["scheduler_config"], query_pool)
-        scheduled_queries = query_scheduler.assign_timestamps()
+        return query_scheduler.assign_timestamps()
 
+    def prepare_workload(self, scheduled_queries):
+        """
+        Deltas of repetitive queries, repetition coefficients and loads of the scheduled queries
+        """
         workload = self.preprocess_workload(scheduled_queries)
         workload = self.calculate_repetition_coefficient(workload)
-        self.ref_values = {
+        self.ref_values = self.get_ref_values(workload)
+        workload["load"] = estimate_load_vectorized(workload, self.ref_values)
+
+        return workload
+
+    def get_ref_values(self, workload):
+        return {
             "bytes_scanned": (self.config["query_config"]["bytes_scanned"]["lower_bound_mb"] * 1e6 +
                               self.config["query_config"]["bytes_scanned"][
                                   "upper_bound_gb"] * 1e9) / 2,
@@ -45,14 +88,14 @@ class WorkloadGenerator:
                                  "upper_bound_gb"] * 1e9) / 2,
             "cpu_time": workload["cpu_time"].median(),
         }
-        workload["load"] = workload.apply(lambda q: estimate_query_load(q, self.ref_values), axis=1)
-
-        return workload
 
     def preprocess_workload(self, workload):
         """
         Simulates dynamic execution of the query workload by changing bytes_scanned and result_sizes of repetitive queries
         based on incoming data ingestion (inserts, deletes, updates)
+        A query is affected by all earlier writes to one of its read tables (same unique_db_instance). Deltas are
+        accumulated per table and joined back, deletes clip at bytes_scanned >= 10, result_size >= 7 and
+        intermediate_result_size >= 5.
         :param workload: pd.DataFrame
         :return: pd.DataFrame with updated values
         """
@@ -64,38 +107,157 @@ class WorkloadGenerator:
         workload["write_volume"] = workload["write_volume"].astype("int64")
         workload = workload.sort_values(by="timestamp")
 
-        for query in workload.itertuples(index=True):
-            if query.query_type == "select":
-                continue
+        writes = self.get_write_history(workload)
+        if writes.empty:
+            return workload
+
+        history = self.get_read_history(workload, writes)
+        ratios = {
+            "bytes_scanned": np.ones(len(workload)),
+            "result_size": workload["scan_to_result_ratio"].to_numpy(dtype="float64"),
+            "intermediate_result_size": workload["scan_to_i_result_ratio"].to_numpy(dtype="float64"),
+        }
+        floors = {
+            "bytes_scanned": 10,
+            "result_size": 7,
+            "intermediate_result_size": 5,
+        }
+
+        has_delete = history["deletes"].to_numpy() > 0
+        single_table = history["tables"].to_numpy() <= 1
+        scan_delta = history["scan_delta"].to_numpy()
+        min_scan_delta = history["min_scan_delta"].to_numpy()
+        min_delete_delta = history["min_delete_delta"].to_numpy()
 
-            affected_queries_condition = get_affected_queries_condition(query, workload) & (
-                    workload["timestamp"] > query.timestamp)
-            delta = query.write_volume
-            delta_result = (workload[affected_queries_condition]["scan_to_result_ratio"] \
-                           * delta).astype("int64")
-            delta_i_result = (workload[affected_queries_condition]["scan_to_i_result_ratio"] \
-                             * delta).astype("int64")
+        values = dict()
+        replay = np.zeros(len(workload), dtype=bool)
+        for col, ratio in ratios.items():
+            initial = workload[col].to_numpy(dtype="float64")
+            floor = floors[col]
+            updated = initial + ratio * scan_delta
 
-            if query.query_type in ("insert", "update"):  # not sure about update
-                workload.loc[affected_queries_condition, "bytes_scanned"] += delta
-                workload.loc[affected_queries_condition, "result_size"] += delta_result
-                workload.loc[affected_queries_condition, "intermediate_result_size"] += delta_i_result
+            # a delete clips at the floor: value = delta + max(initial, floor - lowest delta reached by a delete)
+            exact = has_delete & single_table
+            updated[exact] = ratio[exact] * scan_delta[exact] + np.maximum(
+                initial[exact], floor - ratio[exact] * min_delete_delta[exact]
+            )
 
-            elif query.query_type == "delete":
-                workload.loc[affected_queries_condition, "bytes_scanned"] = (
-                        workload.loc[affected_queries_condition, "bytes_scanned"] - delta
-                ).clip(lower=10)
+            # several written tables: the clip only matters if the interleaved deltas can reach the floor
+            may_clip = has_delete & ~single_table & (initial + ratio * min_scan_delta < floor)
+            no_delta = may_clip & (ratio == 0)
+            updated[no_delta] = np.maximum(initial[no_delta], floor)
+            replay |= may_clip & ~no_delta
 
-                workload.loc[affected_queries_condition, "result_size"] = (
-                        workload.loc[affected_queries_condition, "result_size"] - delta_result
-                ).clip(lower=7)
+            values[col] = updated
 
-                workload.loc[affected_queries_condition, "intermediate_result_size"] = (
-                        workload.loc[affected_queries_condition, "intermediate_result_size"] - delta_i_result
-                ).clip(lower=5)
+        if replay.any():
+            self.replay_writes(workload, writes, np.flatnonzero(replay), ratios, floors, values)
+
+        for col, updated in values.items():
+            workload[col] = updated.astype("int64")
 
         return workload
 
+    def get_write_history(self, workload):
+        """
+        Cumulative signed write deltas per (unique_db_instance, table) in execution order
+        :param workload: pd.DataFrame sorted by timestamp
+        :return: pd.DataFrame with one row per write
+        """
+        query_type = workload["query_type"].to_numpy()
+        is_write = np.isin(query_type, ["insert", "update", "delete"])
+        is_delete = query_type[is_write] == "delete"
+        write_volume = workload["write_volume"].to_numpy()[is_write].astype("float64")
+
+        writes = pd.DataFrame({
+            "pos": np.flatnonzero(is_write),
+            "unique_db_instance": workload["unique_db_instance"].to_numpy()[is_write],
+            "table": workload["write_table"].to_numpy()[is_write],
+            "timestamp": workload["timestamp"].to_numpy()[is_write],
+            "delta": np.where(is_delete, -write_volume, write_volume),
+            "is_delete": is_delete,
+        })
+
+        groups = writes.groupby(["unique_db_instance", "table"], sort=False)
+        writes["scan_delta"] = groups["delta"].cumsum()
+        writes["min_scan_delta"] = writes.groupby(["unique_db_instance", "table"], sort=False)["scan_delta"].cummin().clip(upper=0)
+        writes["min_delete_delta"] = writes["scan_delta"].where(writes["is_delete"], np.inf)
+        writes["min_delete_delta"] = writes.groupby(["unique_db_instance", "table"], sort=False)["min_delete_delta"].cummin()
+        writes["deletes"] = groups["is_delete"].cumsum()
+
+        return writes
+
+    def get_read_history(self, workload, writes):
+        """
+        Joins every (query, read table) with the write history of that table up to (excluding) the query timestamp
+        :param workload: pd.DataFrame sorted by timestamp
+        :param writes: pd.DataFrame from get_write_history
+        :return: pd.DataFrame with one row per query (in workload order)
+        """
+        reads = pd.DataFrame({
+            "pos": np.arange(len(workload)),
+            "unique_db_instance": workload["unique_db_instance"].to_numpy(),
+            "table": workload["read_tables"].map(split_tables).to_numpy(),
+            "timestamp": workload["timestamp"].to_numpy(),
+        })
+        reads = reads.explode("table").drop_duplicates(["pos", "table"])
+
+        history = pd.merge_asof(
+            reads.sort_values(["timestamp", "pos"], kind="stable"),
+            writes.drop(columns=["pos", "delta", "is_delete"]).sort_values("timestamp", kind="stable"),
+            on="timestamp",
+            by=["unique_db_instance", "table"],
+            allow_exact_matches=False,
+        )
+        history = history.dropna(subset=["scan_delta"])
+        history = history.groupby("pos").agg(
+            scan_delta=("scan_delta", "sum"),
+            min_scan_delta=("min_scan_delta", "sum"),
+            min_delete_delta=("min_delete_delta", "min"),
+            deletes=("deletes", "sum"),
+            tables=("table", "count"),
+        )
+
+        return history.reindex(np.arange(len(workload))).fillna({
+            "scan_delta": 0,
+            "min_scan_delta": 0,
+            "min_delete_delta": np.inf,
+            "deletes": 0,
+            "tables": 0,
+        })
+
+    def replay_writes(self, workload, writes, positions, ratios, floors, values):
+        """
+        Applies the writes preceding each of the given queries one by one, clipping deletes at the floors
+        """
+        by_table = {
+            key: (group["timestamp"].to_numpy(), group["pos"].to_numpy(), group["delta"].to_numpy(), group["is_delete"].to_numpy())
+            for key, group in writes.groupby(["unique_db_instance", "table"], sort=False)
+        }
+        timestamps = workload["timestamp"].to_numpy()
+        db_instances = workload["unique_db_instance"].to_numpy()
+        read_tables = workload["read_tables"].to_numpy()
+
+        for pos in positions:
+            chunks = []
+            for table in set(split_tables(read_tables[pos])):
+                history = by_table.get((db_instances[pos], table))
+                if history is None:
+                    continue
+                end = np.searchsorted(history[0], timestamps[pos], side="left")
+                chunks.append((history[1][:end], history[2][:end], history[3][:end]))
+
+            order = np.argsort(np.concatenate([chunk[0] for chunk in chunks]), kind="stable")
+            deltas = np.concatenate([chunk[1] for chunk in chunks])[order]
+            is_delete = np.concatenate([chunk[2] for chunk in chunks])[order]
+
+            for col, ratio in ratios.items():
+                value = workload[col].iat[pos]
+                for delta, delete in zip(deltas, is_delete):
+                    delta = np.trunc(ratio[pos] * delta)
+                    value = max(value + delta, floors[col]) if delete else value + delta
+                values[col][pos] = value
+
     def get_unique_and_repeated_query_counts(self):
         repetitiveness = self.config["repetitiveness"]
         wl_size = self.config["size"]
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from utils.file import load_json, save_json_file
+from utils.file import load_json, save_json_file, save_workload
 from workload_analyzer.workload_insights import WorkloadInsights
 from workload_generator.generator import WorkloadGenerator
 
@@ -19,6 +19,6 @@ if __name__ == "__main__":
     path = Path(directory)
     path.mkdir(parents=True, exist_ok=True)
 
-    wl.to_csv(f"{directory}/wl.csv", index=False)
+    save_workload(wl, f"{directory}/wl.parquet")
     save_json_file(insights, f"{directory}/insights.json")
     save_json_file(config, f"{directory}/config.json")
\ No newline at end of file
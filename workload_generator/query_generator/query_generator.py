@@ -1,12 +1,115 @@
 import numpy as np
+import pandas as pd
 
-from utils.common import generate_hash
+from utils.common import generate_hash, generate_hashes
 from workload_generator.query_generator.statistical_helpers import compute_lognormal_params
 
+WRITE_VOLUME_SCALE = {
+    "select": 0,
+    "insert": 1.0,
+    "delete": 0.01,
+    "update": 0.1,
+}
+
+CPU_TIME_FACTORS = {
+    "bs": 1e-9,  # ms per byte
+    "rs": 1e-8,
+    "wv": 1e-8,
+}
+
+IR_QUERY_TYPE_MULTIPLIERS = {
+    'select': 2.0,
+    'update': 1.8,
+    'insert': 1.2,
+    'delete': 1.5
+}
+
 
 class QueryGenerator:
-    def __init__(self, config):
+    def __init__(self, config, rng=None):
+        """
+        :param config: query_config
+        :param rng: np.random.Generator used by generate_queries (generate_query draws from np.random)
+        """
         self.config = config
+        self.rng = np.random.default_rng() if rng is None else rng
+
+    def generate_queries(self, n):
+        """
+        Draws n queries at once, same distributions as generate_query
+        :param n: number of queries
+        :return: pd.DataFrame with one query per row
+        """
+        rng = self.rng
+
+        type_p = np.array(list(self.config["query_type_p"].values()))
+        type_p /= type_p.sum()
+        q_type = rng.choice(list(self.config["query_type_p"].keys()), size=n, p=type_p)
+        is_select = q_type == "select"
+
+        # bytes_scanned
+        bytes_scanned = self.config["bytes_scanned"]
+        lb = max(bytes_scanned["lower_bound_mb"], 1)
+        up = max(bytes_scanned["upper_bound_gb"], 1)
+        mu, sigma = compute_lognormal_params(lb, up, 0.999, 0.25)
+        q_bytes_scanned = rng.lognormal(mean=mu, sigma=sigma, size=n).astype("int64")
+
+        # num read tables
+        values = np.array(list(self.config["read_tables_distribution"].keys())).astype("int64")
+        p = list(self.config["read_tables_distribution"].values())
+        q_num_read_tables = rng.choice(values, size=n, p=p)
+
+        # result_size (selects only)
+        result_size = self.config["result_size"]
+        mu, sigma = compute_lognormal_params(result_size["lower_bound_mb"], result_size["upper_bound_gb"])
+        q_result_size = np.where(is_select, rng.lognormal(mu, sigma, size=n).astype("int64"), 0)
+
+        # intermediate_result_size
+        q_ir_size = self.estimate_intermediate_results_sizes(
+            query_types=q_type,
+            bytes_scanned=q_bytes_scanned,
+            result_sizes=q_result_size,
+            num_read_tables=q_num_read_tables,
+        )
+
+        # write_volume
+        write_volume = self.config["write_volume"]
+        mu, sigma = compute_lognormal_params(write_volume["lower_bound_mb"], write_volume["upper_bound_gb"])
+        scale = pd.Series(q_type).map(WRITE_VOLUME_SCALE).fillna(0).to_numpy(dtype="float64")
+        q_write_volume = rng.lognormal(mu, sigma, size=n).astype("int64") * scale
+
+        # cpu_time
+        jitter = rng.gamma(2.0, 2.0, size=n)
+        q_cpu_time = (CPU_TIME_FACTORS["bs"] * q_bytes_scanned +
+                      CPU_TIME_FACTORS["rs"] * q_result_size +
+                      CPU_TIME_FACTORS["wv"] * q_write_volume +
+                      jitter) / 1000  # convert to seconds
+
+        db_p = np.array(list(self.config["db_access_dist"].values()))
+        db_p /= db_p.sum()
+        q_db_id = rng.choice(list(self.config["db_access_dist"].keys()), size=n, p=db_p)
+
+        q_hash = generate_hashes(
+            q_type.tolist(),
+            q_bytes_scanned.tolist(),
+            q_result_size.tolist(),
+            q_write_volume.tolist(),
+            q_cpu_time.tolist(),
+            q_db_id.tolist(),
+            q_num_read_tables.tolist(),
+        )
+
+        return pd.DataFrame({
+            "query_hash": q_hash,
+            "query_type": q_type,
+            "bytes_scanned": q_bytes_scanned,
+            "result_size": q_result_size,
+            "write_volume": q_write_volume,
+            "cpu_time": q_cpu_time,
+            "unique_db_instance": q_db_id,
+            "num_read_tables": q_num_read_tables,
+            "intermediate_result_size": q_ir_size,
+        })
 
     def generate_query(self):
         type_p = np.array(list(self.config["query_type_p"].values()))
@@ -46,28 +149,17 @@ class QueryGenerator:
         )
 
         # write_volume
-        write_volume_scale = {
-            "select": 0,
-            "insert": 1.0,
-            "delete": 0.01,
-            "update": 0.1,
-        }
         write_volume = self.config["write_volume"]
         lb = write_volume["lower_bound_mb"]
         up = write_volume["upper_bound_gb"]
         mu, sigma = compute_lognormal_params(lb, up)
-        q_write_volume = int(np.random.lognormal(mu, sigma)) * write_volume_scale.get(q_type)
+        q_write_volume = int(np.random.lognormal(mu, sigma)) * WRITE_VOLUME_SCALE.get(q_type)
 
         # cpu_time
-        factors = {
-            "bs": 1e-9,  # ms per byte
-            "rs": 1e-8,
-            "wv": 1e-8,
-        }
         jitter = np.random.gamma(2.0, 2.0)
-        q_cpu_time = (factors["bs"] * q_bytes_scanned +
-                      factors["rs"] * q_result_size +
-                      factors["wv"] * q_write_volume +
+        q_cpu_time = (CPU_TIME_FACTORS["bs"] * q_bytes_scanned +
+                      CPU_TIME_FACTORS["rs"] * q_result_size +
+                      CPU_TIME_FACTORS["wv"] * q_write_volume +
                       jitter) / 1000  # convert to seconds
 
         # specify unique_db_instance uniformly
@@ -109,15 +201,9 @@ class QueryGenerator:
             result_size,
             num_read_tables,
     ):
-        query_type_multipliers = {
-            'select': 2.0,
-            'update': 1.8,
-            'insert': 1.2,
-            'delete': 1.5
-        }
         scale = self.config["ir_scale"]
 
-        query_type_factor = query_type_multipliers.get(query_type, 1.5)
+        query_type_factor = IR_QUERY_TYPE_MULTIPLIERS.get(query_type, 1.5)
         read_tables_factor = 1 + (num_read_tables - 1) * 0.5
 
         # reduction ratio (how much the data was reduced from scan to result)
@@ -130,3 +216,27 @@ class QueryGenerator:
                             * 10 ** scale
 
         return round(intermediate_size)
+
+    def estimate_intermediate_results_sizes(
+            self,
+            query_types,
+            bytes_scanned,
+            result_sizes,
+            num_read_tables,
+    ):
+        """
+        Array version of estimate_intermediate_results_size
+        """
+        scale = self.config["ir_scale"]
+        bytes_scanned = np.asarray(bytes_scanned, dtype="float64")
+
+        query_type_factor = pd.Series(query_types).map(IR_QUERY_TYPE_MULTIPLIERS).fillna(1.5).to_numpy()
+        read_tables_factor = 1 + (np.asarray(num_read_tables) - 1) * 0.5
+        reduction_ratio = np.divide(
+            result_sizes, bytes_scanned, out=np.ones(len(bytes_scanned)), where=bytes_scanned > 0
+        )
+
+        intermediate_size = bytes_scanned * query_type_factor * read_tables_factor * reduction_ratio \
+                            * 10 ** scale
+
+        return np.round(intermediate_size).astype("int64")
@@ -1,104 +1,121 @@
-import datetime
-
 import numpy as np
 import pandas as pd
 
 
 class QueryScheduler:
-    def __init__(self, config, query_pool):
+    def __init__(self, config, query_pool, rng=None):
+        """
+        :param config: scheduler_config
+        :param query_pool: pd.DataFrame of queries to schedule
+        :param rng: np.random.Generator used by assign_timestamps
+        """
         self.config = config
         self.query_pool = query_pool
+        self.rng = np.random.default_rng() if rng is None else rng
         nums = list(range(1, self.config["table_count"] + 1))
         self.table_pool = [str(num) + np.random.choice(["B"]) for num in nums]
-
-    def get_random_timestamp_in_hour(self, hour):
-        start = pd.Timestamp(self.config["start_time"])
-        seconds_offset = np.random.randint(0, 3599) + hour * 3600
-        return start + datetime.timedelta(seconds=seconds_offset)
-
-    def assign_timestamps(self):
-        def assign_read_tables(q):
-            db_id = q["unique_db_instance"]
-            table_pool = np.array(list(self.config["tables_read_access_dist"][db_id].keys()))
-            if len(table_pool) == 0:
-                table_pool = self.table_pool
+        self.read_cdfs = self.get_table_cdfs(self.config["tables_read_access_dist"])
+        self.write_cdfs = self.get_table_cdfs(self.config["tables_write_access_dist"])
+
+    def get_table_cdfs(self, access_dist):
+        """
+        :param access_dist: { db_id: { table: p } }
+        :return: { db_id: (tables, cdf) }, uniform over table_pool for dbs without distribution
+        """
+        cdfs = dict()
+        for db_id, table_p in access_dist.items():
+            if len(table_p) == 0:
+                tables = np.array(self.table_pool)
+                p = np.ones(len(tables))
             else:
-                table_pool = table_pool + 'A'
-
-            count = min(q["num_read_tables"], len(table_pool))
-            read_table_p = np.array(list(self.config["tables_read_access_dist"][db_id].values()))
-            read_table_p = [p / read_table_p.sum() for p in read_table_p]
-
-            if len(read_table_p) == 0:
-                read_table_p = [1/len(table_pool)] * len(table_pool) # uniform
-
-            read_tables = np.random.choice(
-                table_pool,
-                count,
-                p=read_table_p,
-                replace=False
-            )
-
-            return ",".join(read_tables)
-
-        def assign_write_table(q):
-            db_id = q["unique_db_instance"]
-            table_pool = np.array(list(self.config["tables_write_access_dist"][db_id].keys()))
-            if len(table_pool) == 0:
-                table_pool = self.table_pool
-            else:
-                table_pool = table_pool + 'A'
-
-            write_table_p = np.array(list(self.config["tables_write_access_dist"][db_id].values()))
-            write_table_p = [p / write_table_p.sum() for p in write_table_p]
-
-            if len(write_table_p) == 0:
-                write_table_p = [1/len(table_pool)] * len(table_pool) # uniform
-
-            write_table = np.random.choice(
-                table_pool,
-                p=write_table_p,
-                replace=False
-            )
-
-            return write_table
+                tables = np.array(list(table_p.keys())) + 'A'
+                p = np.array(list(table_p.values()), dtype="float64")
+
+            cdf = np.cumsum(p)
+            cdfs[db_id] = (tables, cdf / cdf[-1])
+
+        return cdfs
+
+    def draw_tables(self, db_id, counts, cdfs):
+        """
+        Draws counts[i] distinct tables for each query (same distribution as np.random.choice(replace=False, p)):
+        the j-th table is drawn from the CDF and redrawn while it repeats one of the first j - 1
+        :param db_id: unique_db_instance of the queries
+        :param counts: np.array, number of tables per query
+        :param cdfs: read_cdfs or write_cdfs
+        :return: list of np.array of table indices
+        """
+        tables, cdf = cdfs[db_id]
+        counts = np.minimum(counts, len(tables))
+        picks = np.full((len(counts), counts.max(initial=0)), -1)
+
+        for j in range(picks.shape[1]):
+            pending = np.flatnonzero(counts > j)
+            for _ in range(100):
+                draws = np.searchsorted(cdf, self.rng.random(len(pending)), side="right")
+                picks[pending, j] = np.minimum(draws, len(cdf) - 1)
+                repeated = (picks[pending, :j] == picks[pending, j, None]).any(axis=1)
+                pending = pending[repeated]
+                if len(pending) == 0:
+                    break
+
+            # heavily skewed distributions: fall back to sequential sampling for the remaining queries
+            p = np.diff(cdf, prepend=0)
+            for i in pending:
+                picks[i, :counts[i]] = self.rng.choice(len(tables), counts[i], p=p, replace=False)
+
+        return [row[:count] for row, count in zip(picks, counts)]
+
+    def assign_tables(self, queries):
+        """
+        :param queries: pd.DataFrame of scheduled queries
+        :return: (read_tables, write_table) as np.arrays aligned with queries
+        """
+        read_tables = np.empty(len(queries), dtype=object)
+        write_table = np.full(len(queries), None, dtype=object)
+        is_write = (queries["query_type"] != "select").to_numpy()
+        db_ids = queries["unique_db_instance"].to_numpy()
+        num_read_tables = queries["num_read_tables"].to_numpy().astype("int64")
+
+        for db_id in pd.unique(db_ids):
+            rows = np.flatnonzero(db_ids == db_id)
+            tables = self.read_cdfs[db_id][0]
+            picks = self.draw_tables(db_id, num_read_tables[rows], self.read_cdfs)
+            read_tables[rows] = [",".join(tables[pick]) for pick in picks]
+
+            rows = rows[is_write[rows]]
+            tables = self.write_cdfs[db_id][0]
+            picks = self.draw_tables(db_id, np.ones(len(rows), dtype="int64"), self.write_cdfs)
+            write_table[rows] = [tables[pick[0]] for pick in picks]
+
+        return read_tables, write_table
 
+    def assign_timestamps(self):
         hours = self.config["duration_h"] # hours of execution
-        read_q_condition = self.query_pool["query_type"] == "select"
-        write_q_condition = self.query_pool["query_type"] != "select"
-        read_size = len(self.query_pool[read_q_condition])
-        write_size = len(self.query_pool[write_q_condition])
-        hourly_wl = pd.DataFrame()
-        wl = self.query_pool.copy()
-
-        for h in range(1, hours):
-            read_q_count = int(self.config["hourly_distribution_r"][str(h)]["p"] * read_size)
-            write_q_count = int(self.config["hourly_distribution_w"][str(h)]["p"] * write_size)
-
-            read_queries = wl.loc[read_q_condition].sample(read_q_count)
-            wl.drop(read_queries.index, inplace=True)
-
-            write_queries = wl.loc[write_q_condition].sample(write_q_count)
-            wl.drop(write_queries.index, inplace=True)
-
-            if not read_queries.empty:
-                read_queries["hour"] = h
-                read_queries["read_tables"] = read_queries.apply(lambda q: assign_read_tables(q), axis=1)
-
-                read_queries["write_table"] = None
-                read_queries["timestamp"] = [self.get_random_timestamp_in_hour(h) for _ in range(read_q_count)]
-
-            if not write_queries.empty:
-                write_queries["hour"] = h
-                write_queries["read_tables"] = write_queries.apply(lambda q: assign_read_tables(q), axis=1)
-
-                write_queries["timestamp"] = [self.get_random_timestamp_in_hour(h) for _ in range(write_q_count)]
-                write_queries["write_table"] = write_queries.apply(lambda q: assign_write_table(q), axis=1)
-
-            hourly_wl = pd.concat([hourly_wl, read_queries, write_queries])
-
-        workload = hourly_wl.sort_values("timestamp")
+        is_read = (self.query_pool["query_type"] == "select").to_numpy()
+        read_size = int(is_read.sum())
+        write_size = len(self.query_pool) - read_size
+
+        # split a random permutation of reads and writes into hourly batches
+        selected = []
+        selected_hours = []
+        for condition, size, hourly_distribution in [
+            (is_read, read_size, self.config["hourly_distribution_r"]),
+            (~is_read, write_size, self.config["hourly_distribution_w"]),
+        ]:
+            counts = np.array([int(hourly_distribution[str(h)]["p"] * size) for h in range(1, hours)], dtype="int64")
+            positions = self.rng.permutation(np.flatnonzero(condition))[:counts.sum()]
+            selected.append(positions)
+            selected_hours.append(np.repeat(np.arange(1, hours), counts))
+
+        selected = np.concatenate(selected)
+        workload = self.query_pool.iloc[selected].copy()
+        workload["hour"] = np.concatenate(selected_hours)
+        workload["read_tables"], workload["write_table"] = self.assign_tables(workload)
+
+        seconds_offset = self.rng.integers(0, 3599, size=len(workload)) + workload["hour"].to_numpy() * 3600
+        workload["timestamp"] = pd.Timestamp(self.config["start_time"]) + pd.to_timedelta(seconds_offset, unit="s")
+
+        workload = workload.sort_values("timestamp")
 
         return workload
-
-